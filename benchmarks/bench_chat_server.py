@@ -0,0 +1,133 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_server import ChatServer, SessionManager, ShardedChatServer
+
+SCRIPT = [
+    "hello",
+    "My name is {name}",
+    "Tell me about CS101",
+    "Show available courses",
+    "What are the prerequisites for CS201",
+    "When does MATH101 meet?",
+    "Show my schedule",
+    "library services",
+]
+
+
+async def run_client(port, client_id, rounds, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    session = f"bench-{client_id}"
+    for _ in range(rounds):
+        for template in SCRIPT:
+            request = {"session": session, "message": template.format(name=f"student{client_id}")}
+            start = time.perf_counter()
+            writer.write(json.dumps(request).encode("utf-8") + b"\n")
+            await writer.drain()
+            reply = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - start)
+            assert "response" in reply, reply
+    writer.close()
+
+
+async def run(clients, rounds):
+    manager = SessionManager()
+    server = ChatServer(manager, port=0)
+    await server.start()
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(server.port, i, rounds, latencies) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    server.server.close()
+    await server.server.wait_closed()
+
+    latencies.sort()
+    return {
+        "clients": clients,
+        "sessions": manager.stats()["sessions"],
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 3),
+    }
+
+
+def serve(workers, ready):
+    server = ShardedChatServer(workers, port=0) if workers > 1 else ChatServer(SessionManager(), port=0)
+
+    async def start():
+        await server.start()
+        ready.put(server.port)
+        await server.serve_forever()
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        asyncio.run(start())
+    finally:
+        if workers > 1:
+            server.stop_workers()
+
+
+def client_process(port, first_client, clients, rounds):
+    async def drive():
+        latencies = []
+        await asyncio.gather(*(run_client(port, first_client + i, rounds, latencies) for i in range(clients)))
+        return latencies
+    return asyncio.run(drive())
+
+
+def run_workers(workers, clients, rounds, client_processes):
+    # Server and load generators run in separate processes so the front process only routes.
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(workers, ready))
+    server.start()
+    port = ready.get(timeout=60)
+    per_process = max(1, clients // client_processes)
+    with multiprocessing.Pool(client_processes) as pool:
+        start = time.perf_counter()
+        results = pool.starmap(client_process, [(port, i * per_process, per_process, rounds)
+                                                 for i in range(client_processes)])
+        elapsed = time.perf_counter() - start
+    # Give the server a moment to see the clients hang up before stopping it.
+    time.sleep(0.5)
+    server.terminate()
+    server.join()
+
+    latencies = sorted(latency for result in results for latency in result)
+    return {
+        "workers": workers,
+        "clients": per_process * client_processes,
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Localhost chat server load test")
+    parser.add_argument("--workers", help="comma-separated worker process counts to compare, e.g. 1,2,4")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--client-processes", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    args = parser.parse_args()
+
+    if args.workers:
+        for workers in (int(w) for w in args.workers.split(",")):
+            print(json.dumps(run_workers(workers, args.clients, args.rounds, args.client_processes)))
+        return
+
+    for clients in (1, 10, 100, 500):
+        print(json.dumps(asyncio.run(run(clients, rounds=max(1, 200 // clients)))))
+
+
+if __name__ == "__main__":
+    main()
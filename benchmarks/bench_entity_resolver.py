@@ -0,0 +1,49 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_benchmarks import synthetic_catalog
+
+
+def typo(text: str, rng: random.Random) -> str:
+    if len(text) < 4:
+        return text
+    i = rng.randrange(1, len(text) - 1)
+    return text[:i] + text[i + 1:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzzy course/department resolution latency")
+    parser.add_argument("--courses", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    kb = synthetic_catalog(args.courses)
+    start = time.perf_counter()
+    resolver = kb.entity_resolver()
+    print(f"index build: {time.perf_counter() - start:.2f} s for {len(resolver.values)} entries, "
+          f"{len(resolver.postings)} trigrams")
+
+    rng = random.Random(5)
+    codes = list(kb.courses)
+    names = [kb.courses[code]["name"] for code in codes]
+    queries = ([typo(rng.choice(names), rng) for _ in range(args.queries // 2)] +
+               [rng.choice(codes).lower() for _ in range(args.queries // 4)] +
+               [typo(rng.choice(list(kb.department_aliases)), rng) for _ in range(args.queries // 4)])
+
+    latencies = []
+    for query in queries:
+        t0 = time.perf_counter()
+        resolver.resolve(query)
+        latencies.append(time.perf_counter() - t0)
+    latencies.sort()
+    print(f"resolve: p50 {latencies[len(latencies) // 2] * 1e3:.3f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:.3f} ms over {len(latencies)} queries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import datetime
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import ConversationHistory, NLPProcessor, UniversityKnowledgeBase
+
+TURNS = 100_000
+MESSAGES = ["Tell me about CS101", "Register for MATH101", "yes", "Show my schedule",
+            "Computer Science department info", "hello", "Drop PHY201", "library services"]
+
+
+def classified_turns(nlp):
+    classified = [(m, *nlp.classify_intent(m)) for m in MESSAGES]
+    for i in range(TURNS):
+        message, intent, entities = classified[i % len(classified)]
+        # Fresh strings and dicts per turn, as generate_response would produce them.
+        yield f"{message} #{i}", intent, dict(entities)
+
+
+def measure(build):
+    tracemalloc.start()
+    kept = build()
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return size, peak
+
+
+def legacy(nlp):
+    history = []
+    for message, intent, entities in classified_turns(nlp):
+        history.append({"user": message, "intent": intent, "entities": entities,
+                        "timestamp": datetime.datetime.now()})
+    return history
+
+
+def ring(nlp, capacity, spill_path=None):
+    history = ConversationHistory(capacity, spill_path)
+    for message, intent, entities in classified_turns(nlp):
+        history.append(message, intent, entities)
+    history.close()
+    assert history.last_intents(3)
+    return history
+
+
+def main():
+    nlp = NLPProcessor(UniversityKnowledgeBase())
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {
+            "list_of_dicts": measure(lambda: legacy(nlp)),
+            "ring_100k": measure(lambda: ring(nlp, TURNS)),
+            "ring_1k_with_spill": measure(lambda: ring(nlp, 1000, os.path.join(tmp, "spill.jsonl"))),
+        }
+    for name, (size, peak) in results.items():
+        print(json.dumps({"history": name, "turns": TURNS,
+                          "retained_bytes": size, "bytes_per_turn": round(size / TURNS, 1),
+                          "peak_bytes": peak}))
+
+
+if __name__ == "__main__":
+    main()
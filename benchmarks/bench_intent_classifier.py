@@ -0,0 +1,64 @@
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import IntentClassifier, NLPProcessor, UniversityKnowledgeBase
+
+MESSAGES = [
+    "Tell me about CS101",
+    "When does MATH101 meet?",
+    "What are the prerequisites for CS301",
+    "Register for PHY201",
+    "Drop CS201",
+    "Show my schedule",
+    "Show available courses",
+    "My name is Sarah",
+    "Tell me about the library services",
+    "hello there",
+    "thanks a lot",
+    "what is the weather like today",
+]
+
+
+def legacy_match(intent_patterns, text_lower):
+    for intent, patterns in intent_patterns.items():
+        for pattern in patterns:
+            if re.search(pattern, text_lower):
+                return intent
+    return None
+
+
+def synthetic_patterns(base_patterns, extra_intents):
+    patterns = {f"synthetic_{i}": [rf"zq{i}x (report|status) (\w+\d+)", rf"show zq{i}x"]
+                for i in range(extra_intents)}
+    # Synthetic intents go first so that they sit in front of every real intent.
+    patterns.update(base_patterns)
+    return patterns
+
+
+def per_message_us(match, messages, rounds):
+    lowered = [m.lower() for m in messages]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in lowered:
+            match(text)
+    return (time.perf_counter() - start) / (rounds * len(lowered)) * 1e6
+
+
+def main():
+    base = NLPProcessor(UniversityKnowledgeBase()).intent_patterns
+    print(f"{'intents':>8} {'legacy us/msg':>14} {'compiled us/msg':>16}")
+    for extra in (0, 50, 200, 1000):
+        patterns = synthetic_patterns(base, extra)
+        classifier = IntentClassifier(patterns)
+        rounds = max(5, 2000 // (extra + 10))
+        legacy = per_message_us(lambda t: legacy_match(patterns, t), MESSAGES, rounds)
+        compiled = per_message_us(classifier.match, MESSAGES, rounds * 10)
+        print(f"{len(patterns):>8} {legacy:>14.2f} {compiled:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
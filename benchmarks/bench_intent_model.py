@@ -0,0 +1,82 @@
+import argparse
+import collections
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intent_model import np, read_utterances, train
+from main import NLPProcessor, UniversityKnowledgeBase
+
+DEFAULT_UTTERANCES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "data", "intent_utterances.tsv")
+
+
+def cross_validated(examples, folds: int, kb: UniversityKnowledgeBase):
+    # Every utterance is classified by a model that never saw it during training.
+    predictions = [None] * len(examples)
+    for fold in range(folds):
+        held_out = [i for i in range(len(examples)) if i % folds == fold]
+        model = train([example for i, example in enumerate(examples) if i % folds != fold])
+        nlp = NLPProcessor(kb, intent_model=model)
+        for i in held_out:
+            predictions[i] = nlp.classify_intent(examples[i][0])[0]
+    return predictions
+
+
+def latency(fn, texts, repeat: int):
+    latencies = []
+    for _ in range(repeat):
+        for text in texts:
+            start = time.perf_counter()
+            fn(text)
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {"p50_us": round(latencies[len(latencies) // 2] * 1e6, 2),
+            "p99_us": round(latencies[int(len(latencies) * 0.99)] * 1e6, 2)}
+
+
+def batch_throughput(nlp: NLPProcessor, texts, repeat: int):
+    batch = [f"{text} " * (i // len(texts) + 1) for i, text in enumerate(texts * repeat)]
+    start = time.perf_counter()
+    nlp.classify_batch(batch)
+    return round(len(batch) / (time.perf_counter() - start), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy and latency of the intent model against the regex patterns")
+    parser.add_argument("--utterances", default=DEFAULT_UTTERANCES)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    examples = read_utterances(args.utterances)
+    texts = [text for text, _ in examples]
+    kb = UniversityKnowledgeBase()
+    regex_nlp = NLPProcessor(kb)
+    model_nlp = NLPProcessor(kb, intent_model=train(examples))
+
+    regex_predictions = [regex_nlp.classify_intent(text)[0] for text in texts]
+    model_predictions = cross_validated(examples, args.folds, kb)
+    print(f"{len(examples)} labelled utterances, model backend: {'numpy' if np is not None else 'python'}")
+    for name, predictions in (("regex", regex_predictions), (f"model ({args.folds}-fold)", model_predictions)):
+        correct = sum(predicted == intent for predicted, (_, intent) in zip(predictions, examples))
+        print(f"{name:<16} accuracy {correct / len(examples):6.1%}")
+
+    errors = collections.Counter()
+    for regex_predicted, model_predicted, (_, intent) in zip(regex_predictions, model_predictions, examples):
+        errors[intent, "regex"] += regex_predicted != intent
+        errors[intent, "model"] += model_predicted != intent
+    print(f"\n{'intent':<20} {'regex errors':>12} {'model errors':>12}")
+    for intent in sorted({intent for _, intent in examples}):
+        print(f"{intent:<20} {errors[intent, 'regex']:>12} {errors[intent, 'model']:>12}")
+
+    print()
+    for name, nlp in (("regex", regex_nlp), ("model", model_nlp)):
+        print(f"{name:<6} classify_intent {latency(nlp.classify_intent, texts, args.repeat)}, "
+              f"classify_batch {batch_throughput(nlp, texts, args.repeat)} msgs/sec")
+
+
+if __name__ == "__main__":
+    main()
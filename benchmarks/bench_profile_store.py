@@ -0,0 +1,71 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import NLPProcessor, UniversityChatbot, UniversityKnowledgeBase
+from profile_store import ProfileStore
+
+COURSES = ["CS101", "MATH101", "ENG101"]
+
+
+def session(kb, nlp, store, session_id, rounds, errors):
+    chatbot = UniversityChatbot(kb, nlp, profile_store=store)
+    chatbot.generate_response(f"My name is student{session_id}")
+    for _ in range(rounds):
+        for course_code in COURSES:
+            for message in (f"register for {course_code}", "yes", f"drop {course_code}", "yes"):
+                chatbot.generate_response(message)
+    if chatbot.student.registered_courses:
+        errors.append(session_id)
+
+
+def run(sessions, rounds, path, fsync):
+    kb = UniversityKnowledgeBase()
+    for course_code in COURSES:
+        kb.update_course(course_code, capacity=10 ** 9)
+    nlp = NLPProcessor(kb)
+    store = ProfileStore(path, fsync=fsync)
+    errors = []
+    threads = [threading.Thread(target=session, args=(kb, nlp, store, i, rounds, errors)) for i in range(sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    store.close()
+
+    records = store.appended_seq
+    recovered = ProfileStore(path)
+    recovered.close()
+    return {
+        "sessions": sessions,
+        "records": records,
+        "commits": store.commits,
+        "records_per_commit": round(records / max(1, store.commits), 1),
+        "confirmations_per_sec": round(sessions * rounds * len(COURSES) * 2 / elapsed, 1),
+        "recovered_profiles": recovered.stats()["profiles"],
+        "consistent": not errors and not any(recovered.enrollment_counts().values()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Group-commit throughput of the profile log under concurrent sessions")
+    parser.add_argument("--sessions", default="1,4,16,64")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--no-fsync", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in (int(s) for s in args.sessions.split(",")):
+            path = os.path.join(tmp, f"profiles-{count}.log")
+            print(run(count, args.rounds, path, fsync=not args.no_fsync))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import UniversityKnowledgeBase
+
+
+def worker(kb, course_codes, attempts, seed, counters, oversold):
+    rng = random.Random(seed)
+    registered = []
+    committed = dropped = rejected = 0
+    for _ in range(attempts):
+        if registered and rng.random() < 0.3:
+            course_code = registered.pop(rng.randrange(len(registered)))
+            if kb.seats.drop(course_code):
+                dropped += 1
+            continue
+
+        course_code = rng.choice(course_codes)
+        hold = kb.seats.hold(course_code)
+        if hold is None:
+            rejected += 1
+            continue
+        if rng.random() < 0.2:
+            kb.seats.release(hold)
+            continue
+        if kb.seats.commit(hold):
+            committed += 1
+            registered.append(course_code)
+        course = kb.courses[course_code]
+        if course['enrolled'] > course['capacity']:
+            oversold.append(course_code)
+
+    with counters['lock']:
+        counters['committed'] += committed
+        counters['dropped'] += dropped
+        counters['rejected'] += rejected
+
+
+def run(threads, attempts):
+    kb = UniversityKnowledgeBase()
+    course_codes = list(kb.courses)
+    initial = sum(course['enrolled'] for course in kb.courses.values())
+    counters = {'lock': threading.Lock(), 'committed': 0, 'dropped': 0, 'rejected': 0}
+    oversold = []
+
+    pool = [threading.Thread(target=worker, args=(kb, course_codes, attempts, seed, counters, oversold))
+            for seed in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    final = sum(course['enrolled'] for course in kb.courses.values())
+    assert not oversold, oversold
+    assert final == initial + counters['committed'] - counters['dropped']
+    assert all(course['enrolled'] <= course['capacity'] for course in kb.courses.values())
+    return {
+        'threads': threads,
+        'attempts': threads * attempts,
+        'committed': counters['committed'],
+        'dropped': counters['dropped'],
+        'rejected_full': counters['rejected'],
+        'ops_per_sec': round(threads * attempts / elapsed),
+        'oversold': len(oversold),
+    }
+
+
+def main():
+    for threads in (1, 8, 64, 256):
+        print(json.dumps(run(threads, attempts=max(50, 20000 // threads))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import NLPProcessor, SearchIndex, UniversityChatbot, UniversityKnowledgeBase
+
+PREFIXES = ["CS", "MATH", "ENG", "PHY", "BIO", "CHEM", "HIST", "ECON", "PSY", "ART"]
+DAYS = ["MWF", "TTh", "MW", "F"]
+TEMPLATES = [
+    "Tell me about {code}",
+    "{code} course info",
+    "When does {code} meet",
+    "What are the prerequisites for {code}",
+    "Register for {code}",
+    "Drop {code}",
+    "Show my schedule",
+    "Show available courses",
+    "Tell me about the {dept} department",
+    "Who is the head of the {dept} department",
+    "When does registration start",
+    "What university services are there",
+    "Where is the library",
+    "hello",
+    "thanks!",
+    "what's the weather like on campus",
+]
+
+
+def synthetic_catalog(course_count: int, seed: int = 7):
+    rng = random.Random(seed)
+    base = UniversityKnowledgeBase()
+    courses = dict(base.courses)
+    codes = list(courses)
+    number = 100
+    while len(courses) < course_count:
+        prefix = PREFIXES[len(courses) % len(PREFIXES)]
+        code = f"{prefix}{number % 1000:03d}" if number < 1000 else f"{prefix[:2]}{chr(65 + number // 1000 % 26)}{number % 1000:03d}"
+        number += 1
+        if code in courses:
+            continue
+        start = rng.randint(8, 16)
+        capacity = rng.choice([20, 25, 30, 40, 60])
+        courses[code] = {
+            "name": f"{prefix} Topics {number}",
+            "credits": rng.choice([1, 2, 3, 4]),
+            "prerequisites": rng.sample(codes[-50:], k=rng.randint(0, 2)) if codes else [],
+            "description": f"Synthetic course {number} covering selected {prefix} topics",
+            "schedule": f"{rng.choice(DAYS)} {start}:00-{start + 1}:00 {'AM' if start < 12 else 'PM'}",
+            "instructor": f"Dr. Faculty{rng.randint(1, max(1, course_count // 8))}",
+            "room": f"Building {rng.randint(1, 40)} Room {rng.randint(100, 499)}",
+            "capacity": capacity,
+            "enrolled": rng.randint(0, capacity),
+            "available": True,
+        }
+        codes.append(code)
+    return UniversityKnowledgeBase(courses=courses, departments=base.departments,
+                                   general_info=base.general_info,
+                                   department_aliases=base.department_aliases)
+
+
+def corpus(kb: UniversityKnowledgeBase, size: int, seed: int = 11):
+    rng = random.Random(seed)
+    codes = list(kb.courses)
+    departments = [d["name"] for d in kb.departments.values()]
+    return [rng.choice(TEMPLATES).format(code=rng.choice(codes), dept=rng.choice(departments))
+            for _ in range(size)]
+
+
+def measure(name: str, fn, inputs, repeat: int = 1):
+    latencies = []
+    gc.collect()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in inputs:
+            t0 = time.perf_counter()
+            fn(item)
+            latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    # Peak memory is taken in a separate pass so tracing overhead does not skew the timings.
+    tracemalloc.start()
+    for item in inputs[:min(len(inputs), 200)]:
+        fn(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "benchmark": name,
+        "calls": len(latencies),
+        "p50_us": round(latencies[len(latencies) // 2] * 1e6, 2),
+        "p99_us": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e6, 2),
+        "throughput_per_sec": round(len(latencies) / elapsed, 1),
+        "peak_memory_bytes": peak,
+    }
+
+
+def logged_in_chatbot(kb: UniversityKnowledgeBase, nlp: NLPProcessor) -> UniversityChatbot:
+    chatbot = UniversityChatbot(kb, nlp)
+    chatbot.generate_response("My name is Benchmark")
+    return chatbot
+
+
+def run_size(course_count: int, messages: int):
+    results = []
+
+    gc.collect()
+    start = time.perf_counter()
+    kb = synthetic_catalog(course_count)
+    nlp = NLPProcessor(kb)
+    build_seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    NLPProcessor(synthetic_catalog(course_count))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results.append({"benchmark": "knowledge_base_build", "calls": 1,
+                    "seconds": round(build_seconds, 4), "peak_memory_bytes": peak})
+
+    texts = corpus(kb, messages)
+    results.append(measure("classify_intent", nlp.classify_intent, texts))
+    results.append(measure("extract_entities", lambda text: kb.index.entity_scanner.scan(text.lower()), texts))
+
+    chatbot = logged_in_chatbot(kb, nlp)
+    results.append(measure("generate_response", chatbot.generate_response, texts))
+
+    codes = list(kb.courses)[:messages]
+    departments = list(kb.departments)
+    listing_calls = max(3, min(50, 200000 // course_count))
+    results.append(measure("render_course_info", chatbot._render_course_info, codes))
+    results.append(measure("render_department_info", chatbot._render_department_info, departments * 20))
+    results.append(measure("render_registration", chatbot._render_registration, [None] * 200))
+    results.append(measure("render_services", chatbot._render_services, [None, "library"] * 100))
+    results.append(measure("handle_available_courses",
+                           lambda _: "".join(chatbot._handle_available_courses()), [None] * listing_calls))
+    results.append(measure("handle_show_more", lambda _: "".join(chatbot._handle_show_more()), [None] * 200))
+
+    for code in codes[:10]:
+        chatbot.student.register_course(code, kb.index.meeting_times[code])
+    results.append(measure("handle_my_schedule", lambda _: "".join(chatbot._handle_my_schedule()),
+                           [None] * 200))
+    results.append(measure("schedule_conflicts", lambda code: chatbot.student.schedule_conflicts(
+        kb.index.meeting_times[code]), codes))
+    results.append(measure("handle_schedule_fit", lambda _: chatbot._handle_schedule_fit(), [None] * listing_calls))
+    results.append(measure("missing_prerequisites", lambda code: kb.index.prerequisites.missing(
+        code, chatbot.student.registered_courses), codes))
+    results.append(measure("handle_eligible_courses", lambda _: chatbot._handle_eligible_courses(),
+                           [None] * listing_calls))
+
+    start = time.perf_counter()
+    search_index = SearchIndex(kb)
+    results.append({"benchmark": "search_index_build", "calls": 1,
+                    "seconds": round(time.perf_counter() - start, 4)})
+    results.append(measure("search_fallback", search_index.search, corpus(kb, messages, seed=13)))
+
+    for result in results:
+        result["courses"] = course_count
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(baseline_path: str, current_path: str, threshold: float):
+    with open(baseline_path) as f:
+        baseline = {(r["benchmark"], r["courses"]): r for r in json.load(f)["results"]}
+    with open(current_path) as f:
+        current = json.load(f)["results"]
+
+    regressions = 0
+    for result in current:
+        before = baseline.get((result["benchmark"], result["courses"]))
+        if not before or "p50_us" not in result:
+            continue
+        ratio = result["p50_us"] / before["p50_us"] if before["p50_us"] else 1.0
+        flag = "REGRESSION" if ratio > 1 + threshold else ""
+        regressions += bool(flag)
+        print(f"{result['benchmark']:<26} {result['courses']:>7} {before['p50_us']:>10.2f} -> "
+              f"{result['p50_us']:>10.2f} us ({ratio:5.2f}x) {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmarks for the chatbot hot paths")
+    parser.add_argument("--sizes", default="10,1000,100000", help="comma-separated catalog sizes")
+    parser.add_argument("--messages", type=int, default=2000, help="messages per corpus")
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="compare two result files and exit non-zero on p50 regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed p50 slowdown for --compare")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        results.extend(run_size(size, args.messages))
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import argparse
+import bisect
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import (NLPProcessor, ResponseCache, SeatLedger, StudentIdAllocator, UniversityChatbot,
+                  UniversityKnowledgeBase, Waitlist)
+
+
+class RecordingWaitlist(Waitlist):
+    # Keeps the order students joined and were promoted in, so fairness can be checked afterwards.
+
+    def __init__(self, policy: str):
+        super().__init__(policy)
+        self.joined = {}
+        self.promotions = []
+        self.events_lock = threading.Lock()
+
+    def join(self, course_code, student_id, on_promote, priority=0, eligible=None):
+        position = super().join(course_code, student_id, on_promote, priority, eligible)
+        with self.events_lock:
+            self.joined.setdefault((course_code, student_id), len(self.joined))
+        return position
+
+    def pop(self, course_code):
+        entry = super().pop(course_code)
+        if entry is not None:
+            with self.events_lock:
+                self.promotions.append((course_code, entry.student_id))
+        return entry
+
+
+def simulated_catalog(courses: int, students: int, picks: int, seat_ratio: float):
+    # No prerequisites and no meeting times, so every refusal comes from seat contention. Capacity
+    # is the same everywhere while demand is skewed, so the popular courses overflow first.
+    base = UniversityKnowledgeBase()
+    capacity = max(1, round(students * picks * seat_ratio / courses))
+    catalog = {
+        f"SIM{100 + i}": {
+            "name": f"Simulated Course {i}", "credits": 3, "prerequisites": [],
+            "description": "Synthetic registration-window course", "schedule": "TBA",
+            "instructor": f"Dr. Sim{i % 17}", "room": f"Hall {i % 23}",
+            "capacity": capacity, "enrolled": 0, "available": True,
+        }
+        for i in range(courses)
+    }
+    return UniversityKnowledgeBase(courses=catalog, departments=base.departments,
+                                   general_info=base.general_info, department_aliases=base.department_aliases)
+
+
+def student_script(rng: random.Random, codes, weights, picks: int):
+    # Zipf-weighted picks without repeats.
+    wanted = []
+    cumulative = list(itertools.accumulate(weights))
+    while len(wanted) < picks:
+        code = codes[bisect.bisect(cumulative, rng.random() * cumulative[-1])]
+        if code not in wanted:
+            wanted.append(code)
+    return wanted
+
+
+def timed(bot, message, latencies):
+    start = time.perf_counter()
+    reply = bot.generate_response(message)
+    latencies.append(time.perf_counter() - start)
+    return reply
+
+
+def register_student(bot, number, wanted, rng, args, stats, latencies):
+    timed(bot, f"My name is Student{number}", latencies)
+    for code in wanted:
+        reply = timed(bot, f"register for {code}", latencies)
+        if reply.startswith("📝"):
+            if rng.random() < args.abandon_rate:
+                timed(bot, "no", latencies)
+                stats["abandoned"] += 1
+            elif timed(bot, "yes", latencies).startswith("✅"):
+                stats["registered"] += 1
+        elif "join the waitlist" in reply:
+            timed(bot, "yes", latencies)
+            stats["waitlisted"] += 1
+
+
+def drop_course(bot, rng, stats, latencies):
+    registered = sorted(bot.student.registered_courses)
+    if registered:
+        timed(bot, f"drop {rng.choice(registered)}", latencies)
+        if "dropped" in timed(bot, "yes", latencies):
+            stats["dropped"] += 1
+
+
+def sample_depths(waitlist, started, interval, samples, done):
+    while not done.wait(interval):
+        depths = waitlist.depths()
+        samples.append({"t": round(time.perf_counter() - started, 3), "waiting": sum(depths.values()),
+                        "max_course_depth": max(depths.values(), default=0), "waitlisted_courses": len(depths)})
+
+
+def inversions(waitlist: RecordingWaitlist) -> int:
+    # Pairs on the same course promoted in a different order than they joined.
+    by_course = {}
+    for course_code, student_id in waitlist.promotions:
+        by_course.setdefault(course_code, []).append(waitlist.joined[course_code, student_id])
+    return sum(later < earlier for order in by_course.values()
+               for i, earlier in enumerate(order) for later in order[i + 1:])
+
+
+def jain_index(values) -> float:
+    values = list(values)
+    total = sum(values)
+    squares = sum(value * value for value in values)
+    return round(total * total / (len(values) * squares), 4) if squares else 1.0
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    kb = simulated_catalog(args.courses, args.students, args.picks, args.seat_ratio)
+    waitlist = RecordingWaitlist(args.policy)
+    kb.seats = SeatLedger(kb, waitlist=waitlist)
+    nlp = NLPProcessor(kb)
+    student_ids = StudentIdAllocator()
+    response_cache = ResponseCache()
+    codes = list(kb.courses)
+    weights = [1 / (rank + 1) ** args.skew for rank in range(len(codes))]
+
+    # Students arrive in order; some come back a little later in the rush to drop a course, which is
+    # what frees seats for the waitlists.
+    events = [("register", number, student_script(rng, codes, weights, args.picks), random.Random(rng.random()))
+              for number in range(args.students)]
+    for number in range(args.students):
+        if rng.random() < args.drop_rate:
+            events.insert(min(len(events), number + rng.randint(args.threads * 4, args.students // 4 + args.threads * 4)),
+                          ("drop", number, None, random.Random(rng.random())))
+    bots = {number: UniversityChatbot(kb, nlp, response_cache=response_cache, student_ids=student_ids)
+            for number in range(args.students)}
+    sessions = {number: threading.Lock() for number in range(args.students)}
+    arrivals = iter(events)
+    arrivals_lock = threading.Lock()
+    stats_lock = threading.Lock()
+    totals = {"registered": 0, "waitlisted": 0, "dropped": 0, "abandoned": 0}
+    latencies = []
+
+    def worker():
+        stats = dict.fromkeys(totals, 0)
+        local_latencies = []
+        while True:
+            with arrivals_lock:
+                event = next(arrivals, None)
+            if event is None:
+                break
+            kind, number, wanted, student_rng = event
+            # A session only handles one message at a time, even if its drop overtakes its registration.
+            with sessions[number]:
+                if kind == "register":
+                    register_student(bots[number], number, wanted, student_rng, args, stats, local_latencies)
+                else:
+                    drop_course(bots[number], student_rng, stats, local_latencies)
+        with stats_lock:
+            for key, value in stats.items():
+                totals[key] += value
+            latencies.extend(local_latencies)
+
+    samples = []
+    done = threading.Event()
+    started = time.perf_counter()
+    sampler = threading.Thread(target=sample_depths, args=(waitlist, started, args.sample_interval, samples, done))
+    sampler.start()
+    pool = [threading.Thread(target=worker) for _ in range(args.threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    sampler.join()
+
+    # Sessions pick up promotions on their next message; apply the rest so the totals line up.
+    for bot in bots.values():
+        bot._apply_promotions()
+    promoted = len(waitlist.promotions)
+    enrolled = sum(course["enrolled"] for course in kb.courses.values())
+    assert all(course["enrolled"] <= course["capacity"] for course in kb.courses.values())
+    assert enrolled == totals["registered"] + promoted - totals["dropped"], (enrolled, totals, promoted)
+    assert enrolled == sum(len(bot.student.registered_courses) for bot in bots.values())
+
+    satisfaction = [len(bot.student.registered_courses) / args.picks for bot in bots.values()]
+    latencies.sort()
+    step = max(1, len(samples) // args.series_points)
+    return {
+        "students": args.students,
+        "threads": args.threads,
+        "policy": args.policy,
+        "courses": args.courses,
+        "seats": sum(course["capacity"] for course in kb.courses.values()),
+        "messages": len(latencies),
+        "seconds": round(elapsed, 3),
+        "messages_per_sec": round(len(latencies) / elapsed, 1),
+        "registrations_per_sec": round((totals["registered"] + promoted) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 3),
+        **totals,
+        "promoted": promoted,
+        "still_waiting": sum(waitlist.depths().values()),
+        "promotion_order_inversions": inversions(waitlist),
+        "fully_served_fraction": round(sum(value == 1 for value in satisfaction) / len(satisfaction), 4),
+        "jain_fairness": jain_index(satisfaction),
+        "queue_depth": samples[::step],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a registration-window rush of synthetic students against "
+                                                 "the chatbot core and report throughput, fairness and waitlist depth")
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--courses", type=int, default=40)
+    parser.add_argument("--picks", type=int, default=4, help="courses each student tries to register for")
+    parser.add_argument("--seat-ratio", type=float, default=0.6, help="seats in the catalog per requested seat")
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent of course popularity")
+    parser.add_argument("--drop-rate", type=float, default=0.2, help="chance a student later drops a course")
+    parser.add_argument("--abandon-rate", type=float, default=0.05, help="chance a confirmation is declined")
+    parser.add_argument("--policy", choices=Waitlist.POLICIES, default="fifo")
+    parser.add_argument("--sample-interval", type=float, default=0.05, help="seconds between queue-depth samples")
+    parser.add_argument("--series-points", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    print(json.dumps(run(args)))
+
+
+if __name__ == "__main__":
+    main()
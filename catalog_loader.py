@@ -0,0 +1,178 @@
+import csv
+import json
+import marshal
+import os
+import sys
+import time
+from typing import Dict, List, Tuple
+
+SNAPSHOT_MAGIC = b"UHCAT\x01"
+SNAPSHOT_NAME = ".catalog.snapshot"
+
+COURSE_FILES = ("courses.json", "courses.csv")
+OPTIONAL_FILES = ("departments.json", "general_info.json", "department_aliases.json")
+
+CSV_INT_FIELDS = ("credits", "capacity", "enrolled")
+
+
+class CatalogLoadStats:
+    def __init__(self, source: str, seconds: float, course_count: int, snapshot_path: str):
+        self.source = source
+        self.seconds = seconds
+        self.course_count = course_count
+        self.snapshot_path = snapshot_path
+
+    def __repr__(self):
+        return (f"CatalogLoadStats(source={self.source!r}, seconds={self.seconds:.4f}, "
+                f"course_count={self.course_count})")
+
+
+def source_files(source_dir: str) -> List[str]:
+    files = [name for name in COURSE_FILES + OPTIONAL_FILES
+             if os.path.isfile(os.path.join(source_dir, name))]
+    if not any(name in files for name in COURSE_FILES):
+        raise FileNotFoundError(f"No courses.json or courses.csv found in {source_dir}")
+    return files
+
+
+def source_fingerprint(source_dir: str) -> Tuple:
+    # Same idea as .pyc invalidation: a snapshot is reused while file sizes and mtimes match.
+    fingerprint = []
+    for name in source_files(source_dir):
+        stat = os.stat(os.path.join(source_dir, name))
+        fingerprint.append((name, stat.st_size, stat.st_mtime_ns))
+    return (sys.version_info[:2], marshal.version, tuple(fingerprint))
+
+
+def _read_json(path: str):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _read_courses_csv(path: str) -> Dict:
+    courses = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            code = row.pop("code").strip().upper()
+            for field in CSV_INT_FIELDS:
+                row[field] = int(row[field])
+            prereqs = row.get("prerequisites") or ""
+            row["prerequisites"] = [p.strip().upper() for p in prereqs.split(";") if p.strip()]
+            row["available"] = (row.get("available") or "true").strip().lower() in ("1", "true", "yes")
+            if not row.get("department"):
+                row.pop("department", None)
+            courses[code] = row
+    return courses
+
+
+def parse_catalog(source_dir: str) -> Dict:
+    catalog = {}
+    json_courses = os.path.join(source_dir, "courses.json")
+    if os.path.isfile(json_courses):
+        catalog["courses"] = _read_json(json_courses)
+    else:
+        catalog["courses"] = _read_courses_csv(os.path.join(source_dir, "courses.csv"))
+
+    for name in OPTIONAL_FILES:
+        path = os.path.join(source_dir, name)
+        if os.path.isfile(path):
+            catalog[name[:-len(".json")]] = _read_json(path)
+    return catalog
+
+
+def write_snapshot(path: str, fingerprint: Tuple, catalog: Dict):
+    # marshal only handles plain containers and scalars, so loading a snapshot never runs code
+    # the way unpickling can; the Python version is part of the fingerprint since the format is.
+    payload = marshal.dumps((fingerprint, catalog))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str, fingerprint: Tuple):
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if not data.startswith(SNAPSHOT_MAGIC):
+        return None
+    try:
+        stored_fingerprint, catalog = marshal.loads(data[len(SNAPSHOT_MAGIC):])
+    except (EOFError, ValueError, TypeError):
+        return None
+    return catalog if stored_fingerprint == fingerprint else None
+
+
+def load_catalog(source_dir: str, snapshot_path: str = None, use_snapshot: bool = True) -> Tuple[Dict, CatalogLoadStats]:
+    start = time.perf_counter()
+    snapshot_path = snapshot_path or os.path.join(source_dir, SNAPSHOT_NAME)
+    fingerprint = source_fingerprint(source_dir)
+
+    catalog = read_snapshot(snapshot_path, fingerprint) if use_snapshot else None
+    source = "snapshot"
+    if catalog is None:
+        catalog = parse_catalog(source_dir)
+        source = "source"
+        if use_snapshot:
+            try:
+                write_snapshot(snapshot_path, fingerprint, catalog)
+            except OSError:
+                pass
+
+    stats = CatalogLoadStats(source, time.perf_counter() - start, len(catalog["courses"]), snapshot_path)
+    return catalog, stats
+
+
+def knowledge_base_kwargs(catalog: Dict) -> Dict:
+    return {
+        "courses": catalog["courses"],
+        "departments": catalog.get("departments"),
+        "general_info": catalog.get("general_info"),
+        "department_aliases": catalog.get("department_aliases"),
+    }
+
+
+def export_catalog(knowledge_base, target_dir: str):
+    os.makedirs(target_dir, exist_ok=True)
+    files = {
+        "courses.json": knowledge_base.courses,
+        "departments.json": knowledge_base.departments,
+        "general_info.json": knowledge_base.general_info,
+        "department_aliases.json": knowledge_base.department_aliases,
+    }
+    for name, data in files.items():
+        with open(os.path.join(target_dir, name), "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def main():
+    import argparse
+    from main import UniversityKnowledgeBase
+
+    parser = argparse.ArgumentParser(description="Load a course catalog and report cold/warm start times.")
+    parser.add_argument("source_dir")
+    parser.add_argument("--export", action="store_true",
+                        help="write the built-in catalog to source_dir before loading it")
+    args = parser.parse_args()
+
+    if args.export:
+        export_catalog(UniversityKnowledgeBase(), args.source_dir)
+
+    snapshot_path = os.path.join(args.source_dir, SNAPSHOT_NAME)
+    if os.path.exists(snapshot_path):
+        os.remove(snapshot_path)
+
+    for label in ("cold", "warm"):
+        catalog, stats = load_catalog(args.source_dir)
+        start = time.perf_counter()
+        UniversityKnowledgeBase(**knowledge_base_kwargs(catalog))
+        index_seconds = time.perf_counter() - start
+        print(f"{label}: {stats.course_count} courses from {stats.source} in {stats.seconds * 1000:.1f} ms "
+              f"(+{index_seconds * 1000:.1f} ms indexing)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,522 @@
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, Iterator, List
+
+from main import (ChatMetrics, ConversationHistory, NLPProcessor, ResponseCache, SeatLedger, StudentIdAllocator,
+                  UniversityChatbot, UniversityKnowledgeBase, student_shard)
+from profile_store import ProfileStore
+
+
+class ChatSession:
+    __slots__ = ("session_id", "chatbot", "last_seen")
+
+    def __init__(self, session_id: str, chatbot: UniversityChatbot, now: float):
+        self.session_id = session_id
+        self.chatbot = chatbot
+        self.last_seen = now
+
+
+class SessionManager:
+    def __init__(self, knowledge_base: UniversityKnowledgeBase = None, nlp: NLPProcessor = None,
+                 idle_timeout: float = 900.0, max_sessions: int = None, clock=time.monotonic,
+                 history_capacity: int = 200, history_dir: str = None, metrics: ChatMetrics = None,
+                 profile_store=None, intent_model=None):
+        self.kb = knowledge_base if knowledge_base is not None else UniversityKnowledgeBase()
+        self.nlp = nlp if nlp is not None else NLPProcessor(self.kb, intent_model=intent_model)
+        self.response_cache = ResponseCache()
+        self.metrics = metrics
+        self.profile_store = profile_store
+        self.student_ids = StudentIdAllocator()
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.clock = clock
+        self.history_capacity = history_capacity
+        self.history_dir = history_dir
+        # Least recently used first, so eviction only ever looks at the front.
+        self.sessions = OrderedDict()
+        self.evicted = 0
+
+    def get_session(self, session_id: str) -> ChatSession:
+        now = self.clock()
+        session = self.sessions.get(session_id)
+        if session is None:
+            chatbot = UniversityChatbot(self.kb, self.nlp, self.new_history(session_id), self.response_cache,
+                                        self.metrics, self.profile_store, self.student_ids)
+            session = ChatSession(session_id, chatbot, now)
+            self.sessions[session_id] = session
+            if self.max_sessions is not None and len(self.sessions) > self.max_sessions:
+                self._evict(next(iter(self.sessions)))
+        else:
+            session.last_seen = now
+            self.sessions.move_to_end(session_id)
+        return session
+
+    def new_history(self, session_id: str) -> ConversationHistory:
+        spill_path = None
+        if self.history_dir is not None:
+            safe_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in session_id)
+            spill_path = os.path.join(self.history_dir, f"{safe_id}.jsonl")
+        return ConversationHistory(self.history_capacity, spill_path)
+
+    def handle(self, session_id: str, message: str) -> str:
+        return self.get_session(session_id).chatbot.generate_response(message)
+
+    def handle_request(self, request: Dict, default_session: str) -> Dict:
+        session_id = str(request.get("session") or default_session)
+        if request.get("command") == "stats":
+            return {"session": session_id, "stats": self.stats()}
+        if request.get("command") == "metrics":
+            return {"session": session_id, "metrics": self.metrics.snapshot() if self.metrics is not None else None}
+        if request.get("command") == "close":
+            self.close_session(session_id)
+            return {"session": session_id, "closed": True}
+
+        message = str(request.get("message", "")).strip()
+        if not message:
+            return {"session": session_id, "error": "empty message"}
+        try:
+            response = self.handle(session_id, message)
+        except Exception as e:
+            return {"session": session_id, "error": f"Sorry, I encountered an error: {str(e)}"}
+        return {"session": session_id, "response": response}
+
+    def stream_request(self, request: Dict, default_session: str) -> Iterator[Dict]:
+        session_id = str(request.get("session") or default_session)
+        message = str(request.get("message", "")).strip()
+        if not message:
+            yield {"session": session_id, "error": "empty message"}
+            return
+        try:
+            for chunk in self.get_session(session_id).chatbot.stream_response(message):
+                yield {"session": session_id, "chunk": chunk}
+        except Exception as e:
+            yield {"session": session_id, "error": f"Sorry, I encountered an error: {str(e)}"}
+            return
+        yield {"session": session_id, "done": True}
+
+    def close_session(self, session_id: str):
+        if session_id in self.sessions:
+            self._evict(session_id)
+
+    def evict_idle(self, now: float = None) -> int:
+        now = self.clock() if now is None else now
+        count = 0
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if now - session.last_seen < self.idle_timeout:
+                break
+            self._evict(session_id)
+            count += 1
+        return count
+
+    def _evict(self, session_id: str):
+        session = self.sessions.pop(session_id)
+        session.chatbot.close_session()
+        self.evicted += 1
+
+    def stats(self) -> Dict:
+        stats = {"sessions": len(self.sessions), "evicted": self.evicted,
+                 "response_cache": self.response_cache.stats()}
+        if self.profile_store is not None:
+            stats["profile_store"] = self.profile_store.stats()
+        return stats
+
+
+class ChatServer:
+    def __init__(self, manager: SessionManager, host: str = "127.0.0.1", port: int = 8765,
+                 eviction_interval: float = 30.0, metrics_path: str = None):
+        self.manager = manager
+        self.metrics_path = metrics_path
+        self.host = host
+        self.port = port
+        self.eviction_interval = eviction_interval
+        self.server = None
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        default_session = uuid.uuid4().hex
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = self.parse_line(line)
+                if request is None:
+                    writer.write(b'{"error": "expected a JSON object"}\n')
+                    await writer.drain()
+                    continue
+                async for reply in self.replies(request, default_session):
+                    writer.write(json.dumps(reply, ensure_ascii=False).encode("utf-8") + b"\n")
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def replies(self, request: Dict, default_session: str) -> AsyncIterator[Dict]:
+        # With "stream": true a reply goes out as "chunk" lines as it is produced, then a "done" line.
+        if request.get("stream") and not request.get("command"):
+            for reply in self.manager.stream_request(request, default_session):
+                await self.durable()
+                yield reply
+        else:
+            yield await self.respond(request, default_session)
+
+    async def respond(self, request: Dict, default_session: str) -> Dict:
+        reply = self.manager.handle_request(request, default_session)
+        await self.durable()
+        return reply
+
+    async def durable(self):
+        store = self.manager.profile_store
+        if store is not None and store.has_unflushed():
+            # Replies wait for their registrations to be durable off the event loop, so
+            # confirmations from concurrent connections land in the same fsync.
+            await asyncio.get_running_loop().run_in_executor(None, store.flush)
+
+    @staticmethod
+    def parse_line(line: bytes):
+        try:
+            request = json.loads(line)
+        except ValueError:
+            request = {"message": line.decode("utf-8", "replace").strip()}
+        return request if isinstance(request, dict) else None
+
+    async def evict_periodically(self):
+        while True:
+            await asyncio.sleep(self.eviction_interval)
+            self.manager.evict_idle()
+            self.manager.kb.seats.promote_waitlisted()
+            if self.metrics_path and self.manager.metrics is not None:
+                self.manager.metrics.write(self.metrics_path)
+
+    async def start(self):
+        if self.manager is not None:
+            # Built before accepting connections and off the event loop, so no request pays for it.
+            await asyncio.get_running_loop().run_in_executor(None, self.manager.kb.build_text_indexes)
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        eviction = asyncio.create_task(self.evict_periodically())
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            eviction.cancel()
+
+
+class SharedSeatLedger(SeatLedger):
+    # Enrollment and hold counts for the catalog live in shared memory, guarded by striped
+    # process-wide locks, so every worker enforces the same capacity. Holds themselves stay with
+    # the worker that owns the session; each worker's knowledge base copy is refreshed from the counts.
+    LOCK_STRIPES = 64
+
+    def __init__(self, knowledge_base: UniversityKnowledgeBase, enrolled, held, locks,
+                 hold_seconds: float = 120.0, clock=time.monotonic):
+        super().__init__(knowledge_base, hold_seconds, clock)
+        self.slots = {course_code: slot for slot, course_code in enumerate(sorted(knowledge_base.courses))}
+        self.enrolled = enrolled
+        self.held = held
+        self.stripes = locks
+        self.last_seen = None
+
+    @classmethod
+    def allocate(cls, knowledge_base: UniversityKnowledgeBase):
+        codes = sorted(knowledge_base.courses)
+        enrolled = multiprocessing.RawArray("i", [knowledge_base.courses[code]["enrolled"] for code in codes])
+        held = multiprocessing.RawArray("i", len(codes))
+        locks = [multiprocessing.Lock() for _ in range(cls.LOCK_STRIPES)]
+        return enrolled, held, locks
+
+    def _lock(self, course_code: str):
+        slot = self.slots.get(course_code)
+        if slot is None:
+            return super()._lock(course_code)
+        return self.stripes[slot % len(self.stripes)]
+
+    def _locks(self, course_codes) -> List:
+        # Several courses can share a stripe and the locks aren't reentrant, so each stripe is taken
+        # once, in stripe order, ahead of the per-process locks for courses without a shared slot.
+        stripes = sorted({self.slots[code] % len(self.stripes) for code in course_codes if code in self.slots})
+        local = [code for code in course_codes if code not in self.slots]
+        return [self.stripes[stripe] for stripe in stripes] + super()._locks(local)
+
+    def _enrolled(self, course_code: str) -> int:
+        slot = self.slots.get(course_code)
+        return super()._enrolled(course_code) if slot is None else self.enrolled[slot]
+
+    def _seats_taken(self, course_code: str, holds: Dict) -> int:
+        slot = self.slots.get(course_code)
+        if slot is None:
+            return super()._seats_taken(course_code, holds)
+        return self.enrolled[slot] + self.held[slot]
+
+    def _holds_changed(self, course_code: str, delta: int):
+        slot = self.slots.get(course_code)
+        if slot is not None:
+            self.held[slot] += delta
+
+    def _enroll(self, course_code: str, delta: int):
+        slot = self.slots.get(course_code)
+        if slot is None:
+            super()._enroll(course_code, delta)
+            return
+        self.enrolled[slot] += delta
+        self._sync(course_code, slot)
+
+    def _sync(self, course_code: str, slot: int):
+        course = self.kb.courses.get(course_code)
+        if course is not None and course["enrolled"] != self.enrolled[slot]:
+            self.kb.update_enrollment(course_code, self.enrolled[slot] - course["enrolled"])
+
+    def refresh(self):
+        # Picks up registrations made through other workers; skipped while nothing has changed.
+        current = bytes(self.enrolled)
+        if current == self.last_seen:
+            return
+        self.last_seen = current
+        for course_code, slot in self.slots.items():
+            self._sync(course_code, slot)
+
+    def expire_holds(self):
+        now = self.clock()
+        for course_code in list(self.holds):
+            with self._lock(course_code):
+                self._active_holds(course_code, now)
+
+
+def load_knowledge_base(catalog_dir: str = None) -> UniversityKnowledgeBase:
+    if not catalog_dir:
+        return UniversityKnowledgeBase()
+    from catalog_loader import knowledge_base_kwargs, load_catalog
+    catalog, _ = load_catalog(catalog_dir)
+    return UniversityKnowledgeBase(**knowledge_base_kwargs(catalog))
+
+
+WORKER_SWEEP_INTERVAL = 1.0
+
+
+def _worker_main(requests, responses, catalog_dir: str, seat_memory, manager_options: Dict):
+    kb = load_knowledge_base(catalog_dir)
+    kb.seats = SharedSeatLedger(kb, *seat_memory)
+    kb.seats.refresh()
+    kb.build_text_indexes()
+    manager = SessionManager(kb, **manager_options)
+    last_sweep = time.monotonic()
+    while True:
+        if requests.poll(WORKER_SWEEP_INTERVAL):
+            batch = requests.recv()
+            if batch is None:
+                break
+            responses.send([(tag, manager.handle_request(request, default_session))
+                            for tag, default_session, request in batch])
+        now = time.monotonic()
+        if now - last_sweep >= WORKER_SWEEP_INTERVAL:
+            kb.seats.expire_holds()
+            kb.seats.refresh()
+            kb.seats.promote_waitlisted()
+            manager.evict_idle()
+            last_sweep = now
+    for session_id in list(manager.sessions):
+        manager.close_session(session_id)
+
+
+class ShardedChatServer(ChatServer):
+    # The front process only parses and routes: each session is pinned to one worker process by
+    # its ID, and requests bound for the same worker in one event loop pass travel as one batch.
+
+    def __init__(self, workers: int, catalog_dir: str = None, host: str = "127.0.0.1", port: int = 8765,
+                 manager_options: Dict = None):
+        super().__init__(None, host, port)
+        self.worker_count = workers
+        self.catalog_dir = catalog_dir
+        self.manager_options = manager_options or {}
+        self.processes = []
+        self.connections = []
+        self.outboxes = [[] for _ in range(workers)]
+        self.flush_scheduled = False
+        self.pending = {}
+        self.tags = itertools.count()
+        self.lost = set()
+        self.loop = None
+        self.stopping = False
+
+    def start_workers(self):
+        seat_memory = SharedSeatLedger.allocate(load_knowledge_base(self.catalog_dir))
+        for index in range(self.worker_count):
+            requests_reader, requests_writer = multiprocessing.Pipe(duplex=False)
+            responses_reader, responses_writer = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(
+                target=_worker_main, name=f"chat-worker-{index}", daemon=True,
+                args=(requests_reader, responses_writer, self.catalog_dir, seat_memory, self.manager_options))
+            process.start()
+            # Only the worker holds its ends, so its death shows up as EOF on replies and
+            # BrokenPipeError on requests instead of leaving futures waiting forever.
+            requests_reader.close()
+            responses_writer.close()
+            self.processes.append(process)
+            self.connections.append(requests_writer)
+            threading.Thread(target=self._read_replies, args=(index, responses_reader),
+                             name=f"chat-worker-{index}-replies", daemon=True).start()
+
+    def _read_replies(self, index: int, connection):
+        while True:
+            try:
+                replies = connection.recv()
+            except (EOFError, OSError):
+                if not self.stopping:
+                    try:
+                        self.loop.call_soon_threadsafe(self._worker_lost, index)
+                    except RuntimeError:
+                        pass
+                return
+            self.loop.call_soon_threadsafe(self._resolve, replies)
+
+    def _resolve(self, replies):
+        for tag, reply in replies:
+            future, _, _ = self.pending.pop(tag, (None, None, None))
+            if future is not None and not future.done():
+                future.set_result(reply)
+
+    def _worker_lost(self, index: int):
+        self.lost.add(index)
+        self._resolve([(tag, {"session": session_id, "error": "worker unavailable"})
+                       for tag, (_, worker, session_id) in list(self.pending.items()) if worker == index])
+
+    def _flush_outboxes(self):
+        self.flush_scheduled = False
+        for index, outbox in enumerate(self.outboxes):
+            if outbox:
+                self.outboxes[index] = []
+                try:
+                    self.connections[index].send(outbox)
+                except (OSError, ValueError):
+                    self._worker_lost(index)
+
+    async def replies(self, request: Dict, default_session: str) -> AsyncIterator[Dict]:
+        # Workers send back whole replies, so a streaming client gets each one as a single chunk.
+        reply = await self.respond(request, default_session)
+        if request.get("stream") and not request.get("command") and "response" in reply:
+            yield {"session": reply["session"], "chunk": reply["response"]}
+            yield {"session": reply["session"], "done": True}
+        else:
+            yield reply
+
+    async def respond(self, request: Dict, default_session: str) -> Dict:
+        session_id = str(request.get("session") or default_session)
+        worker = student_shard(session_id, self.worker_count)
+        if worker in self.lost:
+            return {"session": session_id, "error": "worker unavailable"}
+
+        tag = next(self.tags)
+        future = self.loop.create_future()
+        self.pending[tag] = (future, worker, session_id)
+        self.outboxes[worker].append((tag, default_session, request))
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            self.loop.call_soon(self._flush_outboxes)
+        return await future
+
+    async def evict_periodically(self):
+        # Workers evict their own idle sessions.
+        pass
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        if not self.processes:
+            self.start_workers()
+        return await super().start()
+
+    def stop_workers(self, timeout: float = 5.0):
+        self.stopping = True
+        for connection in self.connections:
+            try:
+                connection.send(None)
+            except OSError:
+                pass
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+        self.connections = []
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Headless University Helper chat server (JSON lines over TCP)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--idle-timeout", type=float, default=900.0)
+    parser.add_argument("--max-sessions", type=int, default=None)
+    parser.add_argument("--metrics-file", help="periodically write metrics here (.json for JSON, else Prometheus text)")
+    parser.add_argument("--history-dir", help="spill conversation turns beyond the in-memory window here")
+    parser.add_argument("--catalog", help="directory with courses.json/courses.csv and related catalog files")
+    parser.add_argument("--profile-store", help="keep student profiles and registrations in this log across restarts")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="serve from this many worker processes, each session pinned to one of them")
+    parser.add_argument("--intent-model", help="classify intents with this trained model (see intent_model.py) "
+                                               "instead of the regex patterns")
+    args = parser.parse_args()
+
+    intent_model = None
+    if args.intent_model:
+        from intent_model import IntentModel
+        intent_model = IntentModel.load(args.intent_model)
+
+    if args.history_dir:
+        os.makedirs(args.history_dir, exist_ok=True)
+
+    if args.workers > 1:
+        if args.profile_store or args.metrics_file:
+            parser.error("--profile-store and --metrics-file are only supported with a single worker")
+        server = ShardedChatServer(args.workers, args.catalog, args.host, args.port, manager_options={
+            "idle_timeout": args.idle_timeout, "max_sessions": args.max_sessions, "history_dir": args.history_dir,
+            "intent_model": intent_model})
+        print(f"Serving on {args.host}:{args.port} with {args.workers} workers")
+        try:
+            asyncio.run(server.serve_forever())
+        except KeyboardInterrupt:
+            print("\nChat server shutting down...")
+        finally:
+            server.stop_workers()
+        return
+
+    kb = load_knowledge_base(args.catalog) if args.catalog else None
+
+    profile_store = None
+    if args.profile_store:
+        kb = kb if kb is not None else UniversityKnowledgeBase()
+        profile_store = ProfileStore(args.profile_store, sync_commit=False)
+        profile_store.restore(kb)
+
+    metrics = ChatMetrics() if args.metrics_file else None
+    manager = SessionManager(kb, idle_timeout=args.idle_timeout, max_sessions=args.max_sessions,
+                             history_dir=args.history_dir, metrics=metrics, profile_store=profile_store,
+                             intent_model=intent_model)
+    server = ChatServer(manager, args.host, args.port, metrics_path=args.metrics_file)
+    print(f"Serving on {args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\nChat server shutting down...")
+    finally:
+        if metrics is not None:
+            metrics.write(args.metrics_file)
+        if profile_store is not None:
+            profile_store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import functools
+import json
+import math
+import os
+import random
+import re
+import zlib
+from typing import Dict, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+FEATURE_BITS = 16
+WORD = re.compile(r"[a-z0-9_']+")
+COURSE_CODE = re.compile(r"\b[a-z]{2,4} ?\d{3}\b")
+
+
+def read_utterances(path: str) -> List[Tuple[str, str]]:
+    # One "intent<TAB>utterance" per line; blank lines and # comments are skipped.
+    examples = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            intent, _, text = line.partition("\t")
+            if not intent or not text:
+                raise ValueError(f"{path}:{number}: expected 'intent<TAB>utterance'")
+            examples.append((text, intent))
+    return examples
+
+
+def _hash(gram: str) -> int:
+    # crc32 rather than hash() so indexes are the same in every process.
+    return zlib.crc32(gram.encode("utf-8"))
+
+
+@functools.lru_cache(maxsize=65536)
+def _word_hashes(word: str) -> Tuple[int, ...]:
+    padded = f"#{word}#"
+    return (_hash(word),) + tuple(_hash(f"#3{padded[i:i + 3]}") for i in range(len(padded) - 2))
+
+
+def feature_indexes(text_lower: str, feature_bits: int = FEATURE_BITS) -> List[int]:
+    # Unigrams and character trigrams (so "enroll" and "enrolled" share evidence) plus bigrams with
+    # start/end markers, so a bare "no" differs from "no" inside a sentence. Course codes collapse
+    # to one token.
+    words = ["<s>"] + WORD.findall(COURSE_CODE.sub(" _course_ ", text_lower)) + ["</s>"]
+    hashes = {_hash(f"{first} {second}") for first, second in zip(words, words[1:])}
+    for word in words[1:-1]:
+        hashes.update(_word_hashes(word))
+    mask = (1 << feature_bits) - 1
+    return sorted({value & mask for value in hashes})
+
+
+def linear_scores(bias: List[float], weights: Dict[int, List[float]], features: List[int]) -> List[float]:
+    # zip(*rows) walks the weight rows column by column, so each label's sum is a single C call.
+    rows = [weights[index] for index in features if index in weights]
+    return list(map(sum, zip(bias, *rows)))
+
+
+class IntentModel:
+    # A linear model over hashed bag-of-words features. With NumPy the weights are one dense
+    # (features + 1) x labels matrix; the extra all-zero row pads batches so no text has an empty
+    # feature segment. Without it, rows for the features seen in training are kept as lists.
+    PATTERN = "<intent model>"
+
+    def __init__(self, labels: List[str], bias: List[float], weights: Dict[int, List[float]],
+                 feature_bits: int = FEATURE_BITS, min_confidence: float = 0.5):
+        if any(len(row) != len(labels) for row in weights.values()) or len(bias) != len(labels):
+            raise ValueError("Every weight row needs one entry per label")
+        self.labels = list(labels)
+        self.bias = list(bias)
+        self.weights = weights
+        self.feature_bits = feature_bits
+        self.min_confidence = min_confidence
+        self.backend = "python"
+        if np is not None:
+            self.backend = "numpy"
+            self.padding = 1 << feature_bits
+            self.matrix = np.zeros((self.padding + 1, len(labels)), dtype=np.float32)
+            for index, row in weights.items():
+                self.matrix[index] = row
+            self.bias_vector = np.asarray(bias, dtype=np.float32)
+
+    def _best(self, scores: List[float]) -> Tuple[str, float]:
+        top = max(scores)
+        confidence = 1.0 / sum(math.exp(score - top) for score in scores)
+        return self.labels[scores.index(top)], confidence
+
+    def _scores(self, features: List[int]) -> List[float]:
+        return linear_scores(self.bias, self.weights, features)
+
+    def predict(self, text_lower: str) -> Tuple[str, float]:
+        features = feature_indexes(text_lower, self.feature_bits)
+        if np is None:
+            return self._best(self._scores(features))
+        return self._best((self.bias_vector + self.matrix[features].sum(axis=0)).tolist())
+
+    def predict_batch(self, texts_lower: List[str]) -> List[Tuple[str, float]]:
+        batch = [feature_indexes(text_lower, self.feature_bits) for text_lower in texts_lower]
+        if np is None or not batch:
+            return [self._best(self._scores(features)) for features in batch]
+
+        indexes = []
+        starts = []
+        for features in batch:
+            starts.append(len(indexes))
+            indexes.extend(features)
+            indexes.append(self.padding)
+        scores = np.add.reduceat(self.matrix[np.asarray(indexes)], np.asarray(starts), axis=0) + self.bias_vector
+        return [self._best(row) for row in scores.tolist()]
+
+    def save(self, path: str):
+        data = {
+            "labels": self.labels,
+            "feature_bits": self.feature_bits,
+            "min_confidence": self.min_confidence,
+            "bias": [round(value, 6) for value in self.bias],
+            "weights": {str(index): [round(value, 6) for value in row] for index, row in sorted(self.weights.items())},
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, min_confidence: float = None) -> 'IntentModel':
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        weights = {int(index): row for index, row in data["weights"].items()}
+        return cls(data["labels"], data["bias"], weights, data["feature_bits"],
+                   data["min_confidence"] if min_confidence is None else min_confidence)
+
+
+def train(examples: List[Tuple[str, str]], feature_bits: int = FEATURE_BITS, epochs: int = 30,
+          learning_rate: float = 0.5, l2: float = 1e-4, min_confidence: float = 0.5, seed: int = 0) -> IntentModel:
+    # Multinomial logistic regression fitted with plain SGD; utterance files are small enough
+    # that this takes a second or two.
+    labels = sorted({intent for _, intent in examples})
+    label_ids = {label: i for i, label in enumerate(labels)}
+    data = [(feature_indexes(text.lower(), feature_bits), label_ids[intent]) for text, intent in examples]
+    bias = [0.0] * len(labels)
+    weights = {}
+    rng = random.Random(seed)
+
+    for epoch in range(epochs):
+        rng.shuffle(data)
+        rate = learning_rate / (1 + 0.2 * epoch)
+        for features, target in data:
+            scores = linear_scores(bias, weights, features)
+            top = max(scores)
+            exps = [math.exp(score - top) for score in scores]
+            total = sum(exps)
+            gradient = [value / total for value in exps]
+            gradient[target] -= 1.0
+
+            bias = [b - rate * g for b, g in zip(bias, gradient)]
+            for index in features:
+                row = weights.get(index) or [0.0] * len(labels)
+                weights[index] = [w - rate * (g + l2 * w) for w, g in zip(row, gradient)]
+
+    return IntentModel(labels, bias, weights, feature_bits, min_confidence)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train the hashed bag-of-words intent model from labelled utterances")
+    parser.add_argument("utterances", help="file with one 'intent<TAB>utterance' per line")
+    parser.add_argument("--output", default="intent_model.json")
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--feature-bits", type=int, default=FEATURE_BITS)
+    parser.add_argument("--min-confidence", type=float, default=0.5,
+                        help="below this probability a message is treated as unmatched")
+    args = parser.parse_args()
+
+    examples = read_utterances(args.utterances)
+    model = train(examples, args.feature_bits, args.epochs, min_confidence=args.min_confidence)
+    model.save(args.output)
+    correct = sum(label == intent for (_, intent), (label, _) in
+                  zip(examples, model.predict_batch([text.lower() for text, _ in examples])))
+    print(f"Trained on {len(examples)} utterances, {len(model.labels)} intents, {len(model.weights)} features; "
+          f"training accuracy {correct / len(examples):.1%}; wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,314 @@
-import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox, simpledialog
 import re
 import datetime
-from typing import Dict, Tuple
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import array
+import bisect
+import collections
+import contextlib
+import hashlib
+import heapq
+import json
+import math
+import os
+import itertools
+import queue
 import threading
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+# Only the desktop GUI needs Tk; the chat server, benchmarks and tests run on builds without it.
+try:
+    import tkinter as tk
+    from tkinter import ttk, scrolledtext, messagebox, simpledialog
+except ImportError:
+    tk = ttk = scrolledtext = messagebox = simpledialog = None
+
+class LatencyHistogram:
+    BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+    def __init__(self, bounds_ms: Tuple = BOUNDS_MS):
+        self.bounds_ms = bounds_ms
+        self.counts = [0] * (len(bounds_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, seconds: float):
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(self.bounds_ms, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return 0.0
+        target = p / 100 * self.count
+        seen = 0
+        for bound, bucket in zip(self.bounds_ms, self.counts):
+            seen += bucket
+            if seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def summary(self) -> str:
+        if not self.count:
+            return "No responses recorded yet."
+        lines = [f"Responses: {self.count} | mean {self.total_ms / self.count:.1f} ms | "
+                 f"p50 ≤{self.percentile(50):.1f} ms | p99 ≤{self.percentile(99):.1f} ms | max {self.max_ms:.1f} ms"]
+        widest = max(self.counts)
+        labels = [f"≤{bound} ms" for bound in self.bounds_ms] + [f">{self.bounds_ms[-1]} ms"]
+        for label, bucket in zip(labels, self.counts):
+            if bucket:
+                lines.append(f"{label:>10} {'█' * max(1, bucket * 30 // widest)} {bucket}")
+        return "\n".join(lines)
+
+    def merge(self, other: 'LatencyHistogram'):
+        for i, bucket in enumerate(other.counts):
+            self.counts[i] += bucket
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+
+class ThreadMetrics:
+    def __init__(self, bounds_ms: Tuple):
+        self.bounds_ms = bounds_ms
+        self.stages = {}
+        self.intents = collections.Counter()
+        self.patterns = collections.Counter()
+        self.fallthroughs = 0
+
+    def record_stage(self, stage: str, seconds: float):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = LatencyHistogram(self.bounds_ms)
+        histogram.record(seconds)
+
+
+class ChatMetrics:
+    STAGE_BOUNDS_MS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+    STAGES = ("classify", "entities", "handler", "render", "total")
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        # Each thread records into its own ThreadMetrics, so the hot path never takes a lock;
+        # the lock only guards registering a new thread and taking snapshots.
+        self.local = threading.local()
+        self.registry = []
+        self.registry_lock = threading.Lock()
+
+    def thread_metrics(self) -> ThreadMetrics:
+        metrics = getattr(self.local, 'metrics', None)
+        if metrics is None:
+            metrics = self.local.metrics = ThreadMetrics(self.STAGE_BOUNDS_MS)
+            with self.registry_lock:
+                self.registry.append(metrics)
+        return metrics
+
+    def merged(self) -> ThreadMetrics:
+        total = ThreadMetrics(self.STAGE_BOUNDS_MS)
+        with self.registry_lock:
+            registry = list(self.registry)
+        for metrics in registry:
+            for stage, histogram in dict(metrics.stages).items():
+                total.stages.setdefault(stage, LatencyHistogram(self.STAGE_BOUNDS_MS)).merge(histogram)
+            total.intents.update(dict(metrics.intents))
+            total.patterns.update(dict(metrics.patterns))
+            total.fallthroughs += metrics.fallthroughs
+        return total
+
+    def snapshot(self) -> Dict:
+        total = self.merged()
+        return {
+            "stages": {stage: {"count": h.count, "sum_ms": round(h.total_ms, 4), "max_ms": round(h.max_ms, 4),
+                               "p50_ms": h.percentile(50), "p99_ms": h.percentile(99),
+                               "buckets": dict(zip([str(b) for b in h.bounds_ms] + ["+Inf"], h.counts))}
+                       for stage, h in total.stages.items()},
+            "intents": dict(total.intents),
+            "patterns": [{"intent": intent, "pattern": pattern, "count": count}
+                         for (intent, pattern), count in total.patterns.most_common()],
+            "general_fallthroughs": total.fallthroughs,
+        }
+
+    @staticmethod
+    def _label(value: str) -> str:
+        return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    def to_prometheus(self) -> str:
+        total = self.merged()
+        lines = ["# HELP chatbot_stage_seconds Time spent in each generate_response stage.",
+                 "# TYPE chatbot_stage_seconds histogram"]
+        for stage, histogram in sorted(total.stages.items()):
+            cumulative = 0
+            for bound, bucket in zip(histogram.bounds_ms, histogram.counts):
+                cumulative += bucket
+                lines.append(f'chatbot_stage_seconds_bucket{{stage="{stage}",le="{bound / 1000:g}"}} {cumulative}')
+            lines.append(f'chatbot_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+            lines.append(f'chatbot_stage_seconds_sum{{stage="{stage}"}} {histogram.total_ms / 1000:.9f}')
+            lines.append(f'chatbot_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+        lines += ["# HELP chatbot_intent_total Messages classified per intent.",
+                  "# TYPE chatbot_intent_total counter"]
+        for intent, count in sorted(total.intents.items()):
+            lines.append(f'chatbot_intent_total{{intent="{self._label(intent)}"}} {count}')
+
+        lines += ["# HELP chatbot_pattern_matches_total Messages matched per intent pattern.",
+                  "# TYPE chatbot_pattern_matches_total counter"]
+        for (intent, pattern), count in sorted(total.patterns.items()):
+            lines.append(f'chatbot_pattern_matches_total{{intent="{self._label(intent)}",'
+                         f'pattern="{self._label(pattern)}"}} {count}')
+
+        lines += ["# HELP chatbot_general_fallthrough_total Messages answered by the general handler.",
+                  "# TYPE chatbot_general_fallthrough_total counter",
+                  f"chatbot_general_fallthrough_total {total.fallthroughs}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        if path.endswith(".json"):
+            text = json.dumps(self.snapshot(), indent=2)
+        else:
+            text = self.to_prometheus()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+
+SCHEDULE_DAYS = {"M": 0, "T": 1, "Tu": 1, "W": 2, "Th": 3, "R": 3, "F": 4, "Sa": 5, "S": 5, "Su": 6, "U": 6}
+MINUTES_PER_DAY = 24 * 60
+
+
+def _clock_minutes(hour: str, minute: str, meridiem: Optional[str]) -> int:
+    hour = int(hour)
+    if meridiem and hour <= 12:
+        hour = hour % 12 + (12 if meridiem.upper() == "PM" else 0)
+    return hour * 60 + int(minute or 0)
+
+
+def parse_schedule(schedule: str) -> Tuple[Tuple[int, int], ...]:
+    # "MWF 1:00-2:00 PM, Lab: W 3:00-5:00 PM" -> (start, end) minutes from Monday 00:00,
+    # one interval per meeting. Parts that don't look like "<days> <time>-<time>" are ignored.
+    intervals = []
+    for part in schedule.split(","):
+        match = re.search(r"\b((?:Th|Tu|Sa|Su|[MTWRFSU])+)\s+(\d{1,2})(?::(\d{2}))?\s*([AP]M)?\s*-\s*"
+                          r"(\d{1,2})(?::(\d{2}))?\s*([AP]M)?", part, re.IGNORECASE)
+        if not match:
+            continue
+        days, start_hour, start_minute, start_meridiem, end_hour, end_minute, end_meridiem = match.groups()
+        end = _clock_minutes(end_hour, end_minute, end_meridiem)
+        start = _clock_minutes(start_hour, start_minute, start_meridiem or end_meridiem)
+        if start >= end and not start_meridiem:
+            # "11:00-12:00 PM" starts in the morning.
+            start = _clock_minutes(start_hour, start_minute, "AM")
+        if start >= end and end_meridiem and int(end_hour) == 12:
+            # "11:00-12:00 AM" is written for classes that end at noon.
+            end = _clock_minutes(end_hour, end_minute, "PM")
+        if start >= end:
+            continue
+        for day in re.findall(r"Th|Tu|Sa|Su|[MTWRFSU]", days, re.IGNORECASE):
+            offset = SCHEDULE_DAYS[day.capitalize()] * MINUTES_PER_DAY
+            intervals.append((offset + start, offset + end))
+    return tuple(sorted(intervals))
+
+
+class IntervalIndex:
+    def __init__(self):
+        self.intervals = {}
+        self.starts = []
+        self.entries = []
+        self.max_length = 0
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def __contains__(self, key):
+        return key in self.intervals
+
+    def add(self, key, intervals):
+        self.intervals[key] = tuple(intervals)
+        self.dirty = True
+
+    def remove(self, key):
+        if self.intervals.pop(key, None) is not None:
+            self.dirty = True
+
+    def _sorted(self):
+        # Re-sorted lazily after changes, which are rare next to lookups.
+        if self.dirty:
+            self.entries = sorted((start, end, key) for key, intervals in self.intervals.items()
+                                  for start, end in intervals)
+            self.starts = [start for start, _, _ in self.entries]
+            self.max_length = max((end - start for start, end, _ in self.entries), default=0)
+            self.dirty = False
+        return self.entries
+
+    def overlapping(self, start: int, end: int) -> Set:
+        entries = self._sorted()
+        # Anything overlapping [start, end) begins before `end` and less than max_length before `start`.
+        lo = bisect.bisect_right(self.starts, start - self.max_length)
+        hi = bisect.bisect_left(self.starts, end)
+        return {key for _, entry_end, key in entries[lo:hi] if entry_end > start}
+
+    def conflicts(self, intervals) -> Set:
+        found = set()
+        for start, end in intervals:
+            found |= self.overlapping(start, end)
+        return found
+
+
+def student_shard(student_id: str, shards: int) -> int:
+    digest = hashlib.blake2b(student_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shards
+
+
+class StudentIdAllocator:
+    # IDs are a 64-bit hash of the normalized name and nothing else, so every process, shard and
+    # run hands the same student the same ID without coordinating, whatever order students log in.
+    # PERSON only separates this hash from others; it is not a secret, so anyone who knows a name
+    # can work out its ID. IDs identify students, they do not authenticate them. At 64 bits a
+    # collision is unlikely (around 1 in 370,000 at ten million students), and one is refused
+    # rather than letting two students share an ID.
+    PERSON = b"student-id"
+    DIGEST_SIZE = 8
+
+    def __init__(self):
+        self.by_name = {}
+        self.by_id = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        return " ".join(name.split()).casefold()
+
+    def student_id(self, key: str) -> str:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=self.DIGEST_SIZE, person=self.PERSON).hexdigest()
+        return f"STU{digest.upper()}"
+
+    def allocate(self, name: str) -> str:
+        key = self.normalize(name)
+        student_id = self.by_name.get(key)
+        if student_id is not None:
+            return student_id
+        student_id = self.student_id(key)
+        with self.lock:
+            if self.by_id.setdefault(student_id, key) != key:
+                raise ValueError(f"Student ID {student_id} already belongs to another name")
+            self.by_name[key] = student_id
+            return student_id
+
+    def lookup(self, name: str) -> Optional[str]:
+        return self.by_name.get(self.normalize(name))
+
+    def __len__(self):
+        return len(self.by_name)
+
 
 class StudentProfile:
     def __init__(self):
@@ -14,7 +318,7 @@ class StudentProfile:
         self.major = None
         self.year = None
         self.registered_courses = set()
-        self.schedule = {}
+        self.schedule = IntervalIndex()
         self.credits_total = 0
         self.is_authenticated = False
 
@@ -26,22 +330,629 @@ class StudentProfile:
             return True
         return False
 
-    def register_course(self, course_code: str) -> bool:
+    def register_course(self, course_code: str, meeting_times: Tuple = ()) -> bool:
         if course_code not in self.registered_courses:
             self.registered_courses.add(course_code)
+            self.schedule.add(course_code, meeting_times)
             return True
         return False
 
     def drop_course(self, course_code: str) -> bool:
         if course_code in self.registered_courses:
             self.registered_courses.remove(course_code)
+            self.schedule.remove(course_code)
             return True
         return False
 
+    def schedule_conflicts(self, meeting_times: Tuple) -> List[str]:
+        return sorted(self.schedule.conflicts(meeting_times))
 
-class UniversityKnowledgeBase:
+
+class PrerequisiteGraph:
     def __init__(self):
-        self.courses = {
+        self.ids = {}
+        self.codes = []
+        self.prerequisites = {}
+        self.dependents = {}
+        self.roots = set()
+        # Transitive prerequisites as int bitsets over course ids, filled in on first use.
+        self.closures = {}
+
+    def _id(self, course_code: str) -> int:
+        course_id = self.ids.get(course_code)
+        if course_id is None:
+            course_id = self.ids[course_code] = len(self.codes)
+            self.codes.append(course_code)
+        return course_id
+
+    def mask(self, course_codes) -> int:
+        mask = 0
+        for course_code in course_codes:
+            course_id = self.ids.get(course_code)
+            if course_id is not None:
+                mask |= 1 << course_id
+        return mask
+
+    def codes_in(self, mask: int) -> List[str]:
+        codes = []
+        while mask:
+            low = mask & -mask
+            codes.append(self.codes[low.bit_length() - 1])
+            mask ^= low
+        return codes
+
+    def set_prerequisites(self, course_code: str, prerequisites):
+        self.remove(course_code)
+        self._id(course_code)
+        # Duplicates would be counted twice as in-edges by validate() and never fully released.
+        prerequisites = tuple(dict.fromkeys(prerequisites))
+        self.prerequisites[course_code] = prerequisites
+        for prereq in prerequisites:
+            self._id(prereq)
+            self.dependents.setdefault(prereq, set()).add(course_code)
+        if not prerequisites:
+            self.roots.add(course_code)
+
+    def remove(self, course_code: str):
+        prerequisites = self.prerequisites.pop(course_code, None)
+        if prerequisites is None:
+            return
+        self._invalidate(course_code)
+        self.roots.discard(course_code)
+        for prereq in prerequisites:
+            dependents = self.dependents.get(prereq)
+            if dependents is not None:
+                dependents.discard(course_code)
+
+    def _invalidate(self, course_code: str):
+        # A cached closure implies every prerequisite's closure is cached too, so the walk
+        # up through dependents can stop at the first course without one.
+        stack = [course_code]
+        while stack:
+            code = stack.pop()
+            if self.closures.pop(code, None) is not None:
+                stack.extend(self.dependents.get(code, ()))
+
+    def closure(self, course_code: str) -> int:
+        closure = self.closures.get(course_code)
+        if closure is not None:
+            return closure
+        stack = [course_code]
+        while stack:
+            code = stack[-1]
+            pending = [prereq for prereq in self.prerequisites.get(code, ()) if prereq not in self.closures]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            closure = 0
+            for prereq in self.prerequisites.get(code, ()):
+                closure |= self.closures[prereq] | (1 << self.ids[prereq])
+            self.closures[code] = closure
+        return self.closures[course_code]
+
+    def requires(self, course_code: str, prereq: str) -> bool:
+        prereq_id = self.ids.get(prereq)
+        return prereq_id is not None and course_code in self.ids and bool(self.closure(course_code) >> prereq_id & 1)
+
+    def check(self, course_code: str, prerequisites):
+        for prereq in prerequisites:
+            if prereq == course_code or self.requires(prereq, course_code):
+                raise ValueError(f"Making {prereq} a prerequisite of {course_code} would create a cycle")
+
+    def validate(self):
+        # Kahn's algorithm over the whole catalog; whatever is left unvisited sits on or behind a cycle.
+        remaining = {code: sum(prereq in self.prerequisites for prereq in prerequisites)
+                     for code, prerequisites in self.prerequisites.items()}
+        ready = [code for code, count in remaining.items() if count == 0]
+        while ready:
+            code = ready.pop()
+            del remaining[code]
+            for dependent in self.dependents.get(code, ()):
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        if remaining:
+            raise ValueError(f"Prerequisite cycle involving: {', '.join(sorted(remaining))}")
+
+    def missing(self, course_code: str, completed) -> List[str]:
+        return self.chain(course_code, self.closure(course_code) & ~self.mask(completed))[:-1]
+
+    def chain(self, course_code: str, mask: int = None) -> List[str]:
+        # Prerequisites in an order that can actually be taken, ending with the course itself.
+        mask = self.closure(course_code) if mask is None else mask
+        depth = {}
+        for code in sorted(self.codes_in(mask), key=lambda code: bin(self.closure(code)).count("1")):
+            depth[code] = 1 + max((depth[prereq] for prereq in self.prerequisites.get(code, ()) if prereq in depth),
+                                  default=-1)
+        return sorted(depth, key=lambda code: (depth[code], self.ids[code])) + [course_code]
+
+    def eligible(self, completed, candidates) -> List[str]:
+        completed_mask = self.mask(completed)
+        return [code for code in candidates
+                if code not in completed and self.closure(code) & ~completed_mask == 0]
+
+
+class CourseCatalogIndex:
+    def __init__(self, knowledge_base: 'UniversityKnowledgeBase'):
+        self.kb = knowledge_base
+        self.rebuild()
+
+    def rebuild(self):
+        self.positions = {}
+        self.course_keys = {}
+        self.by_department = {}
+        self.by_instructor = {}
+        self.by_room = {}
+        self.by_credits = {}
+        self.open_courses = set()
+        self.unlocks = {}
+        self.prerequisites = PrerequisiteGraph()
+        self.meeting_times = {}
+        # Many sections share a schedule, so strings are parsed once and the interval index
+        # holds distinct meeting patterns rather than individual courses.
+        self.parsed_schedules = {}
+        self.by_meeting_times = {}
+        self.timetable = IntervalIndex()
+
+        self.prefix_departments = {}
+        for dept_key, dept_info in self.kb.departments.items():
+            for course_code in dept_info.get('popular_courses', []):
+                self.prefix_departments.setdefault(self.course_prefix(course_code), dept_key)
+
+        # Ranks reproduce the original scan order: department keys and names first, then aliases.
+        self.department_ranks = {}
+        for order, (dept_key, dept_info) in enumerate(self.kb.departments.items()):
+            for phrase in (dept_key.replace('_', ' '), dept_info['name'].lower()):
+                self.department_ranks.setdefault(phrase, []).append(((0, order), dept_key))
+        for order, (alias, dept_key) in enumerate(self.kb.department_aliases.items()):
+            self.department_ranks.setdefault(alias, []).append(((1, order), dept_key))
+
+        self.service_ranks = {service: order for order, service in enumerate(self.kb.general_info['services'])}
+        self.entity_scanner = EntityScanner(self.department_ranks, self.service_ranks)
+
+        for course_code in self.kb.courses:
+            self.add_course(course_code)
+        self.prerequisites.validate()
+
+    @staticmethod
+    def course_prefix(course_code: str) -> str:
+        match = re.match(r'[A-Z]+', course_code)
+        return match.group(0) if match else course_code
+
+    def department_of(self, course_code: str) -> Optional[str]:
+        course = self.kb.courses.get(course_code, {})
+        return course.get('department') or self.prefix_departments.get(self.course_prefix(course_code))
+
+    def add_course(self, course_code: str):
+        course = self.kb.courses[course_code]
+        self.positions.setdefault(course_code, len(self.positions))
+
+        keys = (self.department_of(course_code), course['instructor'].lower(),
+                course['room'].lower(), course['credits'], tuple(course['prerequisites']))
+        self.course_keys[course_code] = keys
+        department, instructor, room, credits, prerequisites = keys
+
+        self.by_department.setdefault(department, set()).add(course_code)
+        self.by_instructor.setdefault(instructor, set()).add(course_code)
+        self.by_room.setdefault(room, set()).add(course_code)
+        self.by_credits.setdefault(credits, set()).add(course_code)
+        for prereq in prerequisites:
+            self.unlocks.setdefault(prereq, set()).add(course_code)
+        self.prerequisites.set_prerequisites(course_code, prerequisites)
+        meeting_times = self.parsed_schedules.get(course['schedule'])
+        if meeting_times is None:
+            meeting_times = self.parsed_schedules[course['schedule']] = parse_schedule(course['schedule'])
+        self.meeting_times[course_code] = meeting_times
+        if meeting_times not in self.by_meeting_times:
+            self.timetable.add(meeting_times, meeting_times)
+        self.by_meeting_times.setdefault(meeting_times, set()).add(course_code)
+        self.refresh_seats(course_code)
+
+    def remove_course(self, course_code: str):
+        keys = self.course_keys.pop(course_code, None)
+        if keys is None:
+            return
+        department, instructor, room, credits, prerequisites = keys
+        self._discard(self.by_department, department, course_code)
+        self._discard(self.by_instructor, instructor, course_code)
+        self._discard(self.by_room, room, course_code)
+        self._discard(self.by_credits, credits, course_code)
+        for prereq in prerequisites:
+            self._discard(self.unlocks, prereq, course_code)
+        self.prerequisites.remove(course_code)
+        meeting_times = self.meeting_times.pop(course_code, None)
+        self._discard(self.by_meeting_times, meeting_times, course_code)
+        if meeting_times not in self.by_meeting_times:
+            self.timetable.remove(meeting_times)
+        self.open_courses.discard(course_code)
+
+    def refresh_course(self, course_code: str):
+        self.remove_course(course_code)
+        self.add_course(course_code)
+
+    def refresh_seats(self, course_code: str):
+        course = self.kb.courses[course_code]
+        if course['available'] and course['enrolled'] < course['capacity']:
+            self.open_courses.add(course_code)
+        else:
+            self.open_courses.discard(course_code)
+
+    @staticmethod
+    def _discard(index: Dict, key, course_code: str):
+        codes = index.get(key)
+        if codes is not None:
+            codes.discard(course_code)
+            if not codes:
+                del index[key]
+
+    def _ordered(self, course_codes) -> List[str]:
+        return sorted(course_codes, key=self.positions.__getitem__)
+
+    def courses_in_department(self, dept_key: str) -> List[str]:
+        return self._ordered(self.by_department.get(dept_key, ()))
+
+    def courses_by_instructor(self, instructor: str) -> List[str]:
+        return self._ordered(self.by_instructor.get(instructor.lower(), ()))
+
+    def courses_in_room(self, room: str) -> List[str]:
+        return self._ordered(self.by_room.get(room.lower(), ()))
+
+    def courses_with_credits(self, credits: int) -> List[str]:
+        return self._ordered(self.by_credits.get(credits, ()))
+
+    def open_course_codes(self) -> List[str]:
+        return self._ordered(self.open_courses)
+
+    def iter_open_course_codes(self) -> Iterator[str]:
+        # Catalog order without sorting: walk a snapshot of the positions, checking openness as we go.
+        return (course_code for course_code in list(self.positions) if course_code in self.open_courses)
+
+    def unlocked_by(self, course_code: str) -> List[str]:
+        return self._ordered(self.unlocks.get(course_code, ()))
+
+    def eligible_courses(self, completed) -> List[str]:
+        # Only courses without prerequisites or unlocked by something completed can qualify.
+        candidates = set(self.prerequisites.roots)
+        for course_code in completed:
+            candidates.update(self.unlocks.get(course_code, ()))
+        candidates.intersection_update(self.course_keys)
+        return self._ordered(self.prerequisites.eligible(completed, candidates))
+
+    def courses_meeting_during(self, intervals) -> List[str]:
+        patterns = self.timetable.conflicts(intervals)
+        return self._ordered(set().union(*(self.by_meeting_times[pattern] for pattern in patterns)))
+
+    def open_courses_fitting(self, busy: IntervalIndex) -> Set[str]:
+        clashing = self.timetable.conflicts(itertools.chain.from_iterable(busy.intervals.values()))
+        fitting = set().union(*(codes for pattern, codes in self.by_meeting_times.items() if pattern not in clashing))
+        return (fitting & self.open_courses) - set(busy.intervals)
+
+    def first_in_catalog_order(self, course_codes, limit: int) -> List[str]:
+        return heapq.nsmallest(limit, course_codes, key=self.positions.__getitem__)
+
+    def department_for_text(self, text_lower: str) -> Optional[str]:
+        departments = self.entity_scanner.scan(text_lower).departments
+        return departments[0] if departments else None
+
+    def service_for_text(self, text_lower: str) -> Optional[str]:
+        services = self.entity_scanner.scan(text_lower).services
+        return services[0] if services else None
+
+
+class SeatHold:
+    __slots__ = ('hold_id', 'course_code', 'expires_at')
+
+    def __init__(self, hold_id: int, course_code: str, expires_at: float):
+        self.hold_id = hold_id
+        self.course_code = course_code
+        self.expires_at = expires_at
+
+
+class WaitlistEntry:
+    __slots__ = ('course_code', 'student_id', 'priority', 'joined', 'on_promote', 'eligible')
+
+    def __init__(self, course_code: str, student_id: str, priority: int, joined: int, on_promote, eligible=None):
+        self.course_code = course_code
+        self.student_id = student_id
+        self.priority = priority
+        self.joined = joined
+        self.on_promote = on_promote
+        self.eligible = eligible
+
+
+class Waitlist:
+    # One queue per course. "fifo" serves students in the order they joined; "priority" serves the
+    # lowest priority value first and falls back to join order between equals. Heap entries of
+    # students who left are skipped lazily when popped; students whose eligibility check fails
+    # keep their place and the seat goes to the next one in line.
+    POLICIES = ("fifo", "priority")
+
+    def __init__(self, policy: str = "fifo"):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown waitlist policy {policy!r}; expected one of: {', '.join(self.POLICIES)}")
+        self.policy = policy
+        self.lock = threading.Lock()
+        self.sequence = itertools.count()
+        self.queues = {}
+        self.members = {}
+        self.promoted = 0
+
+    def join(self, course_code: str, student_id: str, on_promote, priority: int = 0, eligible=None) -> int:
+        with self.lock:
+            members = self.members.setdefault(course_code, {})
+            if student_id not in members:
+                entry = WaitlistEntry(course_code, student_id, priority if self.policy == "priority" else 0,
+                                      next(self.sequence), on_promote, eligible)
+                members[student_id] = entry
+                heapq.heappush(self.queues.setdefault(course_code, []), (entry.priority, entry.joined, student_id))
+            return self._position(course_code, student_id)
+
+    def _position(self, course_code: str, student_id: str) -> Optional[int]:
+        entry = self.members.get(course_code, {}).get(student_id)
+        if entry is None:
+            return None
+        key = (entry.priority, entry.joined)
+        return 1 + sum((other.priority, other.joined) < key for other in self.members[course_code].values())
+
+    def position(self, course_code: str, student_id: str) -> Optional[int]:
+        if not self.depth(course_code):
+            return None
+        with self.lock:
+            return self._position(course_code, student_id)
+
+    def positions(self, student_id: str) -> Dict[str, int]:
+        with self.lock:
+            return {course_code: self._position(course_code, student_id)
+                    for course_code, members in self.members.items() if student_id in members}
+
+    def _forget(self, course_code: str):
+        if not self.members.get(course_code):
+            self.members.pop(course_code, None)
+            self.queues.pop(course_code, None)
+
+    def leave(self, course_code: str, student_id: str) -> bool:
+        with self.lock:
+            if self.members.get(course_code, {}).pop(student_id, None) is None:
+                return False
+            self._forget(course_code)
+            return True
+
+    def leave_all(self, student_id: str) -> List[str]:
+        with self.lock:
+            left = [course_code for course_code, members in self.members.items() if members.pop(student_id, None)]
+            for course_code in left:
+                self._forget(course_code)
+            return left
+
+    def pop(self, course_code: str) -> Optional[WaitlistEntry]:
+        with self.lock:
+            queue = self.queues.get(course_code, [])
+            members = self.members.get(course_code, {})
+            skipped = []
+            promoted = None
+            while queue:
+                item = heapq.heappop(queue)
+                _, joined, student_id = item
+                entry = members.get(student_id)
+                if entry is None or entry.joined != joined:
+                    continue
+                if entry.eligible is not None and not entry.eligible(student_id, course_code):
+                    skipped.append(item)
+                    continue
+                del members[student_id]
+                self.promoted += 1
+                promoted = entry
+                break
+            for item in skipped:
+                heapq.heappush(queue, item)
+            self._forget(course_code)
+            return promoted
+
+    def depth(self, course_code: str) -> int:
+        return len(self.members.get(course_code, ()))
+
+    def depths(self) -> Dict[str, int]:
+        with self.lock:
+            return {course_code: len(members) for course_code, members in self.members.items()}
+
+
+class SeatLedger:
+    def __init__(self, knowledge_base: 'UniversityKnowledgeBase', hold_seconds: float = 120.0,
+                 clock=time.monotonic, waitlist: Waitlist = None):
+        self.kb = knowledge_base
+        self.hold_seconds = hold_seconds
+        self.clock = clock
+        self.waitlist = waitlist if waitlist is not None else Waitlist()
+        self.hold_ids = itertools.count(1)
+        # One lock per course: contention only happens between students going for the same course.
+        self.locks = {course_code: threading.Lock() for course_code in knowledge_base.courses}
+        self.holds = {}
+
+    def _lock(self, course_code: str) -> threading.Lock:
+        lock = self.locks.get(course_code)
+        if lock is None:
+            lock = self.locks.setdefault(course_code, threading.Lock())
+        return lock
+
+    def _locks(self, course_codes) -> List:
+        # Multi-course transactions take their locks in one global order, so two of them can't deadlock.
+        return [self._lock(course_code) for course_code in sorted(set(course_codes))]
+
+    @contextlib.contextmanager
+    def _locked(self, course_codes):
+        with contextlib.ExitStack() as stack:
+            for lock in self._locks(course_codes):
+                stack.enter_context(lock)
+            yield
+
+    def _add_hold(self, course_code: str, now: float) -> SeatHold:
+        hold = SeatHold(next(self.hold_ids), course_code, now + self.hold_seconds)
+        self.holds.setdefault(course_code, {})[hold.hold_id] = hold
+        self._holds_changed(course_code, 1)
+        return hold
+
+    def _promote(self, course_code: str, now: float) -> List[WaitlistEntry]:
+        # Called with the course lock held: free seats go to waitlisted students before anyone new.
+        promoted = []
+        while self.waitlist.depth(course_code) and self._has_room(course_code, self._active_holds(course_code, now)):
+            entry = self.waitlist.pop(course_code)
+            if entry is None:
+                break
+            self._enroll(course_code, 1)
+            promoted.append(entry)
+        return promoted
+
+    @staticmethod
+    def _notify(promoted: List[WaitlistEntry]):
+        # Outside the lock, so a callback that writes to the profile log doesn't hold up the course.
+        for entry in promoted:
+            entry.on_promote(entry.student_id, entry.course_code)
+
+    def promote(self, course_code: str) -> int:
+        if not self.waitlist.depth(course_code) or course_code not in self.kb.courses:
+            return 0
+        with self._lock(course_code):
+            promoted = self._promote(course_code, self.clock())
+        self._notify(promoted)
+        return len(promoted)
+
+    def promote_waitlisted(self) -> int:
+        # Seats freed by expired holds are only noticed when the course is next touched; a periodic
+        # sweep hands them to waiting students even if nobody else asks for the course.
+        return sum(self.promote(course_code) for course_code in list(self.waitlist.depths()))
+
+    def _pop_hold(self, hold: SeatHold) -> bool:
+        if self.holds.get(hold.course_code, {}).pop(hold.hold_id, None) is None:
+            return False
+        self._holds_changed(hold.course_code, -1)
+        return True
+
+    def _active_holds(self, course_code: str, now: float) -> Dict:
+        holds = self.holds.get(course_code)
+        if not holds:
+            return {}
+        expired = [hold_id for hold_id, hold in holds.items() if hold.expires_at <= now]
+        for hold_id in expired:
+            del holds[hold_id]
+        if expired:
+            self._holds_changed(course_code, -len(expired))
+        return holds
+
+    def _enrolled(self, course_code: str) -> int:
+        return self.kb.courses[course_code]['enrolled']
+
+    def _seats_taken(self, course_code: str, holds: Dict) -> int:
+        return self._enrolled(course_code) + len(holds)
+
+    def _has_room(self, course_code: str, holds: Dict) -> bool:
+        return self._seats_taken(course_code, holds) < self.kb.courses[course_code]['capacity']
+
+    def _holds_changed(self, course_code: str, delta: int):
+        pass
+
+    def _enroll(self, course_code: str, delta: int):
+        self.kb.update_enrollment(course_code, delta)
+
+    def available_seats(self, course_code: str) -> int:
+        course = self.kb.courses[course_code]
+        with self._lock(course_code):
+            holds = self._active_holds(course_code, self.clock())
+            return max(0, course['capacity'] - self._seats_taken(course_code, holds))
+
+    def hold(self, course_code: str) -> Optional[SeatHold]:
+        with self._lock(course_code):
+            now = self.clock()
+            promoted = self._promote(course_code, now) if self.waitlist.depth(course_code) else []
+            holds = self._active_holds(course_code, now)
+            hold = self._add_hold(course_code, now) if self._has_room(course_code, holds) else None
+        self._notify(promoted)
+        return hold
+
+    def hold_many(self, course_codes: List[str]) -> Tuple[List[SeatHold], List[str]]:
+        # Either every course gets a hold or none does; the courses without room are returned.
+        with self._locked(course_codes):
+            now = self.clock()
+            promoted = [entry for course_code in course_codes if self.waitlist.depth(course_code)
+                        for entry in self._promote(course_code, now)]
+            full = [course_code for course_code in course_codes
+                    if not self._has_room(course_code, self._active_holds(course_code, now))]
+            holds = [] if full else [self._add_hold(course_code, now) for course_code in course_codes]
+        self._notify(promoted)
+        return holds, full
+
+    def commit(self, hold: SeatHold) -> bool:
+        course_code = hold.course_code
+        if course_code not in self.kb.courses:
+            return False
+        with self._lock(course_code):
+            holds = self._active_holds(course_code, self.clock())
+            if holds.pop(hold.hold_id, None) is not None:
+                self._holds_changed(course_code, -1)
+            elif not self._has_room(course_code, holds):
+                # An expired hold can still be honoured if a seat happens to be free at commit time.
+                return False
+            self._enroll(course_code, 1)
+            return True
+
+    def commit_many(self, holds: List[SeatHold]) -> List[str]:
+        # All seats are enrolled together under every course's lock. If any course can no longer
+        # be honoured, the remaining holds are released, nothing is enrolled and those courses are returned.
+        course_codes = [hold.course_code for hold in holds]
+        unknown = [course_code for course_code in course_codes if course_code not in self.kb.courses]
+        if unknown:
+            self.release_many(holds)
+            return unknown
+        with self._locked(course_codes):
+            now = self.clock()
+            lost = []
+            for hold in holds:
+                active = self._active_holds(hold.course_code, now)
+                if hold.hold_id not in active and not self._has_room(hold.course_code, active):
+                    lost.append(hold.course_code)
+            if not lost:
+                for hold in holds:
+                    self._pop_hold(hold)
+                for course_code in course_codes:
+                    self._enroll(course_code, 1)
+                return []
+            # The seats these holds kept go to the waitlists, as they would on release_many. Holds
+            # that had already expired freed theirs too, so every course is offered.
+            for hold in holds:
+                self._pop_hold(hold)
+            promoted = [entry for course_code in dict.fromkeys(course_codes)
+                        for entry in self._promote(course_code, now)]
+        self._notify(promoted)
+        return lost
+
+    def release(self, hold: SeatHold):
+        with self._lock(hold.course_code):
+            promoted = self._promote(hold.course_code, self.clock()) if self._pop_hold(hold) else []
+        self._notify(promoted)
+
+    def release_many(self, holds: List[SeatHold]):
+        with self._locked([hold.course_code for hold in holds]):
+            now = self.clock()
+            promoted = [entry for hold in holds if self._pop_hold(hold)
+                        for entry in self._promote(hold.course_code, now)]
+        self._notify(promoted)
+
+    def drop(self, course_code: str) -> bool:
+        if course_code not in self.kb.courses:
+            return False
+        with self._lock(course_code):
+            if self._enrolled(course_code) <= 0:
+                return False
+            self._enroll(course_code, -1)
+            promoted = self._promote(course_code, self.clock())
+        self._notify(promoted)
+        return True
+
+
+class UniversityKnowledgeBase:
+    def __init__(self, courses: Dict = None, departments: Dict = None,
+                 general_info: Dict = None, department_aliases: Dict = None):
+        self.courses = courses if courses is not None else {
             "CS101": {
                 "name": "Introduction to Computer Science",
                 "credits": 3,
@@ -116,7 +1027,7 @@ class UniversityKnowledgeBase:
             }
         }
 
-        self.departments = {
+        self.departments = departments if departments is not None else {
             "computer_science": {
                 "name": "Computer Science",
                 "head": "Dr. Anderson",
@@ -151,7 +1062,7 @@ class UniversityKnowledgeBase:
             }
         }
 
-        self.general_info = {
+        self.general_info = general_info if general_info is not None else {
             "registration_dates": {
                 "fall_2024": "August 1-15, 2024",
                 "spring_2025": "December 1-15, 2024",
@@ -171,91 +1082,7 @@ class UniversityKnowledgeBase:
             }
         }
 
-
-class NLPProcessor:
-    def __init__(self, knowledge_base: UniversityKnowledgeBase):
-        self.kb = knowledge_base
-        self.intent_patterns = {
-            "course_info": [
-                r"(tell me about|what is|describe) (course )?(\w+\d+)",
-                r"(\w+\d+) (course|class) (info|information|details)",
-                r"(info|information|details) (about|on) (\w+\d+)"
-            ],
-            "course_schedule": [
-                r"when (is|does) (\w+\d+) (meet|held|scheduled)",
-                r"(\w+\d+) (schedule|time|timing)",
-                r"what time (is )?(\w+\d+)"
-            ],
-            "prerequisites": [
-                r"(what are the )?(prerequisites|prereqs) (for )?(\w+\d+)",
-                r"(\w+\d+) (prerequisites|prereqs|requirements)",
-                r"what (do i need|courses needed) (for|before) (\w+\d+)"
-            ],
-            "department_info": [
-                r"(tell me about|what is|describe) (the )?(\w+) department",
-                r"(\w+) department (info|information|contact)",
-                r"who (is the head|heads) (of )?(the )?(\w+) department"
-            ],
-            "registration": [
-                r"when (is|does) registration (start|begin|open)",
-                r"registration (dates|schedule|period)",
-                r"how (do i|to) register (for courses|for classes)"
-            ],
-            "register_course": [
-                r"register (for|me for) (\w+\d+)",
-                r"enroll (in|me in) (\w+\d+)",
-                r"add (\w+\d+) (to my schedule|to schedule)",
-                r"i want to (register for|take) (\w+\d+)"
-            ],
-            "drop_course": [
-                r"drop (\w+\d+)",
-                r"remove (\w+\d+) (from my schedule)",
-                r"unregister (from )?(\w+\d+)",
-                r"i want to drop (\w+\d+)"
-            ],
-            "my_schedule": [
-                r"(show|what is|display) my (schedule|courses)",
-                r"what (courses|classes) am i (taking|registered for)",
-                r"my (current )?schedule",
-                r"what (courses|classes) do i have"
-            ],
-            "available_courses": [
-                r"(what|which) courses are available",
-                r"show (me )?available courses",
-                r"list (all )?courses",
-                r"what can i take"
-            ],
-            "login": [
-                r"login|log in|sign in|authenticate",
-                r"i am (\w+)",
-                r"my name is (\w+)"
-            ],
-            "confirm": [
-                r"(yes|yeah|yep|confirm|ok|okay|proceed)",
-                r"do it|go ahead"
-            ],
-            "cancel": [
-                r"(no|nope|cancel|abort|stop)",
-                r"never mind|forget it"
-            ],
-            "services": [
-                r"(what|tell me about) (university )?services",
-                r"(library|tutoring|counseling|career) (services|hours|info)",
-                r"where (is|can i find) (the )?(library|tutoring|counseling)"
-            ]
-        }
-
-    def extract_course_code(self, text: str) -> str:
-        match = re.search(r'([A-Z]{2,4}\d{3})', text.upper())
-        return match.group(1) if match else None
-
-    def extract_department(self, text: str) -> str:
-        text_lower = text.lower()
-        for dept_key, dept_info in self.kb.departments.items():
-            if (dept_key.replace('_', ' ') in text_lower or
-                    dept_info['name'].lower() in text_lower):
-                return dept_key
-        dept_mapping = {
+        self.department_aliases = department_aliases if department_aliases is not None else {
             'cs': 'computer_science',
             'comp sci': 'computer_science',
             'math': 'mathematics',
@@ -263,99 +1090,1291 @@ class NLPProcessor:
             'phys': 'physics'
         }
 
-        for abbrev, full_name in dept_mapping.items():
-            if abbrev in text_lower:
-                return full_name
+        self.index = CourseCatalogIndex(self)
+        self.seats = SeatLedger(self)
+        # Bumped after every change to enrollment or catalog data; caches key on it.
+        self.versions = itertools.count(1)
+        self.version = 0
+        # The fuzzy-match and full-text indexes take seconds to build for a large catalog. Servers
+        # build them at startup with build_text_indexes(), off the event loop; after that catalog
+        # edits update them in place.
+        self.text_index_lock = threading.Lock()
+        self.resolver = None
+        self.searcher = None
+
+    def bump_version(self):
+        self.version = next(self.versions)
+
+    def build_text_indexes(self):
+        self.entity_resolver()
+        self.search_index()
+
+    def entity_resolver(self) -> 'EntityResolver':
+        if self.resolver is None:
+            with self.text_index_lock:
+                if self.resolver is None:
+                    self.resolver = EntityResolver(self)
+        return self.resolver
+
+    def search_index(self) -> 'SearchIndex':
+        if self.searcher is None:
+            with self.text_index_lock:
+                if self.searcher is None:
+                    self.searcher = SearchIndex(self)
+        return self.searcher
+
+    def _refresh_text_indexes(self, course_code: str):
+        with self.text_index_lock:
+            course = self.courses.get(course_code)
+            for index in (self.resolver, self.searcher):
+                if index is None:
+                    continue
+                if course is None:
+                    index.remove_course(course_code)
+                else:
+                    index.add_course(course_code, course)
+            self._rebuild_stale_text_indexes()
+
+    def _rebuild_stale_text_indexes(self):
+        # Edits are applied in place until the leftovers outweigh a fresh build; the caller holds text_index_lock.
+        if self.resolver is not None and self.resolver.needs_rebuild():
+            self.resolver = EntityResolver(self)
+        if self.searcher is not None and self.searcher.needs_rebuild():
+            self.searcher = SearchIndex(self)
+
+    def update_enrollment(self, course_code: str, delta: int):
+        self.courses[course_code]['enrolled'] += delta
+        self.index.refresh_seats(course_code)
+        self.bump_version()
+
+    def add_course(self, course_code: str, course: Dict):
+        self.index.prerequisites.check(course_code, course['prerequisites'])
+        self.courses[course_code] = course
+        self.index.refresh_course(course_code)
+        self._refresh_text_indexes(course_code)
+        self.bump_version()
+
+    def update_course(self, course_code: str, **changes):
+        if 'prerequisites' in changes:
+            self.index.prerequisites.check(course_code, changes['prerequisites'])
+        self.courses[course_code].update(changes)
+        self.index.refresh_course(course_code)
+        self._refresh_text_indexes(course_code)
+        self.bump_version()
+
+    def remove_course(self, course_code: str):
+        del self.courses[course_code]
+        self.index.remove_course(course_code)
+        self._refresh_text_indexes(course_code)
+        self.bump_version()
+
+    def add_department(self, dept_key: str, department: Dict):
+        self.departments[dept_key] = department
+        self.index.rebuild()
+        with self.text_index_lock:
+            if self.resolver is not None:
+                self.resolver.add_department(dept_key, department,
+                                             [alias for alias, key in self.department_aliases.items() if key == dept_key])
+            if self.searcher is not None:
+                self.searcher.add_department(dept_key, department)
+            self._rebuild_stale_text_indexes()
+        self.bump_version()
+
+
+class EntityCandidate:
+    __slots__ = ('kind', 'value', 'text', 'score')
+
+    def __init__(self, kind: str, value: str, text: str, score: float):
+        self.kind = kind
+        self.value = value
+        self.text = text
+        self.score = score
+
+    def __repr__(self):
+        return f"EntityCandidate({self.kind!r}, {self.value!r}, {self.text!r}, score={self.score:.2f})"
+
+
+class EntityResolver:
+    KINDS = ("course", "instructor", "department")
+    ROMAN_NUMERALS = {"i": "1", "ii": "2", "iii": "3", "iv": "4"}
+    MAX_POSTINGS = 500
+    SHORTLIST = 40
+    # Rebuild once retired entries pass this many, or this fraction of all entries if that is more.
+    MIN_REBUILD = 64
+    REBUILD_FRACTION = 0.25
+
+    def __init__(self, knowledge_base: 'UniversityKnowledgeBase'):
+        self.kinds = array.array('b')
+        self.values = []
+        self.texts = []
+        self.exact = {}
+        self.postings = {}
+        # Entries per (kind, value), so a catalog edit can retire the old ones in place. Retired
+        # entries stay in the postings with a kind of -1 and are skipped when resolving.
+        self.entries = {}
+        self.instructor_courses = collections.Counter()
+        self.course_instructors = {}
+        self.retired = 0
+
+        for course_code, course in knowledge_base.courses.items():
+            self.add_course(course_code, course)
+        for dept_key, dept_info in knowledge_base.departments.items():
+            self.add_department(dept_key, dept_info, ())
+        for alias, dept_key in knowledge_base.department_aliases.items():
+            self._add("department", dept_key, alias)
+
+    def _add(self, kind: str, value: str, text: str):
+        normalized = self.normalize(text)
+        grams = self.trigrams(normalized)
+        if not grams:
+            return
+        entry = len(self.values)
+        self.kinds.append(self.KINDS.index(kind))
+        self.values.append(value)
+        self.texts.append(text)
+        self.exact.setdefault((kind, normalized.replace(" ", "")), entry)
+        self.entries.setdefault((kind, value), []).append(entry)
+        # Postings are stored as compact unsigned int arrays; a 100k course catalog has millions.
+        for gram in grams:
+            postings = self.postings.get(gram)
+            if postings is None:
+                postings = self.postings[gram] = array.array('I')
+            postings.append(entry)
+
+    def needs_rebuild(self) -> bool:
+        return self.retired > max(self.MIN_REBUILD, self.REBUILD_FRACTION * len(self.values))
+
+    def _retire(self, kind: str, value: str):
+        for entry in self.entries.pop((kind, value), ()):
+            key = (kind, self.normalize(self.texts[entry]).replace(" ", ""))
+            if self.exact.get(key) == entry:
+                del self.exact[key]
+            self.kinds[entry] = -1
+            self.retired += 1
+
+    def add_course(self, course_code: str, course: Dict):
+        self.remove_course(course_code)
+        self._add("course", course_code, course_code)
+        self._add("course", course_code, course['name'])
+        instructor = self.course_instructors[course_code] = course['instructor']
+        self.instructor_courses[instructor] += 1
+        if self.instructor_courses[instructor] == 1:
+            self._add("instructor", instructor, instructor)
+
+    def remove_course(self, course_code: str):
+        self._retire("course", course_code)
+        instructor = self.course_instructors.pop(course_code, None)
+        if instructor is not None:
+            self.instructor_courses[instructor] -= 1
+            if not self.instructor_courses[instructor]:
+                del self.instructor_courses[instructor]
+                self._retire("instructor", instructor)
+
+    def add_department(self, dept_key: str, dept_info: Dict, aliases):
+        self._retire("department", dept_key)
+        self._add("department", dept_key, dept_key.replace('_', ' '))
+        self._add("department", dept_key, dept_info['name'])
+        for alias in aliases:
+            self._add("department", dept_key, alias)
+
+    @classmethod
+    def normalize(cls, text: str) -> str:
+        words = re.findall(r"[a-z0-9]+", text.lower())
+        return " ".join(cls.ROMAN_NUMERALS.get(word, word) for word in words)
+
+    @staticmethod
+    def trigrams(normalized: str) -> Set[str]:
+        grams = set()
+        for word in normalized.split():
+            padded = f" {word} "
+            for i in range(len(padded) - 2):
+                grams.add(padded[i:i + 3])
+        return grams
+
+    def resolve(self, query: str, kinds: Tuple = None, limit: int = 5) -> List[EntityCandidate]:
+        normalized = self.normalize(query)
+        grams = self.trigrams(normalized)
+        if not grams:
+            return []
+        kind_ids = None if kinds is None else {self.KINDS.index(kind) for kind in kinds}
+
+        # Only trigrams with short postings lists are counted; when every trigram is common the
+        # rarest one seeds a bounded candidate set. Shortlisted entries are then scored exactly.
+        overlap = collections.Counter()
+        ranked = sorted((len(self.postings.get(gram, ())), gram) for gram in grams)
+        for size, gram in ranked:
+            if size and size <= self.MAX_POSTINGS:
+                overlap.update(self.postings[gram])
+        if not overlap:
+            seed = next((gram for size, gram in ranked if size), None)
+            if seed is not None:
+                overlap.update(self.postings[seed][:self.MAX_POSTINGS])
+
+        exact = {}
+        compact = normalized.replace(" ", "")
+        for kind in self.KINDS:
+            entry = self.exact.get((kind, compact))
+            if entry is not None:
+                exact[entry] = 1.0
+
+        best = {}
+        candidates = (entry for entry in overlap if self.kinds[entry] >= 0) if self.retired else overlap
+        shortlist = heapq.nlargest(self.SHORTLIST, candidates, key=overlap.__getitem__)
+        for entry in itertools.chain(exact, shortlist):
+            if self.kinds[entry] < 0 or kind_ids is not None and self.kinds[entry] not in kind_ids:
+                continue
+            score = exact.get(entry)
+            if score is None:
+                entry_grams = self.trigrams(self.normalize(self.texts[entry]))
+                score = 2 * len(grams & entry_grams) / (len(grams) + len(entry_grams))
+            key = (self.kinds[entry], self.values[entry])
+            if key not in best or score > best[key].score:
+                best[key] = EntityCandidate(self.KINDS[self.kinds[entry]], self.values[entry],
+                                            self.texts[entry], score)
+        return sorted(best.values(), key=lambda c: -c.score)[:limit]
+
+
+class SearchIndex:
+    # BM25 over course, department and service text. Postings hold each document's BM25 term
+    # weight without the IDF factor, laid out back to back in two flat arrays with a (idf, start,
+    # end) slice per term. Lists longer than MAX_POSTINGS keep only their heaviest entries, so a
+    # query never reads more than that many entries per term.
+    KINDS = ("course", "department", "service")
+    WORD = re.compile(r"[a-z0-9]+")
+    STOPWORDS = frozenset("""a an and any are about at be can course courses do does for from get have how i
+        in is it know me my need of on or please show some tell that the there this to want what when where
+        which who with yes no you your""".split())
+    K1 = 1.2
+    B = 0.75
+    MAX_POSTINGS = 200
+    MIN_SCORE = 0.1
+    # Matches scoring under this fraction of the best one only share a common word with the query.
+    RELATIVE_CUTOFF = 0.5
+    # Rebuild once overlay and retired documents pass this many, or this fraction of the build if that is more.
+    MIN_REBUILD = 64
+    REBUILD_FRACTION = 0.25
+
+    def __init__(self, knowledge_base: 'UniversityKnowledgeBase'):
+        self.kinds = array.array('b')
+        self.values = []
+        self.titles = []
+        self.documents = {}
+        lengths = []
+        postings = {}
+
+        def add(kind: str, value: str, title: str, text: str):
+            terms = self.terms(f"{title} {text}")
+            if not terms:
+                return
+            doc = len(self.values)
+            self.kinds.append(self.KINDS.index(kind))
+            self.values.append(value)
+            self.titles.append(title)
+            self.documents[kind, value] = doc
+            lengths.append(len(terms))
+            # A document is listed once per occurrence of the term; the repeats are its term frequency.
+            for term in terms:
+                postings.setdefault(term, []).append(doc)
+
+        for course_code, course in knowledge_base.courses.items():
+            add("course", course_code, course['name'],
+                f"{course_code} {course['description']} {course['instructor']}")
+        for dept_key, dept_info in knowledge_base.departments.items():
+            add("department", dept_key, dept_info['name'], f"{dept_info['head']} {dept_info['location']}")
+        for service, info in knowledge_base.general_info.get('services', {}).items():
+            add("service", service, service, info)
+
+        count = self.count = len(lengths)
+        average_length = self.average_length = sum(lengths) / count if count else 1.0
+        k1, b = self.K1, self.B
+        single = [(k1 + 1) / (1 + k1 * (1 - b + b * length / average_length)) for length in lengths]
+        self.postings = {}
+        self.docs = array.array('I')
+        self.weights = array.array('f')
+        for term, docs in postings.items():
+            if len(docs) > 1 and len(set(docs)) < len(docs):
+                frequencies = collections.Counter(docs)
+                docs = list(frequencies)
+                weights = [tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths[doc] / average_length))
+                           for doc, tf in frequencies.items()]
+            else:
+                weights = [single[doc] for doc in docs]
+            idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            if len(docs) > self.MAX_POSTINGS:
+                threshold = sorted(weights, reverse=True)[self.MAX_POSTINGS - 1]
+                kept = [i for i, weight in enumerate(weights) if weight >= threshold][:self.MAX_POSTINGS]
+                docs = [docs[i] for i in kept]
+                weights = [weights[i] for i in kept]
+            start = len(self.docs)
+            self.docs.extend(docs)
+            self.weights.extend(weights)
+            self.postings[term] = (idf, start, len(self.docs))
+        # Catalog edits after the build go to a small overlay scored with the build's statistics, and
+        # replaced documents are retired rather than cut out of the flat arrays.
+        self.added = {}
+        self.retired = 0
+
+    def needs_rebuild(self) -> bool:
+        overlay = len(self.values) - self.count
+        return overlay + self.retired > max(self.MIN_REBUILD, self.REBUILD_FRACTION * self.count)
+
+    def add_document(self, kind: str, value: str, title: str, text: str):
+        self.remove_document(kind, value)
+        terms = self.terms(f"{title} {text}")
+        if not terms:
+            return
+        doc = len(self.values)
+        self.kinds.append(self.KINDS.index(kind))
+        self.values.append(value)
+        self.titles.append(title)
+        self.documents[kind, value] = doc
+        k1, b = self.K1, self.B
+        norm = k1 * (1 - b + b * len(terms) / self.average_length)
+        for term, tf in collections.Counter(terms).items():
+            self.added.setdefault(term, []).append((doc, tf * (k1 + 1) / (tf + norm)))
+
+    def remove_document(self, kind: str, value: str):
+        doc = self.documents.pop((kind, value), None)
+        if doc is not None:
+            self.kinds[doc] = -1
+            self.retired += 1
+
+    def add_course(self, course_code: str, course: Dict):
+        self.add_document("course", course_code, course['name'],
+                          f"{course_code} {course['description']} {course['instructor']}")
+
+    def remove_course(self, course_code: str):
+        self.remove_document("course", course_code)
+
+    def add_department(self, dept_key: str, dept_info: Dict):
+        self.add_document("department", dept_key, dept_info['name'], f"{dept_info['head']} {dept_info['location']}")
+
+    @classmethod
+    def terms(cls, text: str) -> List[str]:
+        return [word for word in cls.WORD.findall(text.lower()) if word not in cls.STOPWORDS]
+
+    def search(self, query: str, limit: int = 3) -> List[EntityCandidate]:
+        scores = collections.defaultdict(float)
+        for term in set(self.terms(query)):
+            posting = self.postings.get(term)
+            added = self.added.get(term, ())
+            if posting is not None:
+                idf, start, end = posting
+                for doc, weight in zip(self.docs[start:end], self.weights[start:end]):
+                    scores[doc] += idf * weight
+            elif added:
+                count = max(self.count, len(added))
+                idf = math.log(1 + (count - len(added) + 0.5) / (len(added) + 0.5))
+            for doc, weight in added:
+                scores[doc] += idf * weight
+        if self.retired:
+            scores = {doc: score for doc, score in scores.items() if self.kinds[doc] >= 0}
+        best = heapq.nlargest(limit, scores, key=scores.__getitem__)
+        if not best or scores[best[0]] < self.MIN_SCORE:
+            return []
+        return [EntityCandidate(self.KINDS[self.kinds[doc]], self.values[doc], self.titles[doc], scores[doc])
+                for doc in best if scores[doc] >= self.RELATIVE_CUTOFF * scores[best[0]]]
+
+
+class PhraseScanner:
+    def __init__(self, phrases):
+        self.phrases = {phrase for phrase in phrases if phrase}
+
+        # Phrases are collapsed to a prefix-free set of representatives so that at most one
+        # representative can start at any text position; longer phrases are checked on top.
+        trie = {}
+        self.extensions = {}
+        for phrase in sorted(self.phrases, key=len):
+            node = trie
+            representative = None
+            for i, char in enumerate(phrase):
+                if '' in node:
+                    representative = phrase[:i]
+                    break
+                node = node.setdefault(char, {})
+            if representative is None and '' in node:
+                representative = phrase
+            if representative is None:
+                node[''] = True
+                representative = phrase
+            self.extensions.setdefault(representative, []).append(phrase)
+
+        self.trie_pattern = self._trie_regex(trie) if trie else ""
+        self.scanner = None
+        if trie:
+            self.scanner = re.compile(f"(?=({self.trie_pattern}))", re.DOTALL)
+
+    @classmethod
+    def _trie_regex(cls, node: Dict) -> str:
+        # A trie-shaped alternation lets the regex engine branch on one character at a time
+        # instead of retrying every phrase at each text position.
+        branches = [re.escape(char) + cls._trie_regex(child)
+                    for char, child in sorted(node.items()) if char]
+        if len(branches) <= 1:
+            return ''.join(branches)
+        return '(?:' + '|'.join(branches) + ')'
+
+    def finditer(self, text: str):
+        if self.scanner is None:
+            return
+        for match in self.scanner.finditer(text):
+            position = match.start()
+            for phrase in self.extensions[match.group(1)]:
+                if text.startswith(phrase, position):
+                    yield position, phrase
 
-        return None
+    def find(self, text: str) -> Set[str]:
+        return {phrase for _, phrase in self.finditer(text)}
 
-    def classify_intent(self, text: str) -> Tuple[str, Dict]:
-        text_lower = text.lower()
 
-        for intent, patterns in self.intent_patterns.items():
+class EntityMentions:
+    __slots__ = ('course_codes', 'departments', 'services', 'name')
+
+    def __init__(self):
+        self.course_codes = []
+        self.departments = []
+        self.services = []
+        self.name = None
+
+    def entities(self) -> Dict:
+        # The first course code and the best-ranked department and service keep their single-value
+        # keys; every distinct code is listed under course_codes once there is more than one.
+        entities = {}
+        if self.course_codes:
+            entities['course_code'] = self.course_codes[0]
+            if len(self.course_codes) > 1:
+                entities['course_codes'] = tuple(self.course_codes)
+        if self.departments:
+            entities['department'] = self.departments[0]
+        if self.services:
+            entities['service'] = self.services[0]
+        if self.name:
+            entities['name'] = self.name
+        return entities
+
+
+class EntityScanner:
+    # Course codes, department and service phrases and self-introductions ("my name is ...") are
+    # all found by one precompiled scanner in a single pass over the lowercased text. A code and a
+    # phrase can start at the same position ("cs" in "cs101"), so the code branch also captures an
+    # optional phrase.
+    COURSE_CODE = r"[a-z]{2,4}\d{3}"
+    NAME_INTRODUCTIONS = ("my name is", "my name's", "name is", "i am", "i'm", "call me", "this is", "it's",
+                          "log in as", "sign me in as")
+    NAME = re.compile(r"\w+")
+
+    def __init__(self, department_ranks: Dict[str, List], service_ranks: Dict[str, int]):
+        self.department_ranks = department_ranks
+        self.service_ranks = service_ranks
+        self.introductions = {f"{introduction} " for introduction in self.NAME_INTRODUCTIONS}
+        self.phrases = PhraseScanner(set(department_ranks) | set(service_ranks) | self.introductions)
+        trie = self.phrases.trie_pattern
+        self.scanner = re.compile(f"(?=(?P<code>{self.COURSE_CODE}))(?=(?P<code_phrase>{trie})|)"
+                                  f"|(?=(?P<phrase>{trie}))", re.DOTALL)
+
+    def scan(self, text_lower: str) -> EntityMentions:
+        mentions = EntityMentions()
+        departments = []
+        services = set()
+        code_end = 0
+        for match in self.scanner.finditer(text_lower):
+            position = match.start()
+            code = match.group('code')
+            # Codes are taken left to right without overlapping, like re.finditer would.
+            if code and position >= code_end:
+                code_end = position + len(code)
+                code = code.upper()
+                if code not in mentions.course_codes:
+                    mentions.course_codes.append(code)
+
+            representative = match.group('code_phrase') or match.group('phrase')
+            if not representative:
+                continue
+            for phrase in self.phrases.extensions[representative]:
+                if not text_lower.startswith(phrase, position):
+                    continue
+                if phrase in self.department_ranks:
+                    departments.extend(self.department_ranks[phrase])
+                if phrase in self.service_ranks:
+                    services.add(phrase)
+                if mentions.name is None and phrase in self.introductions:
+                    name = self.NAME.match(text_lower, position + len(phrase))
+                    if name:
+                        mentions.name = name.group(0)
+
+        for _, dept_key in sorted(departments):
+            if dept_key not in mentions.departments:
+                mentions.departments.append(dept_key)
+        mentions.services = sorted(services, key=self.service_ranks.__getitem__)
+        return mentions
+
+
+class IntentClassifier:
+    _REPEATS = (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT,
+                getattr(sre_parse, 'POSSESSIVE_REPEAT', sre_parse.MAX_REPEAT))
+
+    def __init__(self, intent_patterns: Dict[str, List[str]]):
+        # Rules keep the (intent, pattern) order of intent_patterns so the first match still wins.
+        self.rules = []
+        for intent, patterns in intent_patterns.items():
             for pattern in patterns:
-                match = re.search(pattern, text_lower)
-                if match:
-                    entities = {}
-                    course_code = self.extract_course_code(text)
-                    if course_code:
-                        entities['course_code'] = course_code
+                self.rules.append((intent, pattern, re.compile(pattern)))
+
+        self.always_checked = []
+        self.rules_by_factor = {}
+        for index, (_, pattern, compiled) in enumerate(self.rules):
+            factors = None
+            if not compiled.flags & re.IGNORECASE:
+                factors = self._required_factors(sre_parse.parse(pattern).data)
+            if not factors:
+                self.always_checked.append(index)
+                continue
+            for factor in factors:
+                self.rules_by_factor.setdefault(factor, []).append(index)
+
+        self.factor_scanner = PhraseScanner(self.rules_by_factor)
+
+    @classmethod
+    def _required_factors(cls, items) -> Optional[Set[str]]:
+        best = None
+        run = []
+
+        def consider(factors):
+            nonlocal best
+            if factors and all(factors) and (best is None or
+                                             min(map(len, factors)) > min(map(len, best))):
+                best = factors
+
+        for op, av in items:
+            if op is sre_parse.LITERAL:
+                run.append(chr(av))
+                continue
+            if run:
+                consider({''.join(run)})
+                run = []
+
+            if op is sre_parse.SUBPATTERN:
+                consider(cls._required_factors(av[-1]))
+            elif op is sre_parse.BRANCH:
+                branches = [cls._required_factors(branch) for branch in av[1]]
+                if all(branches):
+                    consider(set().union(*branches))
+            elif op in cls._REPEATS and av[0] >= 1:
+                consider(cls._required_factors(av[2]))
+
+        if run:
+            consider({''.join(run)})
+        return best
+
+    def candidates(self, text_lower: str) -> List[int]:
+        indexes = set(self.always_checked)
+        for factor in self.factor_scanner.find(text_lower):
+            indexes.update(self.rules_by_factor[factor])
+        return sorted(indexes)
+
+    def match(self, text_lower: str) -> Optional[Tuple[str, str]]:
+        for index in self.candidates(text_lower):
+            intent, pattern, compiled = self.rules[index]
+            if compiled.search(text_lower):
+                return intent, pattern
+        return None
+
+
+class IntentHandler:
+    __slots__ = ('name', 'patterns', 'handler', 'read_only', 'needs_auth', 'auth_message',
+                 'cacheable', 'cache_key', 'render', 'personalize')
+
+    def __init__(self, name: str, patterns: List[str], handler=None, read_only: bool = False,
+                 needs_auth: bool = False, auth_message: str = None, cacheable: bool = False,
+                 cache_key=None, render=None, personalize=None):
+        if cacheable and not read_only:
+            raise ValueError(f"Intent '{name}' cannot be cacheable without being read-only")
+        if cacheable and render is None:
+            raise ValueError(f"Cacheable intent '{name}' needs a render function")
+        if not cacheable and handler is None:
+            raise ValueError(f"Intent '{name}' needs a handler")
+        self.name = name
+        self.patterns = list(patterns)
+        self.handler = handler
+        self.read_only = read_only
+        self.needs_auth = needs_auth
+        self.auth_message = auth_message or "Please log in first. Just tell me your name!"
+        self.cacheable = cacheable
+        self.cache_key = cache_key
+        self.render = render
+        self.personalize = personalize
+
+
+class IntentRegistry:
+    def __init__(self):
+        self.handlers = {}
+        self.fallback = None
+        self.version = 0
+
+    def register(self, name: str, patterns: List[str], handler=None, before: str = None, **metadata) -> IntentHandler:
+        # Handlers are called as handler(chatbot, user_input, entities). Patterns are tried in
+        # registration order, so `before` lets an intent take priority over an existing one.
+        entry = IntentHandler(name, patterns, handler, **metadata)
+        handlers = {key: value for key, value in self.handlers.items() if key != name}
+        if before is not None:
+            if before not in handlers:
+                raise KeyError(f"Unknown intent '{before}'")
+            reordered = {}
+            for key, value in handlers.items():
+                if key == before:
+                    reordered[name] = entry
+                reordered[key] = value
+            handlers = reordered
+        else:
+            handlers[name] = entry
+        self.handlers = handlers
+        self.version += 1
+        return entry
+
+    def intent(self, name: str, patterns: List[str], **metadata):
+        def decorator(handler):
+            self.register(name, patterns, handler, **metadata)
+            return handler
+        return decorator
+
+    def unregister(self, name: str):
+        self.handlers = {key: value for key, value in self.handlers.items() if key != name}
+        self.version += 1
 
-                    department = self.extract_department(text)
-                    if department:
-                        entities['department'] = department
+    def get(self, name: str) -> Optional[IntentHandler]:
+        return self.handlers.get(name)
 
-                    return intent, entities
+    def intent_patterns(self) -> Dict[str, List[str]]:
+        return {name: entry.patterns for name, entry in self.handlers.items()}
+
+
+class NLPProcessor:
+    GENERAL_WORDS = frozenset(['a', 'an', 'and', 'the', 'of', 'in', 'to', 'for', 'about', 'please', 'can', 'you',
+                               'me', 'i', 'is', 'hello', 'hi', 'hey', 'good', 'morning', 'afternoon',
+                               'thank', 'thanks', 'help', 'course', 'class'])
+    COURSE_MENTION_THRESHOLD = 0.5
+    COURSE_CODE = re.compile(r'([A-Z]{2,4}\d{3})')
+    COURSE_SLOT = r"(\w+\d+)"
+
+    def __init__(self, knowledge_base: UniversityKnowledgeBase, registry: 'IntentRegistry' = None,
+                 intent_model=None):
+        self.kb = knowledge_base
+        self.registry = registry if registry is not None else default_intent_registry()
+        # A trained IntentModel (see intent_model.py) replaces the regex patterns when given.
+        self.intent_model = intent_model
+        self.rebuild_intent_classifier()
+
+    def rebuild_intent_classifier(self):
+        self.registry_version = self.registry.version
+        self.intent_patterns = self.registry.intent_patterns()
+        self.intent_classifier = IntentClassifier(self.intent_patterns)
+        self.intent_vocabulary = self.GENERAL_WORDS | {word for patterns in self.intent_patterns.values()
+                                                       for pattern in patterns
+                                                       for word in re.findall(r"[a-z]+", pattern)}
+        # Intents with a course slot; only these may be reached by rewriting a course mention.
+        self.course_intents = {intent for intent, patterns in self.intent_patterns.items()
+                               if any(self.COURSE_SLOT in pattern for pattern in patterns)}
+
+    def match_intent(self, text_lower: str, prediction: Tuple[str, float] = None) -> Optional[Tuple[str, str]]:
+        if self.intent_model is not None:
+            intent, confidence = prediction or self.intent_model.predict(text_lower)
+            if confidence >= self.intent_model.min_confidence and intent in self.registry.handlers:
+                return intent, self.intent_model.PATTERN
+            return None
+        if self.registry_version != self.registry.version:
+            self.rebuild_intent_classifier()
+        return self.intent_classifier.match(text_lower)
+
+    def extract_course_code(self, text: str) -> str:
+        match = self.COURSE_CODE.search(text.upper())
+        return match.group(1) if match else None
+
+    def extract_department(self, text: str) -> str:
+        return self.kb.index.department_for_text(text.lower())
+
+    def classify_intent(self, text: str) -> Tuple[str, Dict]:
+        return self._classify(text, text.lower())
+
+    def match_with_fallback(self, text: str, text_lower: str,
+                            prediction: Tuple[str, float] = None) -> Tuple[str, str, Optional[Tuple[str, str]]]:
+        match = self.match_intent(text_lower, prediction)
+        # The model can recognise "tell me about data structures" without a course code in it,
+        # so in that mode course mentions are rewritten for matched messages too.
+        if match is None or (self.intent_model is not None and self.extract_course_code(text) is None):
+            rewrite = self._rewrite_course_mentions(text)
+            if rewrite is not None:
+                rewritten, spans = rewrite
+                rewritten_lower = rewritten.lower()
+                rewritten_match = self.match_intent(rewritten_lower)
+                if (rewritten_match is not None and (match is None or rewritten_match[0] == match[0])
+                        and self._fills_course_slot(rewritten_match, rewritten_lower, spans)):
+                    return rewritten, rewritten_lower, rewritten_match
+        return text, text_lower, match
+
+    def _fills_course_slot(self, match: Tuple[str, str], text_lower: str, spans: List[Tuple[int, int]]) -> bool:
+        # The substituted code has to be what the intent takes as its course, otherwise the rewrite
+        # only made some unrelated pattern match ("the CS101 department").
+        intent, pattern = match
+        if intent not in self.course_intents:
+            return False
+        if self.intent_model is not None and pattern == self.intent_model.PATTERN:
+            return True
+        found = re.search(pattern, text_lower)
+        return found is not None and any(found.span(group) in spans for group in range(1, found.re.groups + 1))
+
+    def rewrite_course_mentions(self, text: str) -> Optional[str]:
+        rewrite = self._rewrite_course_mentions(text)
+        return rewrite[0] if rewrite is not None else None
+
+    def _rewrite_course_mentions(self, text: str) -> Optional[Tuple[str, List[Tuple[int, int]]]]:
+        # Returns the rewritten text and where the substituted course codes sit in it.
+        # "cs 201" -> "CS201" when that is a real course code.
+        parts = []
+        spans = []
+        end = 0
+        for mention in re.finditer(r"\b([A-Za-z]{2,4})\s+(\d{3})\b", text):
+            code = (mention.group(1) + mention.group(2)).upper()
+            if code not in self.kb.courses:
+                continue
+            parts.append(text[end:mention.start()])
+            start = sum(map(len, parts))
+            parts.append(code)
+            spans.append((start, start + len(code)))
+            end = mention.end()
+        if spans:
+            return "".join(parts) + text[end:], spans
+
+        # Otherwise resolve the longest run of words that are not part of any intent phrasing,
+        # e.g. "data structures" in "tell me about data structures".
+        best_run = None
+        run_start = run_end = None
+        for word in re.finditer(r"[A-Za-z0-9]+", text):
+            if word.group(0).lower() in self.intent_vocabulary:
+                run_start = None
+                continue
+            if run_start is None:
+                run_start = word.start()
+            run_end = word.end()
+            if best_run is None or run_end - run_start > best_run[1] - best_run[0]:
+                best_run = (run_start, run_end)
+        if best_run is None:
+            return None
+
+        candidates = self.kb.entity_resolver().resolve(text[best_run[0]:best_run[1]], kinds=("course",), limit=1)
+        if not candidates or candidates[0].score < self.COURSE_MENTION_THRESHOLD:
+            return None
+        code = candidates[0].value
+        return text[:best_run[0]] + code + text[best_run[1]:], [(best_run[0], best_run[0] + len(code))]
+
+    def _classify(self, text: str, text_lower: str, entity_cache: Dict = None,
+                  prediction: Tuple[str, float] = None) -> Tuple[str, Dict]:
+        text, text_lower, match = self.match_with_fallback(text, text_lower, prediction)
+        if match:
+            intent, _ = match
+            return intent, self.extract_entities(text, text_lower, entity_cache)
 
         return "general", {}
 
+    def extract_entities(self, text: str, text_lower: str, entity_cache: Dict = None) -> Dict:
+        if entity_cache is None:
+            return self.kb.index.entity_scanner.scan(text_lower).entities()
+        mentions = entity_cache.get(text_lower)
+        if mentions is None:
+            mentions = entity_cache[text_lower] = self.kb.index.entity_scanner.scan(text_lower)
+        return mentions.entities()
+
+    def classify_batch(self, texts: List[str], processes: int = None, chunk_size: int = 2000,
+                       mp_context=None) -> List[Tuple[str, Dict]]:
+        unique_texts = list(dict.fromkeys(texts))
+
+        if processes and processes > 1 and len(unique_texts) > chunk_size:
+            chunks = [unique_texts[i:i + chunk_size] for i in range(0, len(unique_texts), chunk_size)]
+            results = {}
+            with ProcessPoolExecutor(max_workers=processes, mp_context=mp_context, initializer=_init_batch_worker,
+                                     initargs=self.batch_worker_state()) as pool:
+                for chunk, chunk_results in zip(chunks, pool.map(_classify_batch_chunk, chunks)):
+                    results.update(zip(chunk, chunk_results))
+        else:
+            results = dict(zip(unique_texts, self._classify_unique(unique_texts)))
+
+        return [(intent, dict(entities)) for intent, entities in (results[text] for text in texts)]
+
+    def batch_worker_state(self) -> Tuple:
+        # The knowledge base holds seat locks and can't be pickled under the spawn start method, so
+        # workers get the catalog inputs and the pattern table and rebuild their own processor.
+        kb = self.kb
+        return ((kb.courses, kb.departments, kb.general_info, kb.department_aliases),
+                self.registry.intent_patterns(), self.intent_model)
+
+    def _classify_unique(self, texts: List[str]) -> List[Tuple[str, Dict]]:
+        entity_cache = {}
+        texts_lower = [text.lower() for text in texts]
+        if self.intent_model is None:
+            return [self._classify(text, text_lower, entity_cache) for text, text_lower in zip(texts, texts_lower)]
+        # The model scores the whole batch at once; only the rewrite fallback scores texts one by one.
+        predictions = self.intent_model.predict_batch(texts_lower)
+        return [self._classify(text, text_lower, entity_cache, prediction)
+                for text, text_lower, prediction in zip(texts, texts_lower, predictions)]
+
+
+_batch_worker_nlp = None
+
+
+def _not_dispatched(bot: 'UniversityChatbot', text: str, entities: Dict):
+    raise RuntimeError("Batch workers only classify messages")
+
+
+def _init_batch_worker(catalog: Tuple, intent_patterns: Dict[str, List[str]], intent_model):
+    global _batch_worker_nlp
+    registry = IntentRegistry()
+    for name, patterns in intent_patterns.items():
+        registry.register(name, patterns, _not_dispatched)
+    _batch_worker_nlp = NLPProcessor(UniversityKnowledgeBase(*catalog), registry, intent_model)
+
+
+def _classify_batch_chunk(texts: List[str]) -> List[Tuple[str, Dict]]:
+    return _batch_worker_nlp._classify_unique(texts)
+
+
+class ConversationHistory:
+    # Intent names are shared by every history in the process and stored as small integer ids.
+    intent_ids = {}
+    intent_names = []
+    intent_lock = threading.Lock()
+    # Repeated entity sets (the same course code across many sessions) share one tuple. Names and
+    # free text make the set of distinct tuples open-ended, so only the most recent ones are kept.
+    ENTITY_INTERN_LIMIT = 4096
+    entity_tuples = collections.OrderedDict()
+    entity_lock = threading.Lock()
+
+    def __init__(self, capacity: int = 1000, spill_path: str = None):
+        self.capacity = capacity
+        self.spill_path = spill_path
+        self.spill_file = None
+        self.timestamps = array.array('q', bytes(8 * capacity))
+        self.intents = array.array('H', bytes(2 * capacity))
+        self.messages = [None] * capacity
+        self.entities = [None] * capacity
+        self.start = 0
+        self.size = 0
+        self.total_turns = 0
+        self.spilled = 0
+        self.base_monotonic_ns = time.monotonic_ns()
+        self.base_wall_ns = time.time_ns()
+
+    @classmethod
+    def intent_id(cls, intent: str) -> int:
+        intent_id = cls.intent_ids.get(intent)
+        if intent_id is None:
+            with cls.intent_lock:
+                intent_id = cls.intent_ids.get(intent)
+                if intent_id is None:
+                    intent_id = len(cls.intent_names)
+                    cls.intent_names.append(intent)
+                    cls.intent_ids[intent] = intent_id
+        return intent_id
+
+    @classmethod
+    def intern_entities(cls, entities: Dict) -> Tuple:
+        key = tuple(entities.items())
+        try:
+            hash(key)
+        except TypeError:
+            return key
+        with cls.entity_lock:
+            interned = cls.entity_tuples.get(key)
+            if interned is not None:
+                cls.entity_tuples.move_to_end(key)
+                return interned
+            cls.entity_tuples[key] = key
+            if len(cls.entity_tuples) > cls.ENTITY_INTERN_LIMIT:
+                cls.entity_tuples.popitem(last=False)
+        return key
+
+    def append(self, user_input: str, intent: str, entities: Dict):
+        if self.size == self.capacity:
+            self._spill(self.start)
+            slot = self.start
+            self.start = (self.start + 1) % self.capacity
+        else:
+            slot = (self.start + self.size) % self.capacity
+            self.size += 1
+
+        self.timestamps[slot] = time.monotonic_ns()
+        self.intents[slot] = self.intent_id(intent)
+        self.messages[slot] = user_input
+        self.entities[slot] = self.intern_entities(entities) if entities else None
+        self.total_turns += 1
+
+    def _spill(self, slot: int):
+        if self.spill_path is None:
+            return
+        if self.spill_file is None:
+            self.spill_file = open(self.spill_path, 'a', encoding='utf-8')
+        self.spill_file.write(json.dumps(self._record(slot, wall_clock_ms=True), ensure_ascii=False) + "\n")
+        self.spilled += 1
+
+    def _wall_clock_ns(self, slot: int) -> int:
+        return self.base_wall_ns + self.timestamps[slot] - self.base_monotonic_ns
+
+    def _record(self, slot: int, wall_clock_ms: bool = False) -> Dict:
+        wall_ns = self._wall_clock_ns(slot)
+        return {
+            "user": self.messages[slot],
+            "intent": self.intent_names[self.intents[slot]],
+            "entities": dict(self.entities[slot] or ()),
+            "timestamp": wall_ns // 1_000_000 if wall_clock_ms else datetime.datetime.fromtimestamp(wall_ns / 1e9)
+        }
+
+    def _slots(self, n: int = None):
+        count = self.size if n is None else min(n, self.size)
+        for i in range(self.size - count, self.size):
+            yield (self.start + i) % self.capacity
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self):
+        return (self._record(slot) for slot in self._slots())
+
+    def recent(self, n: int) -> List[Dict]:
+        return [self._record(slot) for slot in self._slots(n)]
+
+    def last_intents(self, n: int) -> List[str]:
+        return [self.intent_names[self.intents[slot]] for slot in self._slots(n)]
+
+    def flush(self):
+        if self.spill_file is not None:
+            self.spill_file.flush()
+
+    def clear(self):
+        self.messages = [None] * self.capacity
+        self.entities = [None] * self.capacity
+        self.start = 0
+        self.size = 0
+
+    def close(self):
+        if self.spill_file is not None:
+            self.spill_file.close()
+            self.spill_file = None
+
+
+class ResponseCache:
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_build(self, key: Tuple, build) -> str:
+        with self.lock:
+            response = self.entries.get(key)
+            if response is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return response
+            self.misses += 1
+
+        response = build()
+        with self.lock:
+            self.entries[key] = response
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return response
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class ListingPager:
+    # Holds a lazy iterator over the listing, so the first page doesn't wait for the whole list
+    # and "show more" continues where the last page stopped instead of recomputing it.
+    def __init__(self, course_codes, total: int, render_item, page_size: int, noun: str, footer: str):
+        self.course_codes = iter(course_codes)
+        self.total = total
+        self.render_item = render_item
+        self.page_size = page_size
+        self.noun = noun
+        self.footer = footer
+        self.shown = 0
+        self.next_code = next(self.course_codes, None)
+
+    def exhausted(self) -> bool:
+        return self.next_code is None
+
+    def page(self) -> Iterator[str]:
+        start = self.shown
+        while self.next_code is not None and self.shown - start < self.page_size:
+            course_code = self.next_code
+            self.next_code = next(self.course_codes, None)
+            self.shown += 1
+            yield self.render_item(course_code)
+        if self.exhausted():
+            yield self.footer
+        else:
+            yield (f"Showing {start + 1}-{self.shown} of {max(self.total, self.shown)} {self.noun}. "
+                   f"Type 'show more' for the next page.\n")
+
 
 class UniversityChatbot:
-    def __init__(self):
-        self.kb = UniversityKnowledgeBase()
-        self.nlp = NLPProcessor(self.kb)
-        self.conversation_history = []
+    PAGE_SIZE = 25
+    MAX_CREDITS = 18
+
+    def __init__(self, knowledge_base: UniversityKnowledgeBase = None, nlp: NLPProcessor = None,
+                 conversation_history: ConversationHistory = None, response_cache: ResponseCache = None,
+                 metrics: ChatMetrics = None, profile_store=None, student_ids: StudentIdAllocator = None):
+        self.kb = knowledge_base if knowledge_base is not None else UniversityKnowledgeBase()
+        self.nlp = nlp if nlp is not None else NLPProcessor(self.kb)
+        self.response_cache = response_cache if response_cache is not None else ResponseCache()
+        self.metrics = metrics
+        self.profile_store = profile_store
+        self.student_ids = student_ids if student_ids is not None else StudentIdAllocator()
+        self.conversation_history = conversation_history if conversation_history is not None else ConversationHistory()
         self.student = StudentProfile()
         self.pending_action = None
         self.pending_course = None
+        self.pending_hold = None
+        self.pending_courses = ()
+        self.pending_holds = []
+        self.promotions = collections.deque()
+        self.listing = None
 
     def generate_response(self, user_input: str) -> str:
+        response = self._respond(user_input)
+        return response if isinstance(response, str) else "".join(response)
+
+    def stream_response(self, user_input: str) -> Iterator[str]:
+        # Listing handlers return generators; everything else arrives as a single chunk.
+        response = self._respond(user_input)
+        if isinstance(response, str):
+            yield response
+        else:
+            yield from response
+
+    def _respond(self, user_input: str):
+        notice = self._apply_promotions() if self.promotions else ""
+        response = self._reply(user_input)
+        if not notice:
+            return response
+        if isinstance(response, str):
+            return notice + response
+        return itertools.chain((notice,), response)
+
+    def _reply(self, user_input: str):
+        if self.metrics is not None and self.metrics.enabled:
+            return self._generate_response_instrumented(user_input)
+
         intent, entities = self.nlp.classify_intent(user_input)
 
-        self.conversation_history.append({
-            "user": user_input,
-            "intent": intent,
-            "entities": entities,
-            "timestamp": datetime.datetime.now()
-        })
+        self.conversation_history.append(user_input, intent, entities)
+        return self._dispatch(user_input, intent, entities)
 
-        if self.pending_action:
-            if intent == "confirm":
-                return self._execute_pending_action()
-            elif intent == "cancel":
-                return self._cancel_pending_action()
-
-        if intent == "login":
-            return self._handle_login(user_input)
-        elif intent == "course_info":
-            return self._handle_course_info(entities)
-        elif intent == "course_schedule":
-            return self._handle_course_schedule(entities)
-        elif intent == "prerequisites":
-            return self._handle_prerequisites(entities)
-        elif intent == "department_info":
-            return self._handle_department_info(entities)
-        elif intent == "registration":
-            return self._handle_registration()
-        elif intent == "register_course":
-            return self._handle_register_course(entities)
-        elif intent == "drop_course":
-            return self._handle_drop_course(entities)
-        elif intent == "my_schedule":
-            return self._handle_my_schedule()
-        elif intent == "available_courses":
-            return self._handle_available_courses()
-        elif intent == "services":
-            return self._handle_services(user_input)
+    def _generate_response_instrumented(self, user_input: str):
+        metrics = self.metrics.thread_metrics()
+        start = time.perf_counter()
+        text, text_lower, match = self.nlp.match_with_fallback(user_input, user_input.lower())
+        classified = time.perf_counter()
+
+        if match:
+            intent, pattern = match
+            entities = self.nlp.extract_entities(text, text_lower)
+            metrics.patterns[(intent, pattern)] += 1
         else:
-            return self._handle_general(user_input)
+            intent, pattern, entities = "general", None, {}
+        extracted = time.perf_counter()
+
+        self.conversation_history.append(user_input, intent, entities)
+        response = self._dispatch(user_input, intent, entities)
+
+        metrics.intents[intent] += 1
+        metrics.record_stage("classify", classified - start)
+        metrics.record_stage("entities", extracted - classified)
+        if isinstance(response, str):
+            self._record_handler_time(metrics, start, extracted)
+            return response
+        return self._timed_stream(response, metrics, start, extracted)
+
+    @staticmethod
+    def _record_handler_time(metrics: ThreadMetrics, start: float, extracted: float):
+        finished = time.perf_counter()
+        metrics.record_stage("handler", finished - extracted)
+        metrics.record_stage("total", finished - start)
+
+    def _timed_stream(self, chunks: Iterator[str], metrics: ThreadMetrics, start: float, extracted: float):
+        # Streamed handlers do their work while being consumed, so they are timed once exhausted.
+        yield from chunks
+        self._record_handler_time(metrics, start, extracted)
+
+    def _dispatch(self, user_input: str, intent: str, entities: Dict) -> str:
+        entry = self.nlp.registry.get(intent)
+        if entry is None:
+            return self._handle_fallback(user_input)
+
+        if entry.needs_auth and not self.student.is_authenticated:
+            return entry.auth_message
+
+        if entry.cacheable:
+            key = entry.cache_key(self, user_input, entities) if entry.cache_key else None
+            response = self._cached(intent, key, lambda k: entry.render(self, k))
+            return entry.personalize(self, response, key) if entry.personalize else response
+
+        return entry.handler(self, user_input, entities)
+
+    def _handle_fallback(self, user_input: str) -> str:
+        if self.metrics is not None and self.metrics.enabled:
+            self.metrics.thread_metrics().fallthroughs += 1
+        return self._handle_general(user_input)
+
+    def _handle_confirm(self, user_input: str) -> str:
+        if self.pending_action:
+            return self._execute_pending_action()
+        return self._handle_fallback(user_input)
+
+    def _handle_cancel(self, user_input: str) -> str:
+        if self.pending_action:
+            return self._cancel_pending_action()
+        return self._handle_fallback(user_input)
+
+    def logout(self):
+        if self.pending_action:
+            self._cancel_pending_action()
+        self._leave_waitlists()
+        self._hand_off_promotions()
+        self.student = StudentProfile()
+
+    def close_session(self):
+        if self.pending_action:
+            self._cancel_pending_action()
+        self._leave_waitlists()
+        self._hand_off_promotions()
+        self.conversation_history.close()
+
+    def _leave_waitlists(self):
+        # With a profile store a promotion is logged and picked up at the next login, so the student
+        # keeps their places; without one nobody would ever learn about the seat.
+        if self.student.is_authenticated and self.profile_store is None:
+            self.kb.seats.waitlist.leave_all(self.student.student_id)
+
+    def _hand_off_promotions(self):
+        # Promotions the session will never apply: the student has left it.
+        while self.promotions:
+            self._hand_off_promotion(*self.promotions.popleft())
+
+    def _hand_off_promotion(self, student_id: str, course_code: str):
+        # With a profile store the seat was logged under the student's ID when it was handed over
+        # and shows up at their next login. Without one nobody would ever learn about it, so it
+        # goes back and on to the next student in line.
+        if self.profile_store is None:
+            self.kb.seats.drop(course_code)
+
+    def _on_waitlist_promoted(self, student_id: str, course_code: str):
+        # Runs on the thread whose drop freed the seat; this session applies it on its next message.
+        if self.profile_store is not None:
+            self.profile_store.log_register(student_id, course_code)
+        self.promotions.append((student_id, course_code))
+
+    def _promotion_blocker(self, course_code: str, courses) -> Optional[str]:
+        # The checks registration makes, run against a snapshot of course codes rather than the live
+        # profile so they can run on the thread that freed the seat.
+        course = self.kb.courses.get(course_code)
+        if course is None:
+            return "it is no longer offered"
+        if course_code in courses:
+            return "you're already registered for it"
+        if self.kb.index.prerequisites.missing(course_code, courses):
+            return "you're missing its prerequisites"
+        credits = course['credits'] + sum(self.kb.courses[code]['credits'] for code in courses if code in self.kb.courses)
+        if credits > self.MAX_CREDITS:
+            return f"it would bring you to {credits} credits (the limit is {self.MAX_CREDITS})"
+        busy = IntervalIndex()
+        for code in courses:
+            busy.add(code, self.kb.index.meeting_times.get(code, ()))
+        clashes = busy.conflicts(self.kb.index.meeting_times.get(course_code, ()))
+        if clashes:
+            return f"it clashes with {', '.join(sorted(clashes))}"
+        return None
 
-    def _handle_login(self, user_input: str) -> str:
+    def _waitlist_eligible(self, student_id: str, course_code: str) -> bool:
+        # Called by the ledger with the course locked. Promotions not yet applied count as registered,
+        # so two of them can't clash with each other.
+        if student_id == self.student.student_id:
+            courses = set(self.student.registered_courses)
+        elif self.profile_store is not None and self.profile_store.profile(student_id) is not None:
+            courses = set(self.profile_store.profile(student_id).courses)
+        else:
+            courses = set()
+        courses.update(code for promoted_id, code in list(self.promotions) if promoted_id == student_id)
+        return self._promotion_blocker(course_code, courses) is None
+
+    def _apply_promotions(self) -> str:
+        notice = ""
+        while self.promotions:
+            student_id, course_code = self.promotions.popleft()
+            if student_id != self.student.student_id:
+                self._hand_off_promotion(student_id, course_code)
+                continue
+            # The student may have registered something since the seat was handed over; if the course
+            # no longer fits, the seat goes back and on to the next student in line.
+            blocker = self._promotion_blocker(course_code, self.student.registered_courses)
+            if blocker:
+                self.kb.seats.drop(course_code)
+                if self.profile_store is not None:
+                    self.profile_store.log_drop(student_id, course_code)
+                notice += f"⚠️ A seat opened up in {course_code}, but {blocker}, so it was passed on.\n\n"
+                continue
+            self.student.register_course(course_code, self.kb.index.meeting_times.get(course_code, ()))
+            notice += f"🎉 A seat opened up in {course_code} and you're now registered for it!\n\n"
+        return notice
+
+    def _handle_login(self, entities: Dict) -> str:
         if self.student.is_authenticated:
             return f"You're already logged in as {self.student.name} (ID: {self.student.student_id})"
 
-        name_match = re.search(r'(my name is|i am) (\w+)', user_input.lower())
-        if name_match:
-            name = name_match.group(2).capitalize()
-            student_id = f"STU{hash(name) % 10000:04d}"
+        if entities.get('name'):
+            name = entities['name'].capitalize()
+            stored = None
+            if self.profile_store is not None:
+                student_id = self.profile_store.student_id_for(name)
+                stored = self.profile_store.profile(student_id) if student_id else None
+            if stored is not None:
+                self.student.authenticate(stored.student_id, stored.name)
+                for course_code in sorted(stored.courses):
+                    self.student.register_course(course_code, self.kb.index.meeting_times.get(course_code, ()))
+                return (f"Welcome back, {stored.name}! You're logged in with ID: {stored.student_id}.\n"
+                        f"You have {len(stored.courses)} registered course(s). Type 'my schedule' to see them.")
+
+            try:
+                student_id = self.student_ids.allocate(name)
+            except ValueError:
+                return "Sorry, I couldn't create a student ID for that name. Please contact the registrar's office."
             self.student.authenticate(student_id, name)
+            if self.profile_store is not None:
+                self.profile_store.log_login(student_id, name)
             return f"Welcome, {name}! You're now logged in with ID: {student_id}.\nYou can now register for courses, view your schedule, and more!"
         else:
             return "Please tell me your name to log in (e.g., 'My name is John' or 'I am Sarah')"
 
+    def _registered_credits(self) -> int:
+        return sum(self.kb.courses[code]['credits'] for code in self.student.registered_courses if code in self.kb.courses)
+
     def _handle_register_course(self, entities: Dict) -> str:
-        if not self.student.is_authenticated:
-            return "Please log in first to register for courses. Just tell me your name!"
+        if len(entities.get('course_codes', ())) > 1:
+            return self._handle_register_courses(entities['course_codes'])
 
         course_code = entities.get('course_code')
         if not course_code or course_code not in self.kb.courses:
@@ -365,41 +2384,140 @@ class UniversityChatbot:
         if course_code in self.student.registered_courses:
             return f"You're already registered for {course_code}!"
 
-        missing_prereqs = []
-        for prereq in course['prerequisites']:
-            if prereq not in self.student.registered_courses:
-                missing_prereqs.append(prereq)
+        position = self.kb.seats.waitlist.position(course_code, self.student.student_id)
+        if position is not None:
+            return f"📋 You're #{position} on the waitlist for {course_code}. You'll be registered automatically when a seat opens."
 
+        missing_prereqs = self.kb.index.prerequisites.missing(course_code, self.student.registered_courses)
         if missing_prereqs:
             return f"❌ Cannot register for {course_code}. Missing prerequisites: {', '.join(missing_prereqs)}"
 
-        if course['enrolled'] >= course['capacity']:
-            return f"❌ {course_code} is full! ({course['enrolled']}/{course['capacity']} enrolled)"
+        clashes = self.student.schedule_conflicts(self.kb.index.meeting_times.get(course_code, ()))
+        if clashes:
+            clash_list = ', '.join(f"{code} ({self.kb.courses[code]['schedule']})" for code in clashes)
+            return f"❌ Cannot register for {course_code} ({course['schedule']}). It clashes with: {clash_list}"
+
+        credits = self._registered_credits() + course['credits']
+        if credits > self.MAX_CREDITS:
+            return f"❌ Cannot register for {course_code}. It would bring you to {credits} credits (the limit is {self.MAX_CREDITS})."
+
+        spots_left = self.kb.seats.available_seats(course_code)
+        hold = self.kb.seats.hold(course_code)
+        if hold is None:
+            if course['enrolled'] < course['capacity']:
+                response = f"❌ The remaining seats in {course_code} are held by students confirming their registration."
+            else:
+                response = f"❌ {course_code} is full! ({course['enrolled']}/{course['capacity']} enrolled)"
+            return response + self._offer_waitlist(course_code)
 
+        self._release_pending_hold()
         self.pending_action = "register"
         self.pending_course = course_code
+        self.pending_hold = hold
 
         response = f"📝 **Registration Confirmation**\n\n"
         response += f"Course: {course_code} - {course['name']}\n"
         response += f"Credits: {course['credits']}\n"
         response += f"Schedule: {course['schedule']}\n"
         response += f"Instructor: {course['instructor']}\n"
-        response += f"Available spots: {course['capacity'] - course['enrolled']}/{course['capacity']}\n\n"
+        response += f"Available spots: {spots_left}/{course['capacity']}\n"
+        response += f"⏳ A seat is held for you for {int(self.kb.seats.hold_seconds // 60)} minutes.\n\n"
         response += "Do you want to register for this course? (Type 'yes' to confirm or 'no' to cancel)"
 
         return response
 
-    def _handle_drop_course(self, entities: Dict) -> str:
-        if not self.student.is_authenticated:
-            return "Please log in first to drop courses. Just tell me your name!"
+    def _offer_waitlist(self, course_code: str) -> str:
+        # Offering would replace the pending action, and with it any seat held for confirmation.
+        if self.pending_action:
+            return (f"\n\nYou still have a pending request for {self._pending_description()}. Confirm or cancel it "
+                    f"first, then ask again to join the waitlist.")
+        self.pending_action = "waitlist"
+        self.pending_course = course_code
+        ahead = self.kb.seats.waitlist.depth(course_code)
+        queue = f"{ahead} student(s) are ahead of you" if ahead else "Nobody is ahead of you"
+        return (f"\n\nWould you like to join the waitlist? {queue}, and you'll be registered automatically "
+                f"when a seat opens. (Type 'yes' to join or 'no' to cancel)")
+
+    def _pending_description(self) -> str:
+        if self.pending_action == "register_many":
+            return ", ".join(self.pending_courses)
+        return self.pending_course
+
+    def _handle_register_courses(self, course_codes: Tuple[str, ...]) -> str:
+        # The whole set is checked up front and held in one ledger transaction, so a full semester
+        # needs a single confirmation instead of one round-trip per course.
+        already = [code for code in course_codes if code in self.student.registered_courses]
+        requested = [code for code in course_codes if code not in self.student.registered_courses]
+        if not requested:
+            return f"You're already registered for {', '.join(already)}!"
+
+        problems = []
+        unknown = [code for code in requested if code not in self.kb.courses]
+        if unknown:
+            problems.append(f"Unknown course code(s): {', '.join(unknown)}")
+        requested = [code for code in requested if code in self.kb.courses]
+
+        # Prerequisites may be satisfied by another course in the same request.
+        planned = self.student.registered_courses | set(requested)
+        batch = IntervalIndex()
+        for code in requested:
+            missing = self.kb.index.prerequisites.missing(code, planned)
+            if missing:
+                problems.append(f"{code} is missing prerequisites: {', '.join(missing)}")
+            meeting_times = self.kb.index.meeting_times.get(code, ())
+            clashes = self.student.schedule_conflicts(meeting_times) + sorted(batch.conflicts(meeting_times))
+            if clashes:
+                problems.append(f"{code} ({self.kb.courses[code]['schedule']}) clashes with: {', '.join(clashes)}")
+            batch.add(code, meeting_times)
+
+        credits = self._registered_credits() + sum(self.kb.courses[code]['credits'] for code in requested)
+        if credits > self.MAX_CREDITS:
+            problems.append(f"Together they would bring you to {credits} credits (the limit is {self.MAX_CREDITS})")
+
+        if problems:
+            response = "❌ **Cannot register for these courses**\n\n"
+            response += "".join(f"• {problem}\n" for problem in problems)
+            return response + "\nNothing was registered. Fix the list and try again."
+
+        holds, full = self.kb.seats.hold_many(requested)
+        if full:
+            response = "❌ **Cannot register for these courses**\n\n"
+            for code in full:
+                course = self.kb.courses[code]
+                if course['enrolled'] < course['capacity']:
+                    response += f"• The remaining seats in {code} are held by students confirming their registration\n"
+                else:
+                    response += f"• {code} is full ({course['enrolled']}/{course['capacity']} enrolled)\n"
+            return response + "\nNothing was registered or held. Try again without those courses."
+
+        self._release_pending_hold()
+        self.pending_action = "register_many"
+        self.pending_courses = tuple(requested)
+        self.pending_holds = holds
+
+        response = f"📝 **Registration Confirmation** ({len(requested)} courses)\n\n"
+        for code in requested:
+            course = self.kb.courses[code]
+            response += f"• **{code}**: {course['name']}\n"
+            response += f"  Credits: {course['credits']} | {course['schedule']} | {course['instructor']}\n"
+        if already:
+            response += f"\nAlready registered, skipped: {', '.join(already)}\n"
+        response += f"\nTotal credits after registration: {credits}\n"
+        response += f"⏳ Seats are held for you for {int(self.kb.seats.hold_seconds // 60)} minutes.\n\n"
+        response += "Do you want to register for all of these courses? (Type 'yes' to confirm or 'no' to cancel)"
+        return response
 
+    def _handle_drop_course(self, entities: Dict) -> str:
         course_code = entities.get('course_code')
         if not course_code:
             return "Please specify which course you want to drop"
 
         if course_code not in self.student.registered_courses:
+            if self.kb.seats.waitlist.leave(course_code, self.student.student_id):
+                return f"✅ You've left the waitlist for {course_code}."
             return f"You're not registered for {course_code}"
 
+        self._release_pending_hold()
         self.pending_action = "drop"
         self.pending_course = course_code
 
@@ -412,55 +2530,87 @@ class UniversityChatbot:
 
         return response
 
-    def _handle_my_schedule(self) -> str:
-        if not self.student.is_authenticated:
-            return "Please log in first to view your schedule. Just tell me your name!"
-
+    def _handle_my_schedule(self):
         if not self.student.registered_courses:
             return "📅 You're not registered for any courses yet.\nUse 'register for [course]' to add courses to your schedule!"
+        return self._stream_my_schedule()
 
-        response = f"📅 **{self.student.name}'s Schedule**\n\n"
+    def _stream_my_schedule(self) -> Iterator[str]:
+        yield f"📅 **{self.student.name}'s Schedule**\n\n"
         total_credits = 0
 
         for course_code in sorted(self.student.registered_courses):
             if course_code in self.kb.courses:
                 course = self.kb.courses[course_code]
-                response += f"• **{course_code}**: {course['name']}\n"
-                response += f"  Credits: {course['credits']} | {course['schedule']}\n"
-                response += f"  Instructor: {course['instructor']} | Room: {course['room']}\n\n"
+                chunk = f"• **{course_code}**: {course['name']}\n"
+                chunk += f"  Credits: {course['credits']} | {course['schedule']}\n"
+                chunk += f"  Instructor: {course['instructor']} | Room: {course['room']}\n\n"
                 total_credits += course['credits']
+                yield chunk
 
-        response += f"**Total Credits: {total_credits}**"
-        return response
+        yield f"**Total Credits: {total_credits}**"
 
-    def _handle_available_courses(self) -> str:
-        response = "📚 **Available Courses**\n\n"
+        waitlisted = self.kb.seats.waitlist.positions(self.student.student_id)
+        if waitlisted:
+            yield "\n\n📋 Waitlisted: " + ", ".join(f"{code} (#{position})" for code, position in sorted(waitlisted.items()))
 
-        for course_code, course in self.kb.courses.items():
-            if course['available'] and course['enrolled'] < course['capacity']:
-                spots_left = course['capacity'] - course['enrolled']
-                response += f"• **{course_code}**: {course['name']}\n"
-                response += f"  Credits: {course['credits']} | Spots left: {spots_left}\n"
-                response += f"  Schedule: {course['schedule']}\n"
-                if course['prerequisites']:
-                    response += f"  Prerequisites: {', '.join(course['prerequisites'])}\n"
-                response += "\n"
+    def _handle_schedule_fit(self, limit: int = 20) -> str:
+        fitting = self.kb.index.open_courses_fitting(self.student.schedule)
+        if not fitting:
+            return "📅 No open courses fit around your current schedule."
 
-        response += "To register for a course, type: 'register for [course code]'"
+        response = f"📅 **Open courses that fit your schedule** ({len(fitting)})\n\n"
+        for course_code in self.kb.index.first_in_catalog_order(fitting, limit):
+            course = self.kb.courses[course_code]
+            response += f"• **{course_code}**: {course['name']} | {course['schedule']}\n"
+        if len(fitting) > limit:
+            response += f"...and {len(fitting) - limit} more.\n"
+        response += "\nTo register for a course, type: 'register for [course code]'"
         return response
 
+    def _handle_available_courses(self) -> Iterator[str]:
+        yield "📚 **Available Courses**\n\n"
+        self.listing = ListingPager(self.kb.index.iter_open_course_codes(), len(self.kb.index.open_courses),
+                                    self._available_course_entry, self.PAGE_SIZE, "open courses",
+                                    "To register for a course, type: 'register for [course code]'")
+        yield from self.listing.page()
+
+    def _available_course_entry(self, course_code: str) -> str:
+        course = self.kb.courses.get(course_code)
+        if course is None:
+            return ""
+        spots_left = course['capacity'] - course['enrolled']
+        entry = f"• **{course_code}**: {course['name']}\n"
+        entry += f"  Credits: {course['credits']} | Spots left: {spots_left}\n"
+        entry += f"  Schedule: {course['schedule']}\n"
+        if course['prerequisites']:
+            entry += f"  Prerequisites: {', '.join(course['prerequisites'])}\n"
+        return entry + "\n"
+
+    def _handle_show_more(self):
+        if self.listing is None or self.listing.exhausted():
+            return "There's nothing more to show. Try 'show available courses' to start a new listing."
+        return self.listing.page()
+
     def _execute_pending_action(self) -> str:
+        if self.pending_action == "register_many":
+            return self._execute_pending_registrations()
         if not self.pending_action or not self.pending_course:
             return "No pending action to execute."
 
         action = self.pending_action
         course_code = self.pending_course
+        hold = self.pending_hold
         self.pending_action = None
         self.pending_course = None
+        self.pending_hold = None
 
         if action == "register":
-            self.student.register_course(course_code)
-            self.kb.courses[course_code]['enrolled'] += 1
+            if not self.kb.seats.commit(hold):
+                return f"❌ Sorry, {course_code} filled up before your registration was confirmed."
+            self.student.register_course(course_code, self.kb.index.meeting_times.get(course_code, ()))
+            if self.profile_store is not None:
+                self.profile_store.log_register(self.student.student_id, course_code)
 
             course = self.kb.courses[course_code]
             response = f"✅ **Registration Successful!**\n\n"
@@ -471,33 +2621,107 @@ class UniversityChatbot:
             response += "Type 'my schedule' to see all your courses!"
             return response
 
+        elif action == "waitlist":
+            position = self.kb.seats.waitlist.join(course_code, self.student.student_id, self._on_waitlist_promoted,
+                                                   self._registered_credits(), self._waitlist_eligible)
+            # A seat may have opened since the course was reported full.
+            self.kb.seats.promote(course_code)
+            notice = self._apply_promotions()
+            if notice:
+                return notice.rstrip()
+            position = self.kb.seats.waitlist.position(course_code, self.student.student_id) or position
+            return f"📋 You're #{position} on the waitlist for {course_code}. You'll be registered automatically when a seat opens."
+
         elif action == "drop":
             self.student.drop_course(course_code)
-            if course_code in self.kb.courses:
-                self.kb.courses[course_code]['enrolled'] -= 1
+            self.kb.seats.drop(course_code)
+            if self.profile_store is not None:
+                self.profile_store.log_drop(self.student.student_id, course_code)
 
             return f"✅ Successfully dropped {course_code} from your schedule."
 
         return "Action completed."
 
+    def _execute_pending_registrations(self) -> str:
+        course_codes = self.pending_courses
+        holds = self.pending_holds
+        self.pending_action = None
+        self.pending_courses = ()
+        self.pending_holds = []
+
+        lost = self.kb.seats.commit_many(holds)
+        if lost:
+            return (f"❌ Sorry, {', '.join(lost)} filled up before your registration was confirmed. "
+                    f"None of the courses were registered.")
+        for course_code in course_codes:
+            self.student.register_course(course_code, self.kb.index.meeting_times.get(course_code, ()))
+        if self.profile_store is not None:
+            self.profile_store.log_register_many(self.student.student_id, course_codes)
+
+        response = f"✅ **Registration Successful!**\n\n"
+        response += f"You're now registered for:\n"
+        for course_code in course_codes:
+            course = self.kb.courses[course_code]
+            response += f"{course_code} - {course['name']} | {course['schedule']} | Room: {course['room']}\n"
+        response += "\nType 'my schedule' to see all your courses!"
+        return response
+
+    def _release_pending_hold(self):
+        if self.pending_hold is not None:
+            self.kb.seats.release(self.pending_hold)
+            self.pending_hold = None
+        if self.pending_holds:
+            self.kb.seats.release_many(self.pending_holds)
+            self.pending_holds = []
+
     def _cancel_pending_action(self) -> str:
         action = self.pending_action
         course_code = self.pending_course
+        course_codes = self.pending_courses
 
+        self._release_pending_hold()
         self.pending_action = None
         self.pending_course = None
+        self.pending_courses = ()
 
         if action == "register":
             return f"❌ Registration for {course_code} cancelled."
+        elif action == "register_many":
+            return f"❌ Registration for {', '.join(course_codes)} cancelled."
+        elif action == "waitlist":
+            return f"❌ Not joining the waitlist for {course_code}."
         elif action == "drop":
             return f"❌ Drop request for {course_code} cancelled."
 
         return "Action cancelled."
 
-    def _handle_course_info(self, entities: Dict) -> str:
+    def _course_info_key(self, entities: Dict) -> Optional[str]:
         course_code = entities.get('course_code')
+        return course_code if course_code in self.kb.courses else None
 
-        if not course_code or course_code not in self.kb.courses:
+    def _personalize_course_info(self, response: str, course_code: Optional[str]) -> str:
+        if course_code and self.student.is_authenticated:
+            if course_code in self.student.registered_courses:
+                response += "\n✅ You're registered for this course!"
+            else:
+                response += f"\nTo register, type: 'register for {course_code}'"
+
+        return response
+
+    def _cached(self, intent: str, key, render) -> str:
+        version = self.kb.version
+        if self.metrics is not None and self.metrics.enabled:
+            return self.response_cache.get_or_build((intent, key, version), lambda: self._timed_render(render, key))
+        return self.response_cache.get_or_build((intent, key, version), lambda: render(key))
+
+    def _timed_render(self, render, key) -> str:
+        start = time.perf_counter()
+        response = render(key)
+        self.metrics.thread_metrics().record_stage("render", time.perf_counter() - start)
+        return response
+
+    def _render_course_info(self, course_code: Optional[str]) -> str:
+        if course_code is None:
             available_courses = ', '.join(self.kb.courses.keys())
             return f"I don't have information about that course. Available courses: {available_courses}"
 
@@ -517,12 +2741,6 @@ class UniversityChatbot:
         else:
             response += "Prerequisites: None\n"
 
-        if self.student.is_authenticated:
-            if course_code in self.student.registered_courses:
-                response += "\n✅ You're registered for this course!"
-            else:
-                response += f"\nTo register, type: 'register for {course_code}'"
-
         return response
 
     def _handle_course_schedule(self, entities: Dict) -> str:
@@ -543,14 +2761,52 @@ class UniversityChatbot:
         course = self.kb.courses[course_code]
         if course['prerequisites']:
             prereqs = ', '.join(course['prerequisites'])
-            return f"📋 Prerequisites for {course_code}: {prereqs}"
+            response = f"📋 Prerequisites for {course_code}: {prereqs}"
+            chain = self.kb.index.prerequisites.chain(course_code)
+            if len(chain) > len(course['prerequisites']) + 1:
+                response += f"\nFull chain: {' → '.join(chain)}"
+            return response
         else:
             return f"📋 {course_code} has no prerequisites."
 
-    def _handle_department_info(self, entities: Dict) -> str:
+    def _handle_prerequisite_chain(self, entities: Dict) -> str:
+        course_code = entities.get('course_code')
+
+        if not course_code or course_code not in self.kb.courses:
+            return "Please specify a valid course code to see its prerequisite chain."
+
+        chain = self.kb.index.prerequisites.chain(course_code)
+        if len(chain) == 1:
+            return f"📋 {course_code} has no prerequisites."
+
+        response = f"🔗 **Prerequisite chain for {course_code}**\n\n"
+        for step, code in enumerate(chain, 1):
+            course = self.kb.courses.get(code)
+            name = f" - {course['name']}" if course else ""
+            done = " ✅" if code in self.student.registered_courses else ""
+            response += f"{step}. {code}{name}{done}\n"
+        return response
+
+    def _handle_eligible_courses(self, limit: int = 20) -> str:
+        eligible = self.kb.index.eligible_courses(self.student.registered_courses)
+        if not eligible:
+            return "📋 There are no more courses you're eligible for right now."
+
+        response = f"🎓 **Courses you're eligible for now** ({len(eligible)})\n\n"
+        for course_code in eligible[:limit]:
+            course = self.kb.courses[course_code]
+            response += f"• **{course_code}**: {course['name']}\n"
+        if len(eligible) > limit:
+            response += f"...and {len(eligible) - limit} more.\n"
+        response += "\nTo register for a course, type: 'register for [course code]'"
+        return response
+
+    def _department_info_key(self, entities: Dict) -> Optional[str]:
         department = entities.get('department')
+        return department if department in self.kb.departments else None
 
-        if not department or department not in self.kb.departments:
+    def _render_department_info(self, department: Optional[str]) -> str:
+        if department is None:
             available_depts = ', '.join([d['name'] for d in self.kb.departments.values()])
             return f"Please specify a valid department. Available departments: {available_depts}"
 
@@ -564,7 +2820,13 @@ class UniversityChatbot:
 
         return response
 
-    def _handle_registration(self) -> str:
+    def _personalize_registration(self, response: str, _) -> str:
+        if not self.student.is_authenticated:
+            response += "\n💡 Start by telling me your name to log in!"
+
+        return response
+
+    def _render_registration(self, _) -> str:
         response = "📅 **Registration Information**\n\n"
         response += "Registration Periods:\n"
         for term, dates in self.kb.general_info['registration_dates'].items():
@@ -576,21 +2838,11 @@ class UniversityChatbot:
         response += "3. Register: 'register for [course code]'\n"
         response += "4. View your schedule: 'my schedule'\n"
 
-        if not self.student.is_authenticated:
-            response += "\n💡 Start by telling me your name to log in!"
-
         return response
 
-    def _handle_services(self, user_input: str) -> str:
+    def _render_services(self, specific_service: Optional[str]) -> str:
         response = "🎓 **University Services**\n\n"
 
-        user_lower = user_input.lower()
-        specific_service = None
-        for service in self.kb.general_info['services']:
-            if service in user_lower:
-                specific_service = service
-                break
-
         if specific_service:
             return f"ℹ️ {specific_service.title()}: {self.kb.general_info['services'][specific_service]}"
         else:
@@ -618,7 +2870,7 @@ class UniversityChatbot:
             help_msg = "I can help you with:\n"
             help_msg += "• Course info: 'Tell me about CS101'\n"
             help_msg += "• Registration: 'Register for MATH101'\n"
-            help_msg += "• Schedule: 'My schedule' or 'When is CS101?'\n"
+            help_msg += "• Schedule: 'My schedule', 'When is CS101?' or 'What courses fit my schedule?'\n"
             help_msg += "• Available courses: 'Show available courses'\n"
             help_msg += "• Drop courses: 'Drop CS101'\n"
             help_msg += "• Department info: 'Computer Science department'\n"
@@ -629,16 +2881,391 @@ class UniversityChatbot:
 
             return help_msg
 
+        matches = self.kb.search_index().search(user_input)
+        if matches:
+            response = "🔎 I couldn't match that to a request, but these look related:\n\n"
+            for match in matches:
+                if match.kind == "course":
+                    course = self.kb.courses[match.value]
+                    response += f"• **{match.value}**: {course['name']} - {course['description']}\n"
+                elif match.kind == "department":
+                    dept_info = self.kb.departments[match.value]
+                    response += f"• **{dept_info['name']} Department**: {dept_info['location']}\n"
+                else:
+                    response += f"• **{match.value.title()}**: {self.kb.general_info['services'][match.value]}\n"
+            response += "\nAsk me about any of these for more details, or type 'help'."
+            return response
+
         return "I'm not sure I understand. You can ask me about courses, registration, schedules, departments, or services. Type 'help' for more information."
 
 
+# Registry callbacks are module-level functions rather than lambdas so registries can be pickled.
+def _course_info_cache_key(bot: 'UniversityChatbot', text: str, entities: Dict):
+    return bot._course_info_key(entities)
+
+
+def _on_course_schedule(bot: 'UniversityChatbot', text: str, entities: Dict):
+    return bot._handle_course_schedule(entities)
+
+
+def _on_prerequisite_chain(bot: 'UniversityChatbot', text: str, entities: Dict):
+    return bot._handle_prerequisite_chain(entities)
+
+
+def _on_prerequisites(bot: 'UniversityChatbot', text: str, entities: Dict):
+    return bot._handle_prerequisites(entities)
+
+
+def _department_info_cache_key(bot: 'UniversityChatbot', text: str, entities: Dict):
+    return bot._department_info_key(entities)
+
+
+def _on_register_course(bot: 'UniversityChatbot', text: str, entities: Dict):
+    return bot._handle_register_course(entities)
+
+
+def _on_drop_course(bot: 'UniversityChatbot', text: str, entities: Dict):
+    return bot._handle_drop_course(entities)
+
+
+def _on_eligible_courses(bot: 'UniversityChatbot', text: str, entities: Dict):
+    return bot._handle_eligible_courses()
+
+
+def _on_schedule_fit(bot: 'UniversityChatbot', text: str, entities: Dict):
+    return bot._handle_schedule_fit()
+
+
+def _on_my_schedule(bot: 'UniversityChatbot', text: str, entities: Dict):
+    return bot._handle_my_schedule()
+
+
+def _on_available_courses(bot: 'UniversityChatbot', text: str, entities: Dict):
+    return bot._handle_available_courses()
+
+
+def _on_show_more(bot: 'UniversityChatbot', text: str, entities: Dict):
+    return bot._handle_show_more()
+
+
+def _on_login(bot: 'UniversityChatbot', text: str, entities: Dict):
+    return bot._handle_login(entities)
+
+
+def _on_confirm(bot: 'UniversityChatbot', text: str, entities: Dict):
+    return bot._handle_confirm(text)
+
+
+def _on_cancel(bot: 'UniversityChatbot', text: str, entities: Dict):
+    return bot._handle_cancel(text)
+
+
+def _services_cache_key(bot: 'UniversityChatbot', text: str, entities: Dict):
+    return entities.get('service')
+
+
+def default_intent_registry() -> IntentRegistry:
+    registry = IntentRegistry()
+
+    registry.register(
+        "course_info",
+        [
+            r"(tell me about|what is|describe) (course )?(\w+\d+)",
+            r"(\w+\d+) (course|class) (info|information|details)",
+            r"(info|information|details) (about|on) (\w+\d+)",
+        ],
+        read_only=True, cacheable=True,
+        cache_key=_course_info_cache_key,
+        render=UniversityChatbot._render_course_info,
+        personalize=UniversityChatbot._personalize_course_info)
+    registry.register(
+        "course_schedule",
+        [
+            r"when (is|does) (\w+\d+) (meet|held|scheduled)",
+            r"(\w+\d+) (schedule|time|timing)",
+            r"what time (is )?(\w+\d+)",
+        ],
+        read_only=True,
+        handler=_on_course_schedule)
+    registry.register(
+        "prerequisite_chain",
+        [
+            r"(full |whole |complete )?(prerequisite |prereq )?(chain|path|tree) (to|for) (\w+\d+)",
+        ],
+        read_only=True,
+        handler=_on_prerequisite_chain)
+    registry.register(
+        "prerequisites",
+        [
+            r"(what are the )?(prerequisites|prereqs) (for )?(\w+\d+)",
+            r"(\w+\d+) (prerequisites|prereqs|requirements)",
+            r"what (do i need|courses needed) (for|before) (\w+\d+)",
+        ],
+        read_only=True,
+        handler=_on_prerequisites)
+    registry.register(
+        "department_info",
+        [
+            r"(tell me about|what is|describe) (the )?(\w+) department",
+            r"(\w+) department (info|information|contact)",
+            r"who (is the head|heads) (of )?(the )?(\w+) department",
+        ],
+        read_only=True, cacheable=True,
+        cache_key=_department_info_cache_key,
+        render=UniversityChatbot._render_department_info)
+    registry.register(
+        "registration",
+        [
+            r"when (is|does) registration (start|begin|open)",
+            r"registration (dates|schedule|period)",
+            r"how (do i|to) register (for courses|for classes)",
+        ],
+        read_only=True, cacheable=True,
+        render=UniversityChatbot._render_registration,
+        personalize=UniversityChatbot._personalize_registration)
+    registry.register(
+        "register_course",
+        [
+            r"register (for|me for) (\w+\d+)",
+            r"enroll (in|me in) (\w+\d+)",
+            r"add (\w+\d+) (to my schedule|to schedule)",
+            r"i want to (register for|take) (\w+\d+)",
+        ],
+        needs_auth=True,
+        auth_message="Please log in first to register for courses. Just tell me your name!",
+        handler=_on_register_course)
+    registry.register(
+        "drop_course",
+        [
+            r"drop (\w+\d+)",
+            r"remove (\w+\d+) (from my schedule)",
+            r"unregister (from )?(\w+\d+)",
+            r"i want to drop (\w+\d+)",
+        ],
+        needs_auth=True,
+        auth_message="Please log in first to drop courses. Just tell me your name!",
+        handler=_on_drop_course)
+    registry.register(
+        "eligible_courses",
+        [
+            r"(what|which) (courses|classes) (am i|i am|i'm) eligible",
+            r"eligible (courses|classes|for now)",
+            r"(what|which) (courses|classes) can i (take|register for) now",
+        ],
+        read_only=True, needs_auth=True,
+        auth_message="Please log in first so I can check which courses you're eligible for. Just tell me your name!",
+        handler=_on_eligible_courses)
+    registry.register(
+        "schedule_fit",
+        [
+            r"(what|which) (courses|classes) (would )?fit",
+            r"fits? (in|into|with|around) my schedule",
+            r"(courses|classes) (that|which) (fit|work with) my schedule",
+        ],
+        read_only=True, needs_auth=True,
+        auth_message="Please log in first so I can check your schedule. Just tell me your name!",
+        handler=_on_schedule_fit)
+    registry.register(
+        "my_schedule",
+        [
+            r"(show|what is|display) my (schedule|courses)",
+            r"what (courses|classes) am i (taking|registered for)",
+            r"my (current )?schedule",
+            r"what (courses|classes) do i have",
+        ],
+        read_only=True, needs_auth=True,
+        auth_message="Please log in first to view your schedule. Just tell me your name!",
+        handler=_on_my_schedule)
+    registry.register(
+        "available_courses",
+        [
+            r"(what|which) courses are available",
+            r"show (me )?available courses",
+            r"list (all )?courses",
+            r"what can i take",
+        ],
+        read_only=True,
+        handler=_on_available_courses)
+    registry.register(
+        "show_more",
+        [
+            r"(show|see|load) more",
+            r"next page",
+        ],
+        read_only=True,
+        handler=_on_show_more)
+    registry.register(
+        "login",
+        [
+            r"login|log in|sign in|authenticate",
+            r"i am (\w+)",
+            r"my name is (\w+)",
+        ],
+        handler=_on_login)
+    registry.register(
+        "confirm",
+        [
+            r"(yes|yeah|yep|confirm|ok|okay|proceed)",
+            r"do it|go ahead",
+        ],
+        handler=_on_confirm)
+    registry.register(
+        "cancel",
+        [
+            r"(no|nope|cancel|abort|stop)",
+            r"never mind|forget it",
+        ],
+        handler=_on_cancel)
+    registry.register(
+        "services",
+        [
+            r"(what|tell me about) (university )?services",
+            r"(library|tutoring|counseling|career) (services|hours|info)",
+            r"where (is|can i find) (the )?(library|tutoring|counseling)",
+        ],
+        read_only=True, cacheable=True,
+        cache_key=_services_cache_key,
+        render=UniversityChatbot._render_services)
+    return registry
+
+
+class TranscriptRenderer:
+    TAGS = {
+        "timestamp": {"foreground": "#74b9ff", "font": ('Consolas', 9)},
+        "user_label": {"foreground": "#00ff88", "font": ('Consolas', 11, 'bold')},
+        "user_message": {"foreground": "#a8e6cf", "font": ('Consolas', 11)},
+        "bot_label": {"foreground": "#e94560", "font": ('Consolas', 11, 'bold')},
+        "bot_message": {"foreground": "#ffeaa7", "font": ('Consolas', 11)},
+    }
+
+    def __init__(self, root, text_widget: 'scrolledtext.ScrolledText', max_lines: int = 2000, page_size: int = 50):
+        self.root = root
+        self.text = text_widget
+        self.max_lines = max_lines
+        self.page_size = page_size
+        self.pending = []
+        self.flush_scheduled = False
+        self.page_in_scheduled = False
+        # Blocks currently in the widget (oldest first) and blocks trimmed off the top of it.
+        self.visible = collections.deque()
+        self.archive = []
+
+        for tag, options in self.TAGS.items():
+            self.text.tag_configure(tag, **options)
+
+        self.scrollbar_set = self.text.vbar.set
+        self.text.config(yscrollcommand=self.on_yscroll)
+
+    @staticmethod
+    def line_count(block: List[Tuple[str, str]]) -> int:
+        return sum(text.count("\n") for text, _ in block)
+
+    def append(self, block: List[Tuple[str, str]]):
+        self.pending.append((block, True))
+        self.schedule_flush()
+
+    def extend(self, segments: List[Tuple[str, str]]):
+        # Grows the newest block in place, e.g. while a streamed reply is still arriving.
+        if self.pending and self.pending[-1][1]:
+            self.pending[-1][0].extend(segments)
+        else:
+            self.pending.append((list(segments), False))
+        self.schedule_flush()
+
+    def widget_lines(self) -> int:
+        return int(self.text.index("end-1c").split(".")[0])
+
+    def at_bottom(self) -> bool:
+        return float(self.text.yview()[1]) >= 1.0
+
+    def schedule_flush(self):
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            self.root.after_idle(self.flush)
+
+    def flush(self):
+        self.flush_scheduled = False
+        if not self.pending:
+            return
+        blocks, self.pending = self.pending, []
+
+        # Only follow new output if the user hasn't scrolled up to read older messages.
+        follow = self.at_bottom()
+        self.text.config(state=tk.NORMAL)
+        for segments, is_new in blocks:
+            for text, tag in segments:
+                self.text.insert(tk.END, text, tag)
+            if is_new or not self.visible:
+                self.visible.append(segments)
+            else:
+                self.visible[-1].extend(segments)
+        self.trim()
+        self.text.config(state=tk.DISABLED)
+        if follow:
+            self.text.see(tk.END)
+
+    def trim(self):
+        # Every block ends with a newline, so the oldest block always spans whole lines from 1.0.
+        # Trimming stops at the newest block so a single long reply is never cut mid-way.
+        lines = self.widget_lines()
+        while lines > self.max_lines and len(self.visible) > 1:
+            block = self.visible.popleft()
+            block_lines = self.line_count(block)
+            self.text.delete("1.0", f"{block_lines + 1}.0")
+            self.archive.append(block)
+            lines -= block_lines
+
+    def on_yscroll(self, first, last):
+        self.scrollbar_set(first, last)
+        if float(first) <= 0.0 and self.archive and not self.page_in_scheduled:
+            self.page_in_scheduled = True
+            self.root.after_idle(self.page_in)
+
+    def page_in(self):
+        self.page_in_scheduled = False
+        room = 2 * self.max_lines - self.widget_lines()
+        if not self.archive or room <= 0:
+            return
+
+        inserted_lines = 0
+        self.text.config(state=tk.NORMAL)
+        for _ in range(min(self.page_size, len(self.archive))):
+            if inserted_lines and inserted_lines + self.line_count(self.archive[-1]) > room:
+                break
+            block = self.archive.pop()
+            for text, tag in reversed(block):
+                self.text.insert("1.0", text, tag)
+            self.visible.appendleft(block)
+            inserted_lines += self.line_count(block)
+        self.text.config(state=tk.DISABLED)
+        self.text.yview(f"{inserted_lines + 1}.0")
+
+    def clear(self):
+        self.pending = []
+        self.visible.clear()
+        self.archive = []
+        self.text.config(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.text.config(state=tk.DISABLED)
+
+
 class ChatbotGUI:
 
-    def __init__(self, root):
+    POLL_INTERVAL_MS = 15
+
+    def __init__(self, root, chatbot: UniversityChatbot = None, typing_delay_ms: int = 0):
         self.root = root
-        self.chatbot = UniversityChatbot()
+        self.chatbot = chatbot if chatbot is not None else UniversityChatbot()
+        self.typing_delay_ms = typing_delay_ms
+        self.response_latency = LatencyHistogram()
+        # A single long-lived worker keeps messages of this session in order.
+        self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chatbot-worker")
+        self.responses = queue.Queue()
+        self.held_chunks = []
+        self.streaming = False
         self.setup_gui()
         self.setup_styles()
+        self.root.after(self.POLL_INTERVAL_MS, self.poll_responses)
 
         welcome_msg = "Hello! I'm your University Helper chatbot. I can assist you with:\n"
         welcome_msg += "• Course registration and information\n"
@@ -701,6 +3328,7 @@ class ChatbotGUI:
         )
         self.chat_display.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), padx=2, pady=2)
         self.chat_display.config(state=tk.DISABLED)
+        self.transcript = TranscriptRenderer(self.root, self.chat_display)
 
         input_frame = ttk.Frame(main_frame, style="Input.TFrame")
         input_frame.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=(0, 15))
@@ -713,6 +3341,8 @@ class ChatbotGUI:
         )
         self.user_input.grid(row=0, column=0, sticky=(tk.W, tk.E), padx=(0, 10))
         self.user_input.bind('<Return>', self.send_message)
+        self.root.bind('<F12>', lambda event: self.display_bot_message(
+            "⏱️ **Response Times**\n\n" + self.response_latency.summary()))
 
         self.send_button = ttk.Button(
             input_frame,
@@ -869,7 +3499,7 @@ class ChatbotGUI:
                 icon='question'
             )
             if result == 'yes':
-                self.chatbot.student = StudentProfile()
+                self.chatbot.logout()
                 self.update_status_display()
                 self.display_bot_message("You've been logged out. Tell me your name to log in again!")
             return
@@ -905,84 +3535,85 @@ class ChatbotGUI:
 
         self.send_button.config(state='disabled')
         self.user_input.config(state='disabled')
+        if self.typing_delay_ms:
+            self.status_label.config(text="🤖 University Bot is typing...")
 
-        threading.Thread(target=self.get_bot_response, args=(message,), daemon=True).start()
-
-    def get_bot_response(self, message: str):
-        time.sleep(0.8)
+        self.worker.submit(self.get_bot_response, message, time.perf_counter())
 
+    def get_bot_response(self, message: str, sent_at: float):
+        # Chunks are queued as they are produced so a long listing starts rendering right away.
         try:
-            response = self.chatbot.generate_response(message)
-
-            self.root.after(0, self.display_bot_response, response)
+            for chunk in self.chatbot.stream_response(message):
+                self.responses.put((chunk, sent_at, False))
         except Exception as e:
-            error_msg = f"Sorry, I encountered an error: {str(e)}"
-            self.root.after(0, self.display_bot_response, error_msg)
+            self.responses.put((f"Sorry, I encountered an error: {str(e)}", sent_at, False))
+        self.responses.put(("", sent_at, True))
 
-    def display_bot_response(self, response: str):
-        self.display_bot_message(response)
+    def poll_responses(self):
+        try:
+            while True:
+                self.held_chunks.append(self.responses.get_nowait())
+        except queue.Empty:
+            pass
+        # Chunks are held back until the typing delay of their message has passed.
+        if self.held_chunks and (time.perf_counter() - self.held_chunks[0][1]) * 1000 >= self.typing_delay_ms:
+            chunks, self.held_chunks = self.held_chunks, []
+            for chunk, sent_at, done in chunks:
+                self.display_bot_chunk(chunk, sent_at, done)
+        self.root.after(self.POLL_INTERVAL_MS, self.poll_responses)
+
+    def display_bot_chunk(self, chunk: str, sent_at: float, done: bool):
+        if not self.streaming:
+            self.streaming = True
+            self.response_latency.record(time.perf_counter() - sent_at)
+            timestamp = datetime.datetime.now().strftime("%H:%M")
+            self.transcript.append([
+                (f"\n[{timestamp}] ", "timestamp"),
+                ("🤖 University Bot: ", "bot_label"),
+                (chunk, "bot_message"),
+            ])
+        elif chunk:
+            self.transcript.extend([(chunk, "bot_message")])
+        if done:
+            self.streaming = False
+            self.transcript.extend([("\n", "bot_message")])
+            self.finish_bot_response()
+
+    def finish_bot_response(self):
         self.update_status_display()
         self.send_button.config(state='normal')
         self.user_input.config(state='normal')
         self.user_input.focus()
 
     def display_user_message(self, message: str):
-        self.chat_display.config(state=tk.NORMAL)
-
         timestamp = datetime.datetime.now().strftime("%H:%M")
 
-        self.chat_display.insert(tk.END, f"\n[{timestamp}] ", "timestamp")
-
         if self.chatbot.student.is_authenticated:
-            self.chat_display.insert(tk.END, f"{self.chatbot.student.name}: ", "user_label")
+            label = f"{self.chatbot.student.name}: "
         else:
-            self.chat_display.insert(tk.END, "You: ", "user_label")
+            label = "You: "
 
-        self.chat_display.insert(tk.END, f"{message}\n", "user_message")
-
-        self.chat_display.config(state=tk.DISABLED)
-        self.chat_display.see(tk.END)
+        self.transcript.append([
+            (f"\n[{timestamp}] ", "timestamp"),
+            (label, "user_label"),
+            (f"{message}\n", "user_message"),
+        ])
 
     def display_bot_message(self, message: str):
-        self.chat_display.config(state=tk.NORMAL)
-
         timestamp = datetime.datetime.now().strftime("%H:%M")
 
-        self.chat_display.insert(tk.END, f"\n[{timestamp}] ", "timestamp")
-        self.chat_display.insert(tk.END, "🤖 University Bot: ", "bot_label")
-        self.chat_display.insert(tk.END, f"{message}\n", "bot_message")
-
-        self.chat_display.tag_configure("timestamp",
-                                        foreground="#74b9ff",
-                                        font=('Consolas', 9))
-
-        self.chat_display.tag_configure("user_label",
-                                        foreground="#00ff88",
-                                        font=('Consolas', 11, 'bold'))
-
-        self.chat_display.tag_configure("user_message",
-                                        foreground="#a8e6cf",
-                                        font=('Consolas', 11))
-
-        self.chat_display.tag_configure("bot_label",
-                                        foreground="#e94560",
-                                        font=('Consolas', 11, 'bold'))
-
-        self.chat_display.tag_configure("bot_message",
-                                        foreground="#ffeaa7",
-                                        font=('Consolas', 11))
-
-        self.chat_display.config(state=tk.DISABLED)
-        self.chat_display.see(tk.END)
+        self.transcript.append([
+            (f"\n[{timestamp}] ", "timestamp"),
+            ("🤖 University Bot: ", "bot_label"),
+            (f"{message}\n", "bot_message"),
+        ])
 
     def clear_chat(self):
         result = messagebox.askyesno("Clear Chat", "Are you sure you want to clear the chat history?")
         if result:
-            self.chat_display.config(state=tk.NORMAL)
-            self.chat_display.delete(1.0, tk.END)
-            self.chat_display.config(state=tk.DISABLED)
+            self.transcript.clear()
 
-            self.chatbot.conversation_history = []
+            self.chatbot.conversation_history.clear()
 
             welcome_msg = "Chat cleared! I'm still here to help with course registration and scheduling."
             if self.chatbot.student.is_authenticated:
@@ -994,8 +3625,45 @@ class ChatbotGUI:
 
 
 def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="University Helper Chatbot")
+    parser.add_argument("--catalog", help="directory with courses.json/courses.csv and related catalog files")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="record per-stage timings and write them on exit (.json for JSON, else Prometheus text)")
+    parser.add_argument("--typing-delay", type=int, default=0, metavar="MS",
+                        help="show a typing indicator and hold each answer back for at least MS milliseconds")
+    parser.add_argument("--profile-store", metavar="FILE",
+                        help="keep student profiles and registrations in this log across restarts")
+    parser.add_argument("--intent-model", metavar="FILE",
+                        help="classify intents with this trained model (see intent_model.py) instead of the regex patterns")
+    args = parser.parse_args()
+    if tk is None:
+        parser.error("the GUI needs Tk, which this Python build doesn't have; use chat_server.py for a headless server")
+
+    kb = None
+    if args.catalog:
+        from catalog_loader import knowledge_base_kwargs, load_catalog
+        catalog, stats = load_catalog(args.catalog)
+        print(f"Loaded {stats.course_count} courses from {stats.source} in {stats.seconds * 1000:.1f} ms")
+        kb = UniversityKnowledgeBase(**knowledge_base_kwargs(catalog))
+    metrics = ChatMetrics() if args.metrics else None
+    profile_store = None
+    if args.profile_store:
+        from profile_store import ProfileStore
+        kb = kb if kb is not None else UniversityKnowledgeBase()
+        profile_store = ProfileStore(args.profile_store)
+        profile_store.restore(kb)
+    nlp = None
+    if args.intent_model:
+        from intent_model import IntentModel
+        kb = kb if kb is not None else UniversityKnowledgeBase()
+        nlp = NLPProcessor(kb, intent_model=IntentModel.load(args.intent_model))
+    chatbot = UniversityChatbot(kb, nlp, metrics=metrics, profile_store=profile_store)
+    threading.Thread(target=chatbot.kb.build_text_indexes, daemon=True).start()
+
     root = tk.Tk()
-    app = ChatbotGUI(root)
+    app = ChatbotGUI(root, chatbot, typing_delay_ms=args.typing_delay)
     root.minsize(800, 650)
 
     root.update_idletasks()
@@ -1013,6 +3681,14 @@ def main():
     except KeyboardInterrupt:
         print("\nChatbot shutting down...")
         root.quit()
+    finally:
+        app.worker.shutdown(wait=False)
+        if app.response_latency.count:
+            print(app.response_latency.summary())
+        if metrics is not None:
+            metrics.write(args.metrics)
+        if profile_store is not None:
+            profile_store.close()
 
 
 if __name__ == "__main__":
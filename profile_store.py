@@ -0,0 +1,193 @@
+import collections
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+
+class StoredProfile:
+    __slots__ = ("student_id", "name", "courses")
+
+    def __init__(self, student_id: str, name: str):
+        self.student_id = student_id
+        self.name = name
+        self.courses = set()
+
+
+class ProfileStore:
+    # Profiles and registrations are kept as an append-only log of JSON lines. A single writer
+    # thread drains whatever has queued up since its last fsync, so a burst of confirmations
+    # from many sessions shares one fsync instead of paying for one each (group commit).
+
+    def __init__(self, path: str, sync_commit: bool = True, commit_interval: float = 0.0, fsync: bool = True):
+        self.path = path
+        self.sync_commit = sync_commit
+        self.commit_interval = commit_interval
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.profiles = {}
+        self.names = {}
+        self.pending = []
+        self.appended_seq = 0
+        self.durable_seq = 0
+        self.commits = 0
+        self.records = 0
+        self.error = None
+        self.closed = False
+
+        self.recover()
+        self.file = open(path, "a", encoding="utf-8")
+        self.writer = threading.Thread(target=self._write_loop, name="profile-wal", daemon=True)
+        self.writer.start()
+
+    def recover(self):
+        if not os.path.exists(self.path):
+            return
+        good_offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn write from a crash can only be the last line; drop it.
+                    break
+                self._apply(record)
+                self.records += 1
+                good_offset += len(line)
+        if good_offset < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(good_offset)
+
+        live = sum(1 + len(profile.courses) for profile in self.profiles.values())
+        if self.records > 2 * live + 1000:
+            self.compact()
+
+    def compact(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for profile in self.profiles.values():
+                f.write(self._encode({"op": "login", "student": profile.student_id, "name": profile.name}))
+                for course_code in sorted(profile.courses):
+                    f.write(self._encode({"op": "register", "student": profile.student_id, "course": course_code}))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.records = sum(1 + len(profile.courses) for profile in self.profiles.values())
+
+    @staticmethod
+    def _encode(record: Dict) -> str:
+        return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+    def _apply(self, record: Dict):
+        op = record.get("op")
+        student_id = record.get("student")
+        if op == "login":
+            if student_id not in self.profiles:
+                self.profiles[student_id] = StoredProfile(student_id, record["name"])
+            self.names[record["name"].lower()] = student_id
+        elif op == "register":
+            self.profiles[student_id].courses.add(record["course"])
+        elif op == "register_many":
+            # One record for the whole set, so a torn write can't leave half of it registered.
+            self.profiles[student_id].courses.update(record["courses"])
+        elif op == "drop":
+            self.profiles[student_id].courses.discard(record["course"])
+
+    def _append(self, record: Dict) -> int:
+        with self.lock:
+            if self.closed:
+                raise ValueError("profile store is closed")
+            self._apply(record)
+            self.pending.append(self._encode(record))
+            self.appended_seq += 1
+            self.records += 1
+            seq = self.appended_seq
+            self.changed.notify_all()
+        if self.sync_commit:
+            self.wait_durable(seq)
+        return seq
+
+    def _write_loop(self):
+        while True:
+            with self.lock:
+                while not self.pending and not self.closed:
+                    self.changed.wait()
+                if not self.pending:
+                    return
+            if self.commit_interval:
+                time.sleep(self.commit_interval)
+            with self.lock:
+                batch, self.pending = self.pending, []
+                seq = self.appended_seq
+            try:
+                self.file.write("".join(batch))
+                self.file.flush()
+                if self.fsync:
+                    os.fsync(self.file.fileno())
+            except OSError as e:
+                with self.lock:
+                    self.error = e
+                    self.changed.notify_all()
+                return
+            with self.lock:
+                self.durable_seq = seq
+                self.commits += 1
+                self.changed.notify_all()
+
+    def wait_durable(self, seq: int):
+        with self.lock:
+            while self.durable_seq < seq and self.error is None:
+                self.changed.wait()
+            if self.durable_seq < seq:
+                raise self.error
+
+    def flush(self):
+        self.wait_durable(self.appended_seq)
+
+    def has_unflushed(self) -> bool:
+        return self.durable_seq < self.appended_seq
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.changed.notify_all()
+        self.writer.join()
+        self.file.close()
+
+    def student_id_for(self, name: str) -> Optional[str]:
+        return self.names.get(name.lower())
+
+    def profile(self, student_id: str) -> Optional[StoredProfile]:
+        return self.profiles.get(student_id)
+
+    def log_login(self, student_id: str, name: str) -> int:
+        return self._append({"op": "login", "student": student_id, "name": name})
+
+    def log_register(self, student_id: str, course_code: str) -> int:
+        return self._append({"op": "register", "student": student_id, "course": course_code})
+
+    def log_register_many(self, student_id: str, course_codes) -> int:
+        return self._append({"op": "register_many", "student": student_id, "courses": list(course_codes)})
+
+    def log_drop(self, student_id: str, course_code: str) -> int:
+        return self._append({"op": "drop", "student": student_id, "course": course_code})
+
+    def enrollment_counts(self) -> Dict[str, int]:
+        counts = collections.Counter()
+        for profile in self.profiles.values():
+            counts.update(profile.courses)
+        return counts
+
+    def restore(self, knowledge_base):
+        # Catalog `enrolled` figures are the baseline; registrations made through the bot are on top.
+        for course_code, count in self.enrollment_counts().items():
+            if course_code in knowledge_base.courses:
+                knowledge_base.update_enrollment(course_code, count)
+
+    def stats(self) -> Dict:
+        return {"profiles": len(self.profiles), "records": self.records, "commits": self.commits,
+                "durable_seq": self.durable_seq, "pending": self.appended_seq - self.durable_seq}
@@ -0,0 +1,29 @@
+from main import NLPProcessor, StudentIdAllocator, UniversityChatbot, UniversityKnowledgeBase
+
+
+def course(name: str, schedule: str, capacity: int = 2, enrolled: int = 0, credits: int = 3, prerequisites=()):
+    return {
+        "name": name, "credits": credits, "prerequisites": list(prerequisites),
+        "description": f"{name} for tests", "schedule": schedule, "instructor": "Dr. Test",
+        "room": "Test Hall 1", "capacity": capacity, "enrolled": enrolled, "available": True,
+    }
+
+
+def knowledge_base(**courses) -> UniversityKnowledgeBase:
+    base = UniversityKnowledgeBase()
+    return UniversityKnowledgeBase(courses=courses, departments=base.departments, general_info=base.general_info,
+                                   department_aliases=base.department_aliases)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def logged_in(kb, name="Ann"):
+    bot = UniversityChatbot(kb, NLPProcessor(kb), student_ids=StudentIdAllocator())
+    bot.generate_response(f"My name is {name}")
+    return bot
@@ -0,0 +1,77 @@
+import threading
+
+from chat_server import SharedSeatLedger
+from main import SeatLedger
+from catalog import Clock, course, knowledge_base, logged_in
+
+
+def semester(**overrides):
+    courses = {"CS101": course("Intro", "MWF 9:00-10:00 AM", capacity=5),
+               "MATH101": course("Calculus", "TTh 9:00-10:00 AM", capacity=5),
+               "ENG101": course("Writing", "MWF 11:00-12:00 PM", capacity=5)}
+    for code, changes in overrides.items():
+        courses[code].update(changes)
+    return knowledge_base(**courses)
+
+
+def test_multi_course_registration_commits_every_course():
+    kb = semester()
+    bot = logged_in(kb)
+    assert bot.generate_response("register for CS101, MATH101 and ENG101").startswith("📝")
+    assert [kb.seats.available_seats(code) for code in ("CS101", "MATH101", "ENG101")] == [4, 4, 4]
+
+    assert bot.generate_response("yes").startswith("✅")
+    assert bot.student.registered_courses == {"CS101", "MATH101", "ENG101"}
+    assert [kb.courses[code]["enrolled"] for code in ("CS101", "MATH101", "ENG101")] == [1, 1, 1]
+
+
+def test_one_full_course_holds_nothing():
+    kb = semester(MATH101={"enrolled": 5})
+    bot = logged_in(kb)
+    reply = bot.generate_response("register for CS101, MATH101 and ENG101")
+    assert "MATH101 is full" in reply and "Nothing was registered or held" in reply
+    assert bot.pending_action is None
+    assert kb.seats.available_seats("CS101") == 5 and kb.seats.available_seats("ENG101") == 5
+
+
+def test_commit_rolls_back_when_one_seat_was_lost():
+    kb = semester(MATH101={"capacity": 1})
+    clock = Clock()
+    kb.seats = SeatLedger(kb, hold_seconds=60, clock=clock)
+    holds, full = kb.seats.hold_many(["CS101", "MATH101", "ENG101"])
+    assert full == [] and len(holds) == 3
+
+    clock.now += 61
+    rival = kb.seats.hold("MATH101")
+    assert rival is not None
+    assert kb.seats.commit_many(holds) == ["MATH101"]
+    assert [kb.courses[code]["enrolled"] for code in ("CS101", "MATH101", "ENG101")] == [0, 0, 0]
+    # The other holds were handed back rather than left to time out.
+    assert kb.seats.available_seats("CS101") == 5 and kb.seats.available_seats("ENG101") == 5
+    assert kb.seats.commit(rival)
+
+
+def test_cancelled_multi_course_request_releases_its_holds():
+    kb = semester()
+    bot = logged_in(kb)
+    bot.generate_response("register for CS101 and MATH101")
+    bot.generate_response("no")
+    assert bot.student.registered_courses == set()
+    assert kb.seats.available_seats("CS101") == 5 and kb.seats.available_seats("MATH101") == 5
+
+
+def test_shared_ledger_takes_a_shared_stripe_once():
+    kb = semester()
+    enrolled, held, _ = SharedSeatLedger.allocate(kb)
+    seats = SharedSeatLedger(kb, enrolled, held, [threading.Lock()])
+    assert len(seats._locks(["CS101", "MATH101", "ENG101"])) == 1
+
+    result = []
+    worker = threading.Thread(target=lambda: result.append(seats.hold_many(["CS101", "MATH101"])), daemon=True)
+    worker.start()
+    worker.join(5)
+    assert not worker.is_alive()
+    holds, full = result[0]
+    assert full == [] and seats.commit_many(holds) == []
+    assert [held[seats.slots[code]] for code in ("CS101", "MATH101")] == [0, 0]
+    assert [enrolled[seats.slots[code]] for code in ("CS101", "MATH101")] == [1, 1]
@@ -0,0 +1,65 @@
+from main import CourseCatalogIndex, IntervalIndex, UniversityKnowledgeBase, parse_schedule
+from catalog import course
+
+
+def lookups(index: CourseCatalogIndex):
+    return {
+        "department": index.by_department, "instructor": index.by_instructor, "room": index.by_room,
+        "credits": index.by_credits, "open": index.open_courses, "unlocks": index.unlocks,
+        "meeting_times": index.meeting_times, "by_meeting_times": index.by_meeting_times,
+        "prerequisites": {code: index.prerequisites.missing(code, ()) for code in index.course_keys},
+    }
+
+
+def assert_matches_fresh_index(kb):
+    assert lookups(kb.index) == lookups(CourseCatalogIndex(kb))
+
+
+def test_update_course_moves_it_between_lookups():
+    kb = UniversityKnowledgeBase()
+    kb.update_course("CS301", instructor="Dr. Hopper", room="Tech Building 101", credits=4,
+                     prerequisites=["MATH101"], schedule="TTh 2:00-3:30 PM")
+
+    assert kb.index.courses_by_instructor("dr. miller") == []
+    assert kb.index.courses_by_instructor("Dr. Hopper") == ["CS301"]
+    assert kb.index.courses_in_room("tech building 101") == ["CS101", "CS301"]
+    assert "CS301" in kb.index.courses_with_credits(4) and "CS301" not in kb.index.courses_with_credits(3)
+    assert kb.index.unlocked_by("CS201") == [] and kb.index.unlocked_by("MATH101") == ["PHY201", "CS301"]
+    assert kb.index.courses_meeting_during(parse_schedule("TTh 3:00-4:00 PM")) == ["CS201", "CS301"]
+    assert_matches_fresh_index(kb)
+
+
+def test_update_enrollment_tracks_open_seats():
+    kb = UniversityKnowledgeBase()
+    kb.update_enrollment("ENG101", 2)
+    assert "ENG101" not in kb.index.open_course_codes()
+    kb.update_enrollment("ENG101", -1)
+    assert kb.index.open_course_codes() == list(kb.courses)
+    assert_matches_fresh_index(kb)
+
+
+def test_added_and_removed_courses_keep_catalog_order():
+    kb = UniversityKnowledgeBase()
+    kb.add_course("CS401", dict(course("Compilers", "MW 3:00-4:30 PM", prerequisites=["CS301"]),
+                                instructor="Dr. Miller"))
+    kb.remove_course("CS201")
+
+    assert kb.index.courses_by_instructor("Dr. Miller") == ["CS301", "CS401"]
+    assert kb.index.unlocked_by("CS301") == ["CS401"]
+    assert kb.index.courses_in_department("computer_science") == ["CS101", "CS301", "CS401"]
+    fitting = kb.index.open_courses_fitting(IntervalIndex())
+    assert "CS401" in fitting and "CS201" not in fitting
+    assert_matches_fresh_index(kb)
+
+
+def test_add_department_is_recognised_and_groups_its_courses():
+    kb = UniversityKnowledgeBase()
+    kb.add_course("ART100", course("Drawing", "F 9:00-11:00 AM"))
+    assert kb.index.department_of("ART100") is None
+
+    kb.add_department("fine_arts", {"name": "Department of Fine Arts", "head": "Dr. Kahlo",
+                                    "location": "Studio Hall", "popular_courses": ["ART100"]})
+    assert kb.index.department_of("ART100") == "fine_arts"
+    assert kb.index.courses_in_department("fine_arts") == ["ART100"]
+    assert kb.index.department_for_text("tell me about the fine arts department") == "fine_arts"
+    assert_matches_fresh_index(kb)
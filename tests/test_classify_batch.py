@@ -0,0 +1,36 @@
+import multiprocessing
+
+from catalog import course, logged_in
+from main import NLPProcessor, UniversityKnowledgeBase, default_intent_registry
+
+MESSAGES = [
+    "Tell me about CS101", "register for CS101 and MATH101", "when does PHY201 meet",
+    "tell me about the computer science department", "my name is Ann", "library hours", "hello",
+]
+
+
+def test_classify_batch_with_spawned_workers_matches_serial():
+    nlp = NLPProcessor(UniversityKnowledgeBase())
+    texts = [f"{message} {i}" for i in range(30) for message in MESSAGES]
+    parallel = nlp.classify_batch(texts, processes=2, chunk_size=50, mp_context=multiprocessing.get_context("spawn"))
+    assert parallel == nlp.classify_batch(texts)
+    assert parallel[1] == ("register_course", {"course_code": "CS101", "course_codes": ("CS101", "MATH101"),
+                                               "department": "computer_science"})
+
+
+def test_spawned_workers_get_live_catalog_edits_and_custom_intents():
+    # Seat locks, built text indexes and a lambda handler would all fail to pickle if they reached the pool.
+    kb = UniversityKnowledgeBase()
+    kb.add_course("AST101", course("Introductory Astronomy", "MWF 9:00-9:50"))
+    kb.build_text_indexes()
+    logged_in(kb)
+    registry = default_intent_registry()
+    registry.register("stargazing", [r"\bstargazing\b"], lambda bot, text, entities: "Clear skies!", before="course_info")
+    nlp = NLPProcessor(kb, registry)
+    texts = [f"{message} {i}" for i in range(20) for message in MESSAGES + ["stargazing night", "tell me about AST101"]]
+
+    spawn = multiprocessing.get_context("spawn")
+    parallel = nlp.classify_batch(texts, processes=2, chunk_size=60, mp_context=spawn)
+    assert parallel == nlp.classify_batch(texts)
+    assert parallel[len(MESSAGES)][0] == "stargazing"
+    assert parallel[len(MESSAGES) + 1][1]["course_code"] == "AST101"
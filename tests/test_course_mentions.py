@@ -0,0 +1,29 @@
+import pytest
+
+from main import NLPProcessor, UniversityKnowledgeBase
+
+
+@pytest.fixture(scope="module")
+def nlp():
+    return NLPProcessor(UniversityKnowledgeBase())
+
+
+@pytest.mark.parametrize("text, intent, course_code", [
+    ("tell me about calculus", "course_info", "MATH101"),
+    ("what are the prerequisites for data structures", "prerequisites", "CS201"),
+    ("register for cs 201", "register_course", "CS201"),
+])
+def test_course_mention_fills_the_course_slot(nlp, text, intent, course_code):
+    assert nlp.classify_intent(text) == (intent, {"course_code": course_code,
+                                                  "department": nlp.kb.index.department_of(course_code)})
+
+
+@pytest.mark.parametrize("text", [
+    "tell me about the computer science department",
+    "who is the head of the physics department",
+    "what are the library hours",
+])
+def test_non_course_phrase_is_left_alone(nlp, text):
+    rewritten, _, _ = nlp.match_with_fallback(text, text.lower())
+    assert rewritten == text
+    assert "course_code" not in nlp.classify_intent(text)[1]
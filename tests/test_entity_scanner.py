@@ -0,0 +1,63 @@
+import random
+import re
+
+import pytest
+
+from main import EntityScanner, UniversityKnowledgeBase
+
+
+@pytest.fixture(scope="module")
+def kb():
+    return UniversityKnowledgeBase()
+
+
+def reference_scan(kb, text_lower):
+    # Every mention found the slow way: one search per code, phrase and introduction.
+    codes = list(dict.fromkeys(code.upper() for code in re.findall(EntityScanner.COURSE_CODE, text_lower)))
+    ranked = sorted(rank for phrase, ranks in kb.index.department_ranks.items() if phrase in text_lower
+                    for rank in ranks)
+    departments = list(dict.fromkeys(dept_key for _, dept_key in ranked))
+    services = sorted((service for service in kb.index.service_ranks if service in text_lower),
+                      key=kb.index.service_ranks.__getitem__)
+    introductions = [(text_lower.find(f"{intro} "), intro) for intro in EntityScanner.NAME_INTRODUCTIONS]
+    name = None
+    for position, intro in sorted(found for found in introductions if found[0] >= 0):
+        match = re.match(r"\w+", text_lower[position + len(intro) + 1:])
+        if match:
+            name = match.group(0)
+            break
+    return codes, departments, services, name
+
+
+def test_every_mention_is_returned(kb):
+    mentions = kb.index.entity_scanner.scan("can i swap cs101 for math101, eng101 or cs101 again?")
+    assert mentions.course_codes == ["CS101", "MATH101", "ENG101"]
+    assert mentions.entities()["course_codes"] == ("CS101", "MATH101", "ENG101")
+
+    mentions = kb.index.entity_scanner.scan("is the physics or the computer science department near the library "
+                                            "and career services?")
+    assert mentions.departments == ["computer_science", "physics"]
+    assert mentions.services == ["library", "career"]
+
+
+def test_single_mention_keeps_single_value_keys(kb):
+    assert kb.index.entity_scanner.scan("drop cs201").entities() == {"course_code": "CS201",
+                                                                     "department": "computer_science"}
+    assert kb.index.entity_scanner.scan("hello there").entities() == {}
+
+
+def test_name_follows_the_first_introduction(kb):
+    assert kb.index.entity_scanner.scan("hi, my name is ada and i am new").name == "ada"
+    assert kb.index.entity_scanner.scan("i'm grace").name == "grace"
+    assert kb.index.entity_scanner.scan("my name is").name is None
+
+
+def test_scanner_agrees_with_separate_searches(kb):
+    words = ["cs101", "math101", "eng", "english", "comp sci", "physics", "library", "tutoring", "my name is",
+             "i am", "call me", "phys201", "bob", "department", "and", "services", "computer science", "mathematics"]
+    rng = random.Random(11)
+    for _ in range(1000):
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(1, 8)))
+        mentions = kb.index.entity_scanner.scan(text)
+        assert (mentions.course_codes, mentions.departments, mentions.services, mentions.name) == \
+            reference_scan(kb, text), text
@@ -0,0 +1,16 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS = sorted(name[:-3] for name in os.listdir(os.path.join(ROOT, "benchmarks")) if name.endswith(".py"))
+
+@pytest.mark.parametrize("module", ["main", "chat_server", "catalog_loader"] + BENCHMARKS)
+def test_imports_without_tk(module):
+    # A None entry in sys.modules makes `import tkinter` fail as it does on a build without Tk.
+    code = f"import sys; sys.modules['tkinter'] = None; import {module}"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, os.path.join(ROOT, "benchmarks")]))
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
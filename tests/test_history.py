@@ -0,0 +1,16 @@
+from main import ConversationHistory
+
+
+def test_entity_interning_is_bounded(monkeypatch):
+    monkeypatch.setattr(ConversationHistory, "ENTITY_INTERN_LIMIT", 3)
+    monkeypatch.setattr(ConversationHistory, "entity_tuples", type(ConversationHistory.entity_tuples)())
+    history = ConversationHistory(capacity=10)
+    history.append("register for CS101", "register_course", {"course_code": "CS101"})
+    for number in range(5):
+        history.append(f"my name is student{number}", "login", {"name": f"Student{number}"})
+    history.append("register for CS101", "register_course", {"course_code": "CS101"})
+    history.append("register for CS101", "register_course", {"course_code": "CS101"})
+
+    assert len(ConversationHistory.entity_tuples) == 3
+    assert history.entities[6] is history.entities[7]
+    assert [record["entities"] for record in history.recent(2)] == [{"course_code": "CS101"}] * 2
@@ -0,0 +1,132 @@
+import random
+import re
+
+import pytest
+
+from main import IntentClassifier, default_intent_registry
+
+# The pattern table as it stood before the classifier was precompiled and prefiltered.
+BASELINE_PATTERNS = {
+    "course_info": [
+        r"(tell me about|what is|describe) (course )?(\w+\d+)",
+        r"(\w+\d+) (course|class) (info|information|details)",
+        r"(info|information|details) (about|on) (\w+\d+)"
+    ],
+    "course_schedule": [
+        r"when (is|does) (\w+\d+) (meet|held|scheduled)",
+        r"(\w+\d+) (schedule|time|timing)",
+        r"what time (is )?(\w+\d+)"
+    ],
+    "prerequisites": [
+        r"(what are the )?(prerequisites|prereqs) (for )?(\w+\d+)",
+        r"(\w+\d+) (prerequisites|prereqs|requirements)",
+        r"what (do i need|courses needed) (for|before) (\w+\d+)"
+    ],
+    "department_info": [
+        r"(tell me about|what is|describe) (the )?(\w+) department",
+        r"(\w+) department (info|information|contact)",
+        r"who (is the head|heads) (of )?(the )?(\w+) department"
+    ],
+    "registration": [
+        r"when (is|does) registration (start|begin|open)",
+        r"registration (dates|schedule|period)",
+        r"how (do i|to) register (for courses|for classes)"
+    ],
+    "register_course": [
+        r"register (for|me for) (\w+\d+)",
+        r"enroll (in|me in) (\w+\d+)",
+        r"add (\w+\d+) (to my schedule|to schedule)",
+        r"i want to (register for|take) (\w+\d+)"
+    ],
+    "drop_course": [
+        r"drop (\w+\d+)",
+        r"remove (\w+\d+) (from my schedule)",
+        r"unregister (from )?(\w+\d+)",
+        r"i want to drop (\w+\d+)"
+    ],
+    "my_schedule": [
+        r"(show|what is|display) my (schedule|courses)",
+        r"what (courses|classes) am i (taking|registered for)",
+        r"my (current )?schedule",
+        r"what (courses|classes) do i have"
+    ],
+    "available_courses": [
+        r"(what|which) courses are available",
+        r"show (me )?available courses",
+        r"list (all )?courses",
+        r"what can i take"
+    ],
+    "login": [
+        r"login|log in|sign in|authenticate",
+        r"i am (\w+)",
+        r"my name is (\w+)"
+    ],
+    "confirm": [
+        r"(yes|yeah|yep|confirm|ok|okay|proceed)",
+        r"do it|go ahead"
+    ],
+    "cancel": [
+        r"(no|nope|cancel|abort|stop)",
+        r"never mind|forget it"
+    ],
+    "services": [
+        r"(what|tell me about) (university )?services",
+        r"(library|tutoring|counseling|career) (services|hours|info)",
+        r"where (is|can i find) (the )?(library|tutoring|counseling)"
+    ]
+}
+
+CORPUS = [
+    "tell me about cs101", "what is math201", "describe course eng101", "cs201 course details",
+    "info about phy201", "when does cs101 meet", "cs101 schedule", "what time is math101",
+    "what are the prerequisites for cs301", "prereqs cs201", "cs301 requirements", "what do i need for cs301",
+    "tell me about the mathematics department", "physics department contact", "who heads the english department",
+    "when does registration open", "registration dates", "how do i register for courses",
+    "register for cs101", "please enroll me in math101", "add eng101 to my schedule", "i want to take phy201",
+    "drop cs101", "remove math101 from my schedule", "unregister from cs201", "i want to drop eng101",
+    "show my schedule", "what classes am i taking", "my current schedule", "what courses do i have",
+    "which courses are available", "show me available courses", "list all courses", "what can i take",
+    "log in", "i am bob", "my name is alice", "yes", "okay then", "go ahead", "no thanks", "never mind",
+    "what services", "tell me about university services", "library hours", "where can i find the tutoring",
+    "hello", "help", "thanks", "", "blah blah", "cs", "I AM SHOUTING", "knowledge", "nothing to see here",
+    "stop it", "notify me", "drop everything", "what is the meaning of life", "registration", "schedule",
+]
+
+
+def linear_match(patterns, text_lower):
+    for intent, intent_patterns in patterns.items():
+        for pattern in intent_patterns:
+            if re.search(pattern, text_lower):
+                return intent, pattern
+    return None
+
+
+def random_corpus(patterns, count=2000, seed=7):
+    words = sorted({word for intent_patterns in patterns.values() for pattern in intent_patterns
+                    for word in re.findall(r"[a-z]+", pattern)} | {"cs101", "math201", "bob", "the", "x"})
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(words) for _ in range(rng.randint(1, 6))) for _ in range(count)]
+
+
+@pytest.mark.parametrize("text", CORPUS)
+def test_prefilter_matches_the_linear_loop_on_the_baseline_table(text):
+    assert IntentClassifier(BASELINE_PATTERNS).match(text.lower()) == linear_match(BASELINE_PATTERNS, text.lower())
+
+
+@pytest.mark.parametrize("patterns", [BASELINE_PATTERNS, default_intent_registry().intent_patterns()],
+                         ids=["baseline", "current"])
+def test_prefilter_matches_the_linear_loop_on_random_messages(patterns):
+    classifier = IntentClassifier(patterns)
+    for text in CORPUS + random_corpus(patterns):
+        assert classifier.match(text.lower()) == linear_match(patterns, text.lower()), text
+
+
+def test_current_table_only_differs_from_baseline_through_new_intents():
+    current = default_intent_registry().intent_patterns()
+    new_intents = set(current) - set(BASELINE_PATTERNS)
+    classifier = IntentClassifier(current)
+    for text in CORPUS + random_corpus(BASELINE_PATTERNS):
+        baseline = linear_match(BASELINE_PATTERNS, text.lower())
+        match = classifier.match(text.lower())
+        if match is None or match[0] not in new_intents:
+            assert (match and match[0]) == (baseline and baseline[0]), text
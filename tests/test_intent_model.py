@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from intent_model import IntentModel, read_utterances, train
+from main import NLPProcessor, UniversityKnowledgeBase
+
+UTTERANCES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data",
+                          "intent_utterances.tsv")
+MESSAGES = ["tell me about cs101", "register me for math 101", "yes please", "nope", "", "what's on my schedule",
+            "library hours?", "blah blah blah", "prereqs for phy201", "i am zoe"]
+
+
+@pytest.fixture(scope="module")
+def examples():
+    return read_utterances(UTTERANCES)
+
+
+@pytest.fixture(scope="module")
+def model(examples):
+    return train(examples, epochs=10)
+
+
+def test_save_and_load_round_trip(model, tmp_path):
+    path = str(tmp_path / "model.json")
+    model.save(path)
+    loaded = IntentModel.load(path)
+    assert (loaded.labels, loaded.feature_bits, loaded.min_confidence) == (model.labels, model.feature_bits,
+                                                                           model.min_confidence)
+    for text in MESSAGES:
+        (label, confidence), (loaded_label, loaded_confidence) = model.predict(text), loaded.predict(text)
+        assert loaded_label == label
+        assert loaded_confidence == pytest.approx(confidence, abs=1e-4)
+    assert IntentModel.load(path, min_confidence=0.9).min_confidence == 0.9
+
+
+def test_predict_batch_agrees_with_predict(model, examples):
+    texts = MESSAGES + [text.lower() for text, _ in examples]
+    batch = model.predict_batch(texts)
+    assert len(batch) == len(texts)
+    for text, (label, confidence) in zip(texts, batch):
+        single_label, single_confidence = model.predict(text)
+        assert label == single_label, text
+        assert confidence == pytest.approx(single_confidence, abs=1e-5)
+    assert model.predict_batch([]) == []
+
+
+def test_model_fits_its_training_data(model, examples):
+    predictions = model.predict_batch([text.lower() for text, _ in examples])
+    correct = sum(label == intent for (_, intent), (label, _) in zip(examples, predictions))
+    assert correct / len(examples) > 0.9
+
+
+def test_model_drives_the_nlp_processor(model):
+    nlp = NLPProcessor(UniversityKnowledgeBase(), intent_model=model)
+    assert nlp.classify_intent("tell me about CS101")[0] == "course_info"
+    assert nlp.classify_intent("register me for CS201") == ("register_course", {"course_code": "CS201",
+                                                                                 "department": "computer_science"})
+
+
+def test_malformed_input_is_rejected(tmp_path):
+    path = tmp_path / "utterances.tsv"
+    path.write_text("# comment\n\ncourse_info\ttell me about cs101\nmissing a tab\n", encoding="utf-8")
+    with pytest.raises(ValueError, match=":4:"):
+        read_utterances(str(path))
+    with pytest.raises(ValueError):
+        IntentModel(["a", "b"], [0.0, 0.0], {1: [0.5]})
@@ -0,0 +1,64 @@
+import pytest
+
+from main import IntentRegistry, NLPProcessor, UniversityChatbot, UniversityKnowledgeBase, default_intent_registry
+
+
+def reply(name):
+    return lambda bot, text, entities: name
+
+
+def test_before_inserts_ahead_and_moves_existing_intents():
+    registry = IntentRegistry()
+    for name in ("a", "b", "c"):
+        registry.register(name, [name], reply(name))
+    registry.register("d", ["d"], reply("d"), before="b")
+    assert list(registry.handlers) == ["a", "d", "b", "c"]
+
+    version = registry.version
+    registry.register("c", ["c"], reply("c"), before="a")
+    assert list(registry.handlers) == ["c", "a", "d", "b"]
+    assert registry.version == version + 1
+
+    with pytest.raises(KeyError):
+        registry.register("e", ["e"], reply("e"), before="missing")
+    registry.unregister("d")
+    assert list(registry.handlers) == ["c", "a", "b"]
+
+
+def test_earlier_intent_wins_an_overlapping_message():
+    kb = UniversityKnowledgeBase()
+    registry = default_intent_registry()
+
+    @registry.intent("course_review", [r"tell me about (\w+\d+) reviews"], read_only=True, before="course_info")
+    def course_review(bot, text, entities):
+        return f"Reviews for {entities['course_code']}"
+
+    bot = UniversityChatbot(kb, NLPProcessor(kb, registry))
+    assert bot.generate_response("tell me about cs101 reviews") == "Reviews for CS101"
+    assert bot.generate_response("tell me about cs101").startswith("📚")
+
+
+def test_intents_that_need_a_login_are_gated():
+    kb = UniversityKnowledgeBase()
+    registry = default_intent_registry()
+    calls = []
+    registry.register("transcript", [r"my transcript"], lambda bot, text, entities: calls.append(text) or "Transcript",
+                      read_only=True, needs_auth=True, auth_message="Log in to see your transcript.")
+    bot = UniversityChatbot(kb, NLPProcessor(kb, registry))
+
+    assert bot.generate_response("show my transcript") == "Log in to see your transcript."
+    assert bot.generate_response("show my schedule").startswith("Please log in first")
+    assert calls == []
+    bot.generate_response("My name is Ann")
+    assert bot.generate_response("show my transcript") == "Transcript"
+    assert calls == ["show my transcript"]
+
+
+def test_inconsistent_metadata_is_rejected():
+    registry = IntentRegistry()
+    with pytest.raises(ValueError):
+        registry.register("x", ["x"], reply("x"), cacheable=True, render=lambda bot, key: "x")
+    with pytest.raises(ValueError):
+        registry.register("x", ["x"], read_only=True, cacheable=True)
+    with pytest.raises(ValueError):
+        registry.register("x", ["x"])
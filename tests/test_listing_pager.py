@@ -0,0 +1,50 @@
+from main import ListingPager, UniversityChatbot
+from catalog import course, knowledge_base
+
+
+def pager(count, page_size=3):
+    codes = [f"C{i}" for i in range(count)]
+    return ListingPager(codes, count, lambda code: f"{code}\n", page_size, "courses", "Done.\n")
+
+
+def test_pages_continue_where_the_last_one_stopped():
+    listing = pager(7)
+    assert list(listing.page()) == ["C0\n", "C1\n", "C2\n",
+                                    "Showing 1-3 of 7 courses. Type 'show more' for the next page.\n"]
+    assert list(listing.page()) == ["C3\n", "C4\n", "C5\n",
+                                    "Showing 4-6 of 7 courses. Type 'show more' for the next page.\n"]
+    assert not listing.exhausted()
+    assert list(listing.page()) == ["C6\n", "Done.\n"]
+    assert listing.exhausted()
+
+
+def test_exact_multiple_of_the_page_size_ends_with_the_footer():
+    listing = pager(3)
+    assert list(listing.page())[-1] == "Done.\n"
+    assert listing.exhausted()
+    assert list(pager(0).page()) == ["Done.\n"]
+
+
+def test_listing_is_consumed_lazily():
+    consumed = []
+
+    def codes():
+        for i in range(100):
+            consumed.append(i)
+            yield f"C{i}"
+
+    listing = ListingPager(codes(), 100, lambda code: code, 5, "courses", "")
+    list(listing.page())
+    assert len(consumed) == 6
+
+
+def test_show_more_past_the_end():
+    kb = knowledge_base(**{f"ART{100 + i}": course(f"Art {i}", "F 9:00-10:00 AM") for i in range(30)})
+    bot = UniversityChatbot(kb)
+    assert "There's nothing more to show" in bot.generate_response("show more")
+
+    first = bot.generate_response("show available courses")
+    assert "ART124" in first and "ART125" not in first and "Showing 1-25 of 30" in first
+    second = bot.generate_response("show more")
+    assert "ART125" in second and "ART129" in second and "register for [course code]" in second
+    assert "There's nothing more to show" in bot.generate_response("show more")
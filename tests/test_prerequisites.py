@@ -0,0 +1,23 @@
+import pytest
+
+from main import PrerequisiteGraph
+
+
+def graph(prerequisites):
+    prerequisite_graph = PrerequisiteGraph()
+    for course_code, prereqs in prerequisites.items():
+        prerequisite_graph.set_prerequisites(course_code, prereqs)
+    return prerequisite_graph
+
+
+def test_validate_accepts_duplicate_prerequisites():
+    prerequisite_graph = graph({"CS101": [], "CS201": ["CS101", "CS101"], "CS301": ["CS201", "CS101", "CS201"]})
+    prerequisite_graph.validate()
+    assert prerequisite_graph.prerequisites["CS201"] == ("CS101",)
+    assert prerequisite_graph.missing("CS301", set()) == ["CS101", "CS201"]
+
+
+def test_validate_reports_real_cycle():
+    prerequisite_graph = graph({"CS101": ["CS301"], "CS201": ["CS101"], "CS301": ["CS201"], "MATH101": []})
+    with pytest.raises(ValueError, match="CS101, CS201, CS301"):
+        prerequisite_graph.validate()
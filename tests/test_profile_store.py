@@ -0,0 +1,67 @@
+import json
+
+from catalog import course, knowledge_base
+from profile_store import ProfileStore
+
+
+def store(path, **options):
+    return ProfileStore(str(path), fsync=False, **options)
+
+
+def test_log_survives_a_restart(tmp_path):
+    path = tmp_path / "profiles.log"
+    profiles = store(path)
+    profiles.log_login("STU1", "Ann")
+    profiles.log_register("STU1", "CS101")
+    profiles.log_register_many("STU1", ["MATH101", "PHYS101"])
+    profiles.log_drop("STU1", "PHYS101")
+    profiles.close()
+
+    reopened = store(path)
+    assert reopened.student_id_for("ann") == "STU1"
+    assert reopened.profile("STU1").courses == {"CS101", "MATH101"}
+    assert reopened.records == 4
+    reopened.close()
+
+
+def test_torn_last_line_is_dropped_and_truncated(tmp_path):
+    path = tmp_path / "profiles.log"
+    profiles = store(path)
+    profiles.log_login("STU1", "Ann")
+    profiles.log_register("STU1", "CS101")
+    profiles.close()
+    intact = path.read_bytes()
+    with open(path, "ab") as f:
+        f.write(b'{"op":"register_many","student":"STU1","cour')
+
+    reopened = store(path)
+    assert reopened.profile("STU1").courses == {"CS101"}
+    assert path.read_bytes() == intact
+    reopened.log_register("STU1", "MATH101")
+    reopened.close()
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["op"] for line in lines] == ["login", "register", "register"]
+    recovered = store(path)
+    assert recovered.profile("STU1").courses == {"CS101", "MATH101"}
+    recovered.close()
+
+
+def test_restore_adds_logged_registrations_to_the_catalog(tmp_path):
+    path = tmp_path / "profiles.log"
+    profiles = store(path)
+    profiles.log_login("STU1", "Ann")
+    profiles.log_login("STU2", "Bob")
+    profiles.log_register_many("STU1", ["CS101", "MATH101"])
+    profiles.log_register("STU2", "CS101")
+    profiles.log_register("STU2", "GONE101")
+    profiles.close()
+
+    kb = knowledge_base(CS101=course("Intro", "MWF 9:00-10:00 AM", capacity=5, enrolled=1),
+                        MATH101=course("Calculus", "TTh 9:00-10:00 AM", capacity=5))
+    restored = store(path)
+    restored.restore(kb)
+    restored.close()
+    assert kb.courses["CS101"]["enrolled"] == 3
+    assert kb.courses["MATH101"]["enrolled"] == 1
+    assert kb.seats.available_seats("CS101") == 2
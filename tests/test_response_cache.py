@@ -0,0 +1,64 @@
+from main import (NLPProcessor, ResponseCache, StudentIdAllocator, UniversityChatbot, UniversityKnowledgeBase,
+                  default_intent_registry)
+
+
+def sessions(count):
+    kb = UniversityKnowledgeBase()
+    nlp, cache, student_ids = NLPProcessor(kb), ResponseCache(), StudentIdAllocator()
+    return kb, cache, [UniversityChatbot(kb, nlp, response_cache=cache, student_ids=student_ids)
+                       for _ in range(count)]
+
+
+def test_cached_reply_is_shared_until_the_knowledge_base_changes():
+    kb, cache, (ann, bob) = sessions(2)
+    first = ann.generate_response("tell me about cs101")
+    assert bob.generate_response("tell me about cs101") == first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    kb.update_course("CS101", room="Tech Building 999")
+    changed = bob.generate_response("tell me about cs101")
+    assert "Tech Building 999" in changed and changed != first
+    assert cache.misses == 2
+
+
+def test_enrollment_change_invalidates_seat_counts():
+    kb, cache, (ann, bob) = sessions(2)
+    assert "15/30" in bob.generate_response("tell me about cs101")
+    ann.generate_response("My name is Ann")
+    ann.generate_response("register for cs101")
+    ann.generate_response("yes")
+    assert "16/30" in bob.generate_response("tell me about cs101")
+
+
+def test_personal_details_are_added_after_the_cache():
+    kb, cache, (ann, bob) = sessions(2)
+    ann.generate_response("My name is Ann")
+    ann.generate_response("register for cs101")
+    ann.generate_response("yes")
+    bob.generate_response("My name is Bob")
+
+    misses = cache.misses
+    assert "You're registered for this course" in ann.generate_response("tell me about cs101")
+    bob_reply = bob.generate_response("tell me about cs101")
+    assert "register for CS101" in bob_reply and "You're registered" not in bob_reply
+    assert cache.misses == misses + 1
+
+
+def test_personalized_intents_are_never_cached():
+    registry = default_intent_registry()
+    for name, entry in registry.handlers.items():
+        if entry.cacheable:
+            assert entry.read_only and not entry.needs_auth, name
+    for name in ("my_schedule", "eligible_courses", "schedule_fit", "register_course", "drop_course", "login"):
+        assert not registry.get(name).cacheable, name
+
+    kb, cache, (ann, bob) = sessions(2)
+    for bot, name, code in ((ann, "Ann", "cs101"), (bob, "Bob", "eng101")):
+        bot.generate_response(f"My name is {name}")
+        bot.generate_response(f"register for {code}")
+        bot.generate_response("yes")
+    entries = len(cache.entries)
+    assert "CS101" in ann.generate_response("show my schedule")
+    bob_schedule = bob.generate_response("show my schedule")
+    assert "ENG101" in bob_schedule and "CS101" not in bob_schedule
+    assert len(cache.entries) == entries
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from main import MINUTES_PER_DAY, IntervalIndex, parse_schedule
+
+
+def at(day, hour, minute=0):
+    return day * MINUTES_PER_DAY + hour * 60 + minute
+
+
+@pytest.mark.parametrize("schedule, intervals", [
+    ("MWF 9:00-10:00 AM", [(at(0, 9), at(0, 10)), (at(2, 9), at(2, 10)), (at(4, 9), at(4, 10))]),
+    ("TTh 2:00-3:30 PM", [(at(1, 14), at(1, 15, 30)), (at(3, 14), at(3, 15, 30))]),
+    ("MWF 11:00-12:00 PM", [(at(0, 11), at(0, 12)), (at(2, 11), at(2, 12)), (at(4, 11), at(4, 12))]),
+    ("TR 11:30 AM-1:00 PM", [(at(1, 11, 30), at(1, 13)), (at(3, 11, 30), at(3, 13))]),
+    ("MWF 1:00-2:00 PM, Lab: W 3:00-5:00 PM",
+     [(at(0, 13), at(0, 14)), (at(2, 13), at(2, 14)), (at(2, 15), at(2, 17)), (at(4, 13), at(4, 14))]),
+    ("Sa 9-11", [(at(5, 9), at(5, 11))]),
+    ("TBA", []),
+    ("Online, asynchronous", []),
+])
+def test_parse_schedule(schedule, intervals):
+    assert parse_schedule(schedule) == tuple(intervals)
+
+
+def test_touching_meetings_do_not_overlap():
+    index = IntervalIndex()
+    index.add("CS101", parse_schedule("MWF 9:00-10:00 AM"))
+    assert index.conflicts(parse_schedule("MWF 10:00-11:00 AM")) == set()
+    assert index.conflicts(parse_schedule("F 9:59-10:30 AM")) == {"CS101"}
+    assert index.conflicts(parse_schedule("TTh 9:00-10:00 AM")) == set()
+
+
+def test_long_meetings_are_found_from_later_starts():
+    index = IntervalIndex()
+    index.add("LAB", parse_schedule("W 8:00 AM-5:00 PM"))
+    index.add("CS101", parse_schedule("MWF 9:00-10:00 AM"))
+    assert index.conflicts(parse_schedule("W 4:00-4:30 PM")) == {"LAB"}
+    index.remove("LAB")
+    assert index.conflicts(parse_schedule("W 4:00-4:30 PM")) == set()
+    assert "LAB" not in index and len(index) == 1
+
+
+def test_conflicts_agree_with_pairwise_overlap():
+    rng = random.Random(3)
+    meetings = {f"C{i}": tuple(sorted((start, start + rng.randint(30, 240)) for start in
+                                      (at(rng.randrange(5), rng.randint(7, 18), rng.choice((0, 30)))
+                                       for _ in range(rng.randint(1, 3)))))
+                for i in range(60)}
+    index = IntervalIndex()
+    for key, intervals in meetings.items():
+        index.add(key, intervals)
+    for _ in range(200):
+        start = at(rng.randrange(5), rng.randint(7, 20))
+        query = ((start, start + rng.randint(1, 180)),)
+        expected = {key for key, intervals in meetings.items()
+                    if any(s < query[0][1] and query[0][0] < e for s, e in intervals)}
+        assert index.conflicts(query) == expected
@@ -0,0 +1,79 @@
+import threading
+
+from main import SeatLedger
+from catalog import Clock, course, knowledge_base, logged_in
+
+
+def test_failed_hold_keeps_pending_registration():
+    kb = knowledge_base(CS101=course("Intro", "MWF 9:00-10:00 AM", capacity=5),
+                        MATH101=course("Calculus", "TTh 9:00-10:00 AM", capacity=1, enrolled=1))
+    bot = logged_in(kb)
+    assert bot.generate_response("register for CS101").startswith("📝")
+
+    reply = bot.generate_response("register for MATH101")
+    assert "is full" in reply
+    assert "pending request for CS101" in reply
+    assert bot.pending_action == "register" and bot.pending_hold is not None
+    assert kb.seats.available_seats("CS101") == 4
+
+    assert bot.generate_response("yes").startswith("✅")
+    assert bot.student.registered_courses == {"CS101"}
+    assert kb.seats.waitlist.depth("MATH101") == 0
+
+
+def test_waitlist_is_offered_once_nothing_is_pending():
+    kb = knowledge_base(MATH101=course("Calculus", "TTh 9:00-10:00 AM", capacity=1, enrolled=1))
+    bot = logged_in(kb)
+    assert "join the waitlist" in bot.generate_response("register for MATH101")
+    assert "#1 on the waitlist" in bot.generate_response("yes")
+
+
+def test_expired_hold_gives_up_its_seat():
+    kb = knowledge_base(CS101=course("Intro", "MWF 9:00-10:00 AM", capacity=1))
+    clock = Clock()
+    seats = SeatLedger(kb, hold_seconds=60, clock=clock)
+    first = seats.hold("CS101")
+    assert first is not None and seats.hold("CS101") is None
+
+    clock.now += 61
+    assert seats.available_seats("CS101") == 1
+    second = seats.hold("CS101")
+    assert second is not None
+    # The late confirmation finds the seat held by someone else and must not oversell it.
+    assert not seats.commit(first)
+    assert seats.commit(second)
+    assert kb.courses["CS101"]["enrolled"] == 1
+
+
+def test_expired_hold_is_honoured_while_a_seat_is_free():
+    kb = knowledge_base(CS101=course("Intro", "MWF 9:00-10:00 AM", capacity=1))
+    clock = Clock()
+    seats = SeatLedger(kb, hold_seconds=60, clock=clock)
+    hold = seats.hold("CS101")
+    clock.now += 61
+    assert seats.commit(hold)
+    assert not seats.commit(hold)
+    assert kb.courses["CS101"]["enrolled"] == 1
+
+
+def test_concurrent_registrations_never_oversell():
+    kb = knowledge_base(CS101=course("Intro", "MWF 9:00-10:00 AM", capacity=5))
+    seats = SeatLedger(kb)
+    committed = []
+    start = threading.Barrier(16)
+
+    def register():
+        start.wait()
+        for _ in range(20):
+            hold = seats.hold("CS101")
+            if hold is not None and seats.commit(hold):
+                committed.append(hold.hold_id)
+
+    threads = [threading.Thread(target=register) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(committed) == 5
+    assert kb.courses["CS101"]["enrolled"] == 5
+    assert seats.available_seats("CS101") == 0
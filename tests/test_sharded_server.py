@@ -0,0 +1,26 @@
+import asyncio
+
+from chat_server import ShardedChatServer
+from main import student_shard
+
+
+def test_requests_for_a_dead_worker_get_an_error_reply():
+    async def scenario():
+        server = ShardedChatServer(2, port=0)
+        await server.start()
+        try:
+            sessions = {student_shard(f"s{number}", 2): f"s{number}" for number in range(20)}
+            reply = await asyncio.wait_for(server.respond({"message": "hello"}, sessions[0]), 30)
+            assert "response" in reply
+
+            server.processes[0].kill()
+            server.processes[0].join()
+            replies = [await asyncio.wait_for(server.respond({"message": "hello"}, sessions[0]), 10)
+                       for _ in range(3)]
+            assert replies == [{"session": sessions[0], "error": "worker unavailable"}] * 3
+            assert "response" in await asyncio.wait_for(server.respond({"message": "hello"}, sessions[1]), 10)
+        finally:
+            server.server.close()
+            server.stop_workers()
+
+    asyncio.run(scenario())
@@ -0,0 +1,30 @@
+import pytest
+
+from main import StudentIdAllocator
+
+
+def test_ids_do_not_depend_on_allocation_order():
+    names = [f"Student {number}" for number in range(200)]
+    forward, backward = StudentIdAllocator(), StudentIdAllocator()
+    forward_ids = [forward.allocate(name) for name in names]
+    backward_ids = [backward.allocate(name) for name in reversed(names)][::-1]
+
+    assert forward_ids == backward_ids
+    assert len(set(forward_ids)) == len(names)
+    assert forward.allocate("  student   0 ") == forward_ids[0]
+
+
+def test_colliding_id_is_refused(monkeypatch):
+    allocator = StudentIdAllocator()
+    monkeypatch.setattr(allocator, "student_id", lambda key: "STU0")
+    allocator.allocate("Ada")
+    with pytest.raises(ValueError):
+        allocator.allocate("Grace")
+    assert allocator.lookup("Grace") is None
+
+
+def test_id_format():
+    student_id = StudentIdAllocator().allocate("Ada Lovelace")
+    assert len(student_id) == 3 + 2 * StudentIdAllocator.DIGEST_SIZE
+    assert student_id.startswith("STU") and int(student_id[3:], 16) >= 0
+    assert student_id == StudentIdAllocator().allocate("ada  LOVELACE")
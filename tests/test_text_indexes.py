@@ -0,0 +1,71 @@
+from catalog import course, knowledge_base
+from main import EntityResolver, SearchIndex
+
+
+def resolved(kb, query, kinds=None):
+    return [(candidate.kind, candidate.value) for candidate in kb.entity_resolver().resolve(query, kinds)]
+
+
+def searched(kb, query):
+    return [(candidate.kind, candidate.value) for candidate in kb.search_index().search(query)]
+
+
+def test_catalog_edits_update_built_indexes_in_place():
+    kb = knowledge_base(ART100=course("Watercolour Painting", "MWF 9:00-9:50"),
+                        BIO100=course("Marine Biology", "TTh 10:00-11:15"))
+    kb.build_text_indexes()
+    resolver, searcher = kb.resolver, kb.searcher
+
+    kb.add_course("GEO100", course("Volcanology", "MWF 11:00-11:50"))
+    kb.update_course("ART100", name="Oil Painting", description="Oil Painting for tests")
+    kb.remove_course("BIO100")
+
+    assert kb.entity_resolver() is resolver and kb.search_index() is searcher
+    assert resolved(kb, "volcanolgy", ("course",))[0] == ("course", "GEO100")
+    assert resolved(kb, "oil paintng", ("course",))[0] == ("course", "ART100")
+    assert ("course", "BIO100") not in resolved(kb, "marine biology", ("course",))
+    assert "Watercolour Painting" not in [candidate.text for candidate in kb.entity_resolver().resolve("watercolour")]
+    assert searched(kb, "volcanology")[0] == ("course", "GEO100")
+    assert searched(kb, "oil")[0] == ("course", "ART100")
+    assert searched(kb, "marine") == []
+    assert searched(kb, "watercolour") == []
+
+
+def test_instructor_leaves_resolver_with_their_last_course():
+    kb = knowledge_base(ART100=dict(course("Watercolour Painting", "MWF 9:00-9:50"), instructor="Dr. Hokusai"),
+                        ART200=dict(course("Printmaking", "TTh 10:00-11:15"), instructor="Dr. Hokusai"))
+    kb.build_text_indexes()
+
+    kb.remove_course("ART100")
+    assert resolved(kb, "dr hokusai", ("instructor",))[0] == ("instructor", "Dr. Hokusai")
+    kb.update_course("ART200", instructor="Dr. Kahlo")
+    assert ("instructor", "Dr. Hokusai") not in resolved(kb, "dr hokusai", ("instructor",))
+    assert resolved(kb, "dr kahlo", ("instructor",))[0] == ("instructor", "Dr. Kahlo")
+
+
+def test_new_department_is_resolved_and_searchable():
+    kb = knowledge_base(ART100=course("Watercolour Painting", "MWF 9:00-9:50"))
+    kb.build_text_indexes()
+
+    kb.add_department("astronomy", {"name": "Department of Astronomy", "head": "Dr. Leavitt",
+                                    "location": "Observatory Hill", "popular_courses": []})
+    assert resolved(kb, "astronmy", ("department",))[0] == ("department", "astronomy")
+    assert searched(kb, "observatory")[0] == ("department", "astronomy")
+
+
+def test_repeated_edits_rebuild_indexes_instead_of_growing():
+    kb = knowledge_base(ART100=course("Watercolour Painting", "MWF 9:00-9:50"),
+                        BIO100=course("Marine Biology", "TTh 10:00-11:15"))
+    kb.build_text_indexes()
+    resolver, searcher = kb.resolver, kb.searcher
+
+    for edition in range(500):
+        kb.update_course("ART100", name=f"Painting Studio {edition}", description=f"Painting edition {edition}")
+        assert not kb.search_index().needs_rebuild() and not kb.entity_resolver().needs_rebuild()
+        assert len(kb.search_index().values) <= 2 + SearchIndex.MIN_REBUILD + 1
+        assert len(kb.entity_resolver().values) <= 4 * (EntityResolver.MIN_REBUILD + 2)
+
+    assert kb.search_index() is not searcher and kb.entity_resolver() is not resolver
+    assert searched(kb, "studio")[0] == ("course", "ART100")
+    assert searched(kb, "marine")[0] == ("course", "BIO100")
+    assert resolved(kb, "painting studio 499", ("course",))[0] == ("course", "ART100")
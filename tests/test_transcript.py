@@ -0,0 +1,124 @@
+from main import TranscriptRenderer
+
+
+class Root:
+    def __init__(self):
+        self.callbacks = []
+
+    def after_idle(self, callback):
+        self.callbacks.append(callback)
+
+    def run(self):
+        while self.callbacks:
+            self.callbacks.pop(0)()
+
+
+class Scrollbar:
+    def set(self, first, last):
+        pass
+
+
+class Text:
+    # Just enough of a Tk text widget: whole-line deletes from the top and a fixed-height view.
+    def __init__(self, height=10):
+        self.content = ""
+        self.height = height
+        self.top = 0
+        self.scrolled_to_end = 0
+        self.vbar = Scrollbar()
+
+    def tag_configure(self, tag, **options):
+        pass
+
+    def config(self, **options):
+        pass
+
+    def lines(self):
+        return self.content.split("\n")
+
+    def index(self, where):
+        assert where == "end-1c"
+        lines = self.lines()
+        return f"{len(lines)}.{len(lines[-1])}"
+
+    def insert(self, where, text, tag):
+        self.content = text + self.content if where == "1.0" else self.content + text
+
+    def delete(self, start, end):
+        assert start == "1.0"
+        self.content = "\n".join(self.lines()[int(end.split(".")[0]) - 1:])
+        self.top = max(0, self.top - (int(end.split(".")[0]) - 1))
+
+    def yview(self, *where):
+        if where:
+            self.top = int(where[0].split(".")[0]) - 1
+            return None
+        total = len(self.lines())
+        return self.top / total, min(1.0, (self.top + self.height) / total)
+
+    def see(self, where):
+        self.scrolled_to_end += 1
+        self.top = max(0, len(self.lines()) - self.height)
+
+
+def message(number, lines=1):
+    return [(f"message {number} line {line}\n", "bot_message") for line in range(lines)]
+
+
+def renderer(max_lines):
+    root, text = Root(), Text()
+    return root, text, TranscriptRenderer(root, text, max_lines=max_lines)
+
+
+def test_widget_is_capped_by_lines_not_messages():
+    root, text, transcript = renderer(max_lines=20)
+    for number in range(30):
+        transcript.append(message(number, lines=number % 4 + 1))
+        root.run()
+
+    assert transcript.widget_lines() <= 20 + 4
+    assert text.content.endswith("message 29 line 1\n")
+    assert sum(map(transcript.line_count, transcript.archive)) + transcript.widget_lines() - 1 == \
+        sum(number % 4 + 1 for number in range(30))
+
+
+def test_long_reply_is_never_cut():
+    root, text, transcript = renderer(max_lines=5)
+    transcript.append(message(0))
+    transcript.append(message(1, lines=12))
+    root.run()
+
+    assert len(transcript.visible) == 1
+    assert text.content.startswith("message 1 line 0\n") and text.content.endswith("message 1 line 11\n")
+
+
+def test_autoscroll_only_when_already_at_bottom():
+    root, text, transcript = renderer(max_lines=100)
+    for number in range(20):
+        transcript.append(message(number))
+        root.run()
+    assert text.scrolled_to_end == 20 and text.yview()[1] == 1.0
+
+    text.yview("3.0")
+    transcript.append(message(20))
+    root.run()
+    assert text.scrolled_to_end == 20 and text.top == 2
+
+    text.see("end")
+    transcript.append(message(21))
+    root.run()
+    assert text.scrolled_to_end == 22 and text.yview()[1] == 1.0
+
+
+def test_scrolling_to_the_top_pages_trimmed_messages_back_in():
+    root, text, transcript = renderer(max_lines=10)
+    for number in range(40):
+        transcript.append(message(number))
+        root.run()
+    archived = len(transcript.archive)
+
+    transcript.on_yscroll("0.0", "0.3")
+    root.run()
+    assert len(transcript.archive) < archived
+    assert transcript.widget_lines() <= 2 * 10 + 1
+    assert text.content.startswith(f"message {len(transcript.archive)} line 0\n")
@@ -0,0 +1,206 @@
+import pytest
+
+from main import NLPProcessor, SeatLedger, StudentIdAllocator, UniversityChatbot, Waitlist
+from catalog import course, knowledge_base
+
+
+def promoted_to(promotions):
+    return lambda student_id, course_code: promotions.append((student_id, course_code))
+
+
+def test_fifo_serves_in_join_order():
+    waitlist = Waitlist()
+    for student_id in ("a", "b", "c"):
+        waitlist.join("CS101", student_id, None)
+    assert waitlist.position("CS101", "c") == 3
+    assert [waitlist.pop("CS101").student_id for _ in range(3)] == ["a", "b", "c"]
+    assert waitlist.pop("CS101") is None
+    assert waitlist.depths() == {}
+
+
+def test_priority_serves_lowest_value_then_join_order():
+    waitlist = Waitlist("priority")
+    waitlist.join("CS101", "a", None, priority=9)
+    waitlist.join("CS101", "b", None, priority=3)
+    waitlist.join("CS101", "c", None, priority=3)
+    assert waitlist.position("CS101", "a") == 3
+    assert [waitlist.pop("CS101").student_id for _ in range(3)] == ["b", "c", "a"]
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        Waitlist("random")
+
+
+def test_leave_skips_student_and_rejoin_goes_to_the_back():
+    waitlist = Waitlist()
+    for student_id in ("a", "b"):
+        waitlist.join("CS101", student_id, None)
+    assert waitlist.leave("CS101", "a")
+    assert waitlist.join("CS101", "a", None) == 2
+    assert [waitlist.pop("CS101").student_id for _ in range(2)] == ["b", "a"]
+
+
+def test_ineligible_student_keeps_place_and_seat_goes_to_next():
+    waitlist = Waitlist()
+    waitlist.join("CS101", "a", None, eligible=lambda student_id, course_code: False)
+    waitlist.join("CS101", "b", None)
+    assert waitlist.pop("CS101").student_id == "b"
+    assert waitlist.position("CS101", "a") == 1
+    assert waitlist.pop("CS101") is None
+
+
+def test_drop_promotes_first_waiting_student():
+    kb = knowledge_base(CS101=course("Intro", "MWF 9:00-10:00 AM", capacity=1, enrolled=1))
+    promotions = []
+    kb.seats.waitlist.join("CS101", "a", promoted_to(promotions))
+    kb.seats.waitlist.join("CS101", "b", promoted_to(promotions))
+    assert kb.seats.hold("CS101") is None
+
+    assert kb.seats.drop("CS101")
+    assert promotions == [("a", "CS101")]
+    assert kb.courses["CS101"]["enrolled"] == 1
+    assert kb.seats.waitlist.position("CS101", "b") == 1
+
+
+def test_released_hold_goes_to_waitlist_before_new_holds():
+    kb = knowledge_base(CS101=course("Intro", "MWF 9:00-10:00 AM", capacity=1))
+    promotions = []
+    hold = kb.seats.hold("CS101")
+    kb.seats.waitlist.join("CS101", "a", promoted_to(promotions))
+    kb.seats.release(hold)
+    assert promotions == [("a", "CS101")]
+    assert kb.seats.hold("CS101") is None
+
+
+def test_expired_hold_is_promoted_by_sweep():
+    now = [0.0]
+    kb = knowledge_base(CS101=course("Intro", "MWF 9:00-10:00 AM", capacity=1))
+    kb.seats = SeatLedger(kb, hold_seconds=10, clock=lambda: now[0])
+    promotions = []
+    kb.seats.hold("CS101")
+    kb.seats.waitlist.join("CS101", "a", promoted_to(promotions))
+    assert kb.seats.promote_waitlisted() == 0
+    now[0] = 11
+    assert kb.seats.promote_waitlisted() == 1
+    assert promotions == [("a", "CS101")]
+
+
+def test_failed_bulk_commit_hands_seats_to_the_waitlist():
+    now = [0.0]
+    kb = knowledge_base(CS101=course("Intro", "MWF 9:00-10:00 AM", capacity=1),
+                        MATH101=course("Calculus", "TTh 9:00-10:00 AM", capacity=1))
+    kb.seats = SeatLedger(kb, hold_seconds=10, clock=lambda: now[0])
+    promotions = []
+    holds, full = kb.seats.hold_many(["CS101", "MATH101"])
+    kb.seats.waitlist.join("CS101", "a", promoted_to(promotions))
+    now[0] = 11
+    assert kb.seats.hold("MATH101") is not None
+
+    assert kb.seats.commit_many(holds) == ["MATH101"]
+    assert promotions == [("a", "CS101")]
+    assert kb.courses["CS101"]["enrolled"] == 1
+    assert kb.seats.waitlist.depth("CS101") == 0
+
+
+def chatbots(kb, count):
+    nlp = NLPProcessor(kb)
+    student_ids = StudentIdAllocator()
+    return [UniversityChatbot(kb, nlp, student_ids=student_ids) for _ in range(count)]
+
+
+def test_promotion_skips_student_with_clashing_course():
+    kb = knowledge_base(CS201=course("Data Structures", "TTh 2:00-3:30 PM", capacity=1, enrolled=1),
+                        ART210=course("Drawing", "TTh 2:00-3:00 PM", capacity=5))
+    bob, cy = chatbots(kb, 2)
+    bob.generate_response("My name is Bob")
+    cy.generate_response("My name is Cy")
+    for bot in (bob, cy):
+        assert "join the waitlist" in bot.generate_response("register for CS201")
+        assert "on the waitlist" in bot.generate_response("yes")
+
+    # Bob takes a clashing course while waiting, so the freed CS201 seat must go to Cy.
+    bob.generate_response("register for ART210")
+    assert bob.generate_response("yes").startswith("✅")
+    kb.seats.drop("CS201")
+
+    assert "CS201" not in bob.generate_response("my schedule").split("Waitlisted")[0]
+    assert "now registered for it" in cy.generate_response("my schedule")
+    assert cy.student.registered_courses == {"CS201"}
+    assert kb.seats.waitlist.position("CS201", bob.student.student_id) == 1
+    assert kb.courses["CS201"]["enrolled"] == 1
+
+
+def test_promotion_respects_credit_limit():
+    kb = knowledge_base(BIG101=course("Big", "MWF 8:00-9:00 AM", capacity=5, credits=16),
+                        CS101=course("Intro", "MWF 9:00-10:00 AM", capacity=1, enrolled=1))
+    (bot,) = chatbots(kb, 1)
+    bot.generate_response("My name is Dee")
+    bot.generate_response("register for CS101")
+    bot.generate_response("yes")
+    bot.generate_response("register for BIG101")
+    bot.generate_response("yes")
+    kb.seats.drop("CS101")
+    assert kb.courses["CS101"]["enrolled"] == 0
+    assert kb.seats.waitlist.depth("CS101") == 1
+
+
+def test_promotion_that_no_longer_fits_is_passed_on():
+    kb = knowledge_base(CS201=course("Data Structures", "TTh 2:00-3:30 PM", capacity=1, enrolled=1),
+                        ART210=course("Drawing", "TTh 2:00-3:00 PM", capacity=5))
+    (bot,) = chatbots(kb, 1)
+    bot.generate_response("My name is Eve")
+    bot.generate_response("register for CS201")
+    bot.generate_response("yes")
+    kb.seats.drop("CS201")
+    # The session registers the clashing course before it has seen the promotion.
+    bot.student.register_course("ART210", kb.index.meeting_times["ART210"])
+    assert "so it was passed on" in bot.generate_response("my schedule")
+    assert bot.student.registered_courses == {"ART210"}
+    assert kb.courses["CS201"]["enrolled"] == 0
+
+
+def waiting_for_cs201(kb, *names):
+    bots = chatbots(kb, len(names))
+    for bot, name in zip(bots, names):
+        bot.generate_response(f"My name is {name}")
+        assert "join the waitlist" in bot.generate_response("register for CS201")
+        assert "on the waitlist" in bot.generate_response("yes")
+    return bots
+
+
+def test_promotion_after_logout_goes_to_the_next_student():
+    kb = knowledge_base(CS201=course("Data Structures", "TTh 2:00-3:30 PM", capacity=1, enrolled=1))
+    bob, cy = waiting_for_cs201(kb, "Bob", "Cy")
+    kb.seats.drop("CS201")
+    # Bob's seat is queued on his session, but he logs out before seeing it.
+    bob.logout()
+
+    assert "now registered for it" in cy.generate_response("my schedule")
+    assert cy.student.registered_courses == {"CS201"}
+    assert kb.courses["CS201"]["enrolled"] == 1
+
+
+def test_promotion_for_a_previous_student_is_not_lost(tmp_path):
+    from profile_store import ProfileStore
+
+    kb = knowledge_base(CS201=course("Data Structures", "TTh 2:00-3:30 PM", capacity=1, enrolled=1))
+    profiles = ProfileStore(str(tmp_path / "profiles.log"), fsync=False)
+    bot = UniversityChatbot(kb, NLPProcessor(kb), profile_store=profiles, student_ids=StudentIdAllocator())
+    bot.generate_response("My name is Bob")
+    bot.generate_response("register for CS201")
+    bot.generate_response("yes")
+    bob_id = bot.student.student_id
+    bot.logout()
+    bot.generate_response("My name is Dee")
+
+    kb.seats.drop("CS201")
+    bot.generate_response("my schedule")
+    assert bot.student.registered_courses == set()
+    assert profiles.profile(bob_id).courses == {"CS201"}
+    assert kb.courses["CS201"]["enrolled"] == 1
+
+    bot.logout()
+    assert "1 registered course" in bot.generate_response("My name is Bob")
+    assert bot.student.registered_courses == {"CS201"}
+    profiles.close()